@@ -42,3 +42,10 @@ class MeSerializer(serializers.ModelSerializer):
             "document_id",
             "is_active",
         ]
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Resumen de usuario para incrustar (expand) en otras respuestas."""
+    class Meta:
+        model = User
+        fields = ["id", "email", "first_name", "last_name", "role"]
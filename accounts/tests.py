@@ -35,3 +35,11 @@ class AdminUsersTests(TestCase):
         self.assertEqual(r.status_code, 200)
         self.user.refresh_from_db()
         self.assertTrue(self.user.is_active)
+
+    def test_admin_can_page_users_with_cursor(self):
+        self.auth(self.admin)
+        r = self.client.get("/api/accounts/admin/users/?cursor=")
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertNotIn("count", body)
+        self.assertEqual([u["id"] for u in body["results"]], [self.user.id, self.gestor.id, self.admin.id])
@@ -3,6 +3,8 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 
+from config.pagination import PageOrCursorPagination
+
 from .serializers import UserCreateSerializer, MeSerializer
 from .permissions import IsAdmin
 
@@ -13,6 +15,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("-id")
     serializer_class = UserCreateSerializer
     permission_classes = [IsAdmin]
+    pagination_class = PageOrCursorPagination
 
     @action(detail=True, methods=["put"], url_path="activar")
     def activar(self, request, pk=None):
@@ -0,0 +1,127 @@
+import json
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import CaseEvent, CaseEventArchive
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder recorta a milisegundos; el archivo guarda el valor exacto
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def event_month(event):
+    return timezone.localtime(event.created_at).date().replace(day=1)
+
+
+def pack(events):
+    # todos los campos concretos (attname): lo que se agregue a CaseEvent también se archiva
+    fields = [f.attname for f in CaseEvent._meta.concrete_fields]
+    lines = (json.dumps({name: getattr(e, name) for name in fields}, cls=ArchiveEncoder) for e in events)
+    return zlib.compress("\n".join(lines).encode(), level=9)
+
+
+def unpack(blob):
+    events = []
+    for line in zlib.decompress(bytes(blob)).decode().splitlines():
+        fields = json.loads(line)
+        fields["created_at"] = parse_datetime(fields["created_at"])
+        events.append(CaseEvent(**fields))
+    return events
+
+
+def archive_batch(before, batch_size):
+    """
+    Mueve a CaseEventArchive hasta `batch_size` eventos con created_at < before
+    (los de id más bajo). Cada lote es una transacción corta: inserta los
+    segmentos por (case, mes) y borra esos eventos. Devuelve
+    (eventos archivados, ids de cases afectados).
+    """
+    with transaction.atomic():
+        events = list(
+            CaseEvent.objects.select_for_update()
+            .filter(created_at__lt=before)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0, set()
+
+        events.sort(key=lambda e: (e.case_id, event_month(e), e.created_at, e.id))
+        segments = []
+        for (case_id, month), group in groupby(events, key=lambda e: (e.case_id, event_month(e))):
+            group = list(group)
+            segments.append(
+                CaseEventArchive(
+                    case_id=case_id,
+                    month=month,
+                    event_count=len(group),
+                    first_event_id=min(e.id for e in group),
+                    last_event_id=max(e.id for e in group),
+                    first_created_at=group[0].created_at,
+                    last_created_at=group[-1].created_at,
+                    data=pack(group),
+                )
+            )
+        CaseEventArchive.objects.bulk_create(segments)
+        # delete() dispara post_delete -> invalida la cache de esos cases
+        CaseEvent.objects.filter(id__in=[e.id for e in events]).delete()
+
+    return len(events), {e.case_id for e in events}
+
+
+def archived_events(case_ids):
+    """
+    {case_id: [CaseEvent, ...]} con los eventos archivados de esos cases,
+    ordenados por (created_at, id). Son instancias sin guardar, con los
+    mismos campos que tenían en CaseEvent. 1 query.
+    """
+    by_case = defaultdict(list)
+    segments = CaseEventArchive.objects.filter(case_id__in=case_ids).only("case_id", "data")
+    for segment in segments:
+        by_case[segment.case_id].extend(unpack(segment.data))
+    for events in by_case.values():
+        events.sort(key=lambda e: (e.created_at, e.id))
+    return by_case
+
+
+def archived_page(case_id, after, count, event_type=None):
+    """
+    Eventos archivados de un case posteriores a `after` ((created_at, id) o
+    None), en orden, hasta completar `count` (o menos si no hay más).
+    Lee primero los metadatos de los segmentos (sin `data`) y solo
+    descomprime los que pueden caer en la página: el resto del archivo del
+    case no se toca.
+    """
+    segments = CaseEventArchive.objects.filter(case_id=case_id).defer("data")
+    if after is not None:
+        segments = segments.filter(Q(last_created_at__gte=after[0]) | Q(last_created_at__isnull=True))
+    segments = sorted(segments, key=lambda s: (s.first_created_at is not None, s.first_created_at, s.first_event_id))
+
+    events = []
+    for segment in segments:
+        # ya hay `count` eventos y este segmento empieza después del último: nada suyo entra
+        if len(events) >= count and segment.first_created_at is not None \
+                and segment.first_created_at > events[count - 1].created_at:
+            break
+        for event in unpack(segment.data):  # `data` diferido: 1 query por segmento inflado
+            if after is not None and (event.created_at, event.id) <= after:
+                continue
+            if event_type and event.event_type != event_type:
+                continue
+            events.append(event)
+        events.sort(key=lambda e: (e.created_at, e.id))
+
+    events = events[:count]
+    prefetch_related_objects(events, "created_by")
+    return events
@@ -0,0 +1,338 @@
+"""
+Cadena de hashes de auditoría (evidencia de que el historial no se alteró).
+
+- Cada CaseEvent guarda prev_hash (event_hash del evento anterior del mismo
+  case, GENESIS si es el primero) y event_hash = sha256(prev_hash + contenido).
+  Lo calcula el writer (audit/writer.py) al insertar, con la fila del case
+  bloqueada para que dos escrituras concurrentes no bifurquen la cadena.
+- AuditCheckpoint guarda raíces Merkle de rangos de ids ya verificados,
+  encadenadas entre sí. La verificación normal solo re-hashea lo posterior al
+  último checkpoint; --full re-hashea todo (incluidos los archivados).
+- Un case se verifica solo en O(eventos de ese case).
+
+El contenido incluye created_by_id: borrar un usuario (SET_NULL) se ve como
+alteración del historial; desactívelo en su lugar.
+"""
+
+import hashlib
+import json
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from cases.models import Case
+
+from .archive import archived_events, unpack
+from .models import AuditCheckpoint, CaseEvent, CaseEventArchive
+
+GENESIS = "0" * 64
+MAX_REPORTED_ERRORS = 100
+
+
+def sha256(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def canonical(event):
+    created_at = event.created_at.astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return json.dumps(
+        [event.case_id, event.event_type, event.from_status, event.to_status,
+         event.payload, event.created_by_id, created_at],
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+
+
+def event_digest(prev_hash, event):
+    return sha256(prev_hash + canonical(event))
+
+
+def link(events, prev_hash):
+    """Encadena `events` (en orden) a partir de prev_hash; devuelve la nueva cabeza."""
+    for event in events:
+        event.prev_hash = prev_hash
+        event.event_hash = event_digest(prev_hash, event)
+        prev_hash = event.event_hash
+    return prev_hash
+
+
+# ---------------------------------------------------------------------------
+# Escritura
+# ---------------------------------------------------------------------------
+
+def archived_heads(case_ids, before_id=None):
+    """{case_id: event_hash del último evento archivado (id < before_id)}."""
+    heads = {}
+    segments = CaseEventArchive.objects.filter(case_id__in=case_ids)
+    if before_id is not None:
+        segments = segments.filter(first_event_id__lt=before_id)
+    for segment in segments.order_by("case_id", "-last_event_id").only("case_id", "data"):
+        if segment.case_id in heads:
+            continue
+        events = [e for e in unpack(segment.data) if before_id is None or e.id < before_id]
+        if events:
+            heads[segment.case_id] = max(events, key=lambda e: e.id).event_hash or GENESIS
+    return heads
+
+
+def rechain_tail(case_id):
+    """
+    Encadena los eventos sin hash al final de la cadena de un case (históricos
+    de antes de la cadena, o escritos sin pasar por el writer). Los huecos en
+    medio de la cadena no se tocan: la verificación los reporta.
+    """
+    last_hashed = CaseEvent.objects.filter(case_id=case_id).exclude(event_hash="").order_by("-id").first()
+    if last_hashed:
+        head, after = last_hashed.event_hash, last_hashed.id
+    else:
+        head, after = archived_heads([case_id]).get(case_id, GENESIS), 0
+
+    tail = list(CaseEvent.objects.filter(case_id=case_id, id__gt=after).order_by("id"))
+    head = link(tail, head)
+    CaseEvent.objects.bulk_update(tail, ["prev_hash", "event_hash"], batch_size=1000)
+    return head
+
+
+def chain_heads(case_ids, lock=False):
+    """
+    {case_id: hash del último evento} para encadenar eventos nuevos.
+    1 query (+1 de lock de las filas de Case si lock=True) + 1 a los
+    archivos si algún case no tiene eventos vivos.
+
+    El lock va en su propio statement: en READ COMMITTED un SELECT ... FOR
+    UPDATE que esperó el lock devuelve las subqueries con su snapshot
+    original, sin el evento que el otro escritor acaba de confirmar (y la
+    cadena se bifurca). La lectura de las cabezas, después, ve ese commit.
+    """
+    if lock:
+        list(Case.objects.select_for_update().filter(id__in=case_ids).order_by("id").values_list("id", flat=True))
+
+    last = CaseEvent.objects.filter(case_id=OuterRef("pk")).order_by("-id")
+    rows = (
+        Case.objects.filter(id__in=case_ids)
+        .order_by("id")
+        .annotate(head_id=Subquery(last.values("id")[:1]), head_hash=Subquery(last.values("event_hash")[:1]))
+        .values_list("id", "head_id", "head_hash")
+    )
+
+    heads, empty = {}, []
+    for case_id, head_id, head_hash in rows:
+        if head_id is None:
+            empty.append(case_id)
+        elif head_hash:
+            heads[case_id] = head_hash
+        else:
+            heads[case_id] = rechain_tail(case_id)
+
+    if empty:
+        archived = archived_heads(empty)
+        for case_id in empty:
+            heads[case_id] = archived.get(case_id, GENESIS)
+    return heads
+
+
+def chain_events(events):
+    """Asigna prev_hash/event_hash a eventos nuevos (en orden de inserción). Dentro de atomic()."""
+    heads = chain_heads(sorted({event.case_id for event in events}), lock=True)
+    for event in events:
+        heads[event.case_id] = link([event], heads[event.case_id])
+
+
+def backfill(batch_size=500):
+    """Encadena los eventos sin hash (históricos). Devuelve cuántos cases tocó."""
+    total = 0
+    while True:
+        case_ids = list(
+            CaseEvent.objects.filter(event_hash="").order_by("case_id")
+            .values_list("case_id", flat=True).distinct()[:batch_size]
+        )
+        if not case_ids:
+            return total
+        for case_id in case_ids:
+            rechain_tail(case_id)
+        total += len(case_ids)
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------------------------------
+
+def merkle_root(hashes):
+    level = [sha256(h) for h in hashes]
+    if not level:
+        return GENESIS
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [sha256(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def range_hashes(first_id, last_id):
+    """event_hash de los eventos con id en [first_id, last_id], vivos y archivados, por id."""
+    rows = list(
+        CaseEvent.objects.filter(id__gte=first_id, id__lte=last_id).order_by("id").values_list("id", "event_hash")
+    )
+    segments = CaseEventArchive.objects.filter(first_event_id__lte=last_id, last_event_id__gte=first_id)
+    for segment in segments.only("data"):
+        rows += [(e.id, e.event_hash) for e in unpack(segment.data) if first_id <= e.id <= last_id]
+    return [h for _, h in sorted(rows)]
+
+
+def create_checkpoints(size, lag_seconds):
+    """
+    Cierra checkpoints de hasta `size` eventos desde el último. Solo incluye
+    eventos con más de `lag_seconds`, para no dejar fuera ids bajos de
+    transacciones que aún no confirmaban.
+    """
+    last = AuditCheckpoint.objects.order_by("-last_event_id").first()
+    prev_root = last.root if last else GENESIS
+    start = last.last_event_id + 1 if last else 0
+    cutoff = timezone.now() - timedelta(seconds=lag_seconds)
+
+    created = []
+    while True:
+        rows = list(
+            CaseEvent.objects.filter(id__gte=start).order_by("id").values_list("id", "created_at")[:size]
+        )
+        ids = []
+        for event_id, created_at in rows:
+            if created_at >= cutoff:
+                break
+            ids.append(event_id)
+        if not ids:
+            return created
+
+        hashes = range_hashes(start, ids[-1])
+        merkle = merkle_root(hashes)
+        checkpoint = AuditCheckpoint.objects.create(
+            first_event_id=start,
+            last_event_id=ids[-1],
+            event_count=len(hashes),
+            merkle_root=merkle,
+            prev_root=prev_root,
+            root=sha256(prev_root + merkle),
+        )
+        created.append(checkpoint)
+        prev_root, start = checkpoint.root, ids[-1] + 1
+        if len(ids) < size:
+            return created
+
+
+# ---------------------------------------------------------------------------
+# Verificación
+# ---------------------------------------------------------------------------
+
+def check_events(events, heads, errors):
+    """Verifica eventos ordenados por id contra heads {case_id: hash anterior}; actualiza heads."""
+    for event in events:
+        expected_prev = heads.get(event.case_id, GENESIS)
+        if not event.event_hash:
+            error = "sin_hash"
+        elif event.prev_hash != expected_prev:
+            error = "enlace"
+        elif event_digest(event.prev_hash, event) != event.event_hash:
+            error = "contenido"
+        else:
+            error = None
+        if error:
+            errors.append({"id": event.id, "case": event.case_id, "error": error})
+        heads[event.case_id] = event.event_hash or expected_prev
+    return len(events)
+
+
+def report(checked, errors, **extra):
+    return {
+        "ok": not errors,
+        "checked_events": checked,
+        "error_count": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        **extra,
+    }
+
+
+def verify_case(case_id):
+    """Re-hashea toda la cadena de un case (archivados + vivos): O(eventos del case)."""
+    events = archived_events([case_id]).get(case_id, [])
+    events += list(CaseEvent.objects.filter(case_id=case_id))
+    events.sort(key=lambda e: e.id)
+    errors = []
+    checked = check_events(events, {}, errors)
+    return report(checked, errors, case=case_id)
+
+
+def heads_before(case_ids, before_id):
+    """{case_id: hash del último evento con id < before_id} (vivo o archivado)."""
+    prev = CaseEvent.objects.filter(case_id=OuterRef("pk"), id__lt=before_id).order_by("-id")
+    rows = Case.objects.filter(id__in=case_ids).annotate(h=Subquery(prev.values("event_hash")[:1]))
+    heads = {case_id: h for case_id, h in rows.values_list("id", "h") if h is not None}
+    missing = [case_id for case_id in case_ids if case_id not in heads]
+    if missing:
+        heads.update(archived_heads(missing, before_id=before_id))
+    return heads
+
+
+class TailTooLarge(Exception):
+    """Demasiados eventos sin checkpoint para verificar dentro de una request."""
+
+
+def verify_log(full=False, chunk_size=5000, max_events=None):
+    """
+    1) La cadena de checkpoints (sin leer eventos).
+    2) Incremental: re-hashea solo los eventos posteriores al último
+       checkpoint, enlazándolos con el hash anterior de cada case.
+       full=True: recalcula cada raíz Merkle y re-hashea todos los eventos,
+       incluidos los archivados.
+
+    max_events (solo incremental): si la cola sin checkpoint pasa de ese
+    tamaño levanta TailTooLarge antes de leer eventos.
+    """
+    errors = []
+    checkpoints = list(AuditCheckpoint.objects.order_by("last_event_id"))
+    if not full and max_events is not None:
+        start = checkpoints[-1].last_event_id + 1 if checkpoints else 0
+        # exists() con OFFSET acotado: no cuenta toda la tabla
+        if CaseEvent.objects.filter(id__gte=start).order_by("id")[max_events:].exists():
+            raise TailTooLarge()
+
+    prev_root = GENESIS
+    for checkpoint in checkpoints:
+        if checkpoint.prev_root != prev_root or checkpoint.root != sha256(checkpoint.prev_root + checkpoint.merkle_root):
+            errors.append({"checkpoint": checkpoint.id, "error": "checkpoint"})
+        elif full and merkle_root(
+            range_hashes(checkpoint.first_event_id, checkpoint.last_event_id)
+        ) != checkpoint.merkle_root:
+            errors.append({"checkpoint": checkpoint.id, "error": "merkle"})
+        prev_root = checkpoint.root
+
+    heads, checked = {}, 0
+    if full:
+        # los archivados de cada case siempre van antes que sus eventos vivos
+        by_case = {}
+        for segment in CaseEventArchive.objects.order_by("case_id", "first_event_id").only("case_id", "data").iterator():
+            by_case.setdefault(segment.case_id, []).extend(unpack(segment.data))
+        for events in by_case.values():
+            checked += check_events(sorted(events, key=lambda e: e.id), heads, errors)
+        start = 0
+    else:
+        start = checkpoints[-1].last_event_id + 1 if checkpoints else 0
+
+    last_id = start - 1
+    while True:
+        events = list(CaseEvent.objects.filter(id__gt=last_id).order_by("id")[:chunk_size])
+        if not events:
+            break
+        if not full:
+            new_cases = {e.case_id for e in events} - heads.keys()
+            if new_cases and start > 0:
+                heads.update(heads_before(new_cases, start))
+        checked += check_events(events, heads, errors)
+        last_id = events[-1].id
+
+    return report(
+        checked,
+        errors,
+        mode="full" if full else "incremental",
+        checkpoints=len(checkpoints),
+        last_checkpoint=checkpoints[-1].last_event_id if checkpoints else None,
+    )
@@ -0,0 +1,35 @@
+from config.filters import parse_choice, parse_int, parse_moment
+from cases.models import CaseStatus
+
+from .models import EventType
+
+
+def filter_events(queryset, params):
+    """
+    Filtros del feed de auditoría (?event_type=, ?created_by=, ?from_status=,
+    ?to_status=, ?case=, ?created_after=, ?created_before=). Los combos
+    frecuentes tienen índice compuesto en CaseEvent.Meta.indexes.
+    """
+    event_type = parse_choice(params, "event_type", EventType)
+    from_status = parse_choice(params, "from_status", CaseStatus)
+    to_status = parse_choice(params, "to_status", CaseStatus)
+    created_by = parse_int(params, "created_by")
+    case_id = parse_int(params, "case")
+    created_after = parse_moment(params, "created_after")
+    created_before = parse_moment(params, "created_before", end_of_day=True)
+
+    if event_type:
+        queryset = queryset.filter(event_type=event_type)
+    if from_status:
+        queryset = queryset.filter(from_status=from_status)
+    if to_status:
+        queryset = queryset.filter(to_status=to_status)
+    if created_by is not None:
+        queryset = queryset.filter(created_by_id=created_by)
+    if case_id is not None:
+        queryset = queryset.filter(case_id=case_id)
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    if created_before:
+        queryset = queryset.filter(created_at__lte=created_before)
+    return queryset
@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from audit.archive import archive_batch
+from audit.models import CaseEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los CaseEvent más antiguos que AUDIT_ARCHIVE_AFTER_DAYS a segmentos "
+        "comprimidos por case y mes (CaseEventArchive), en lotes cortos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.AUDIT_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.AUDIT_ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=0, help="0 = hasta terminar.")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pausa (s) entre lotes.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo cuenta lo que se archivaría.")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["older_than_days"])
+
+        if options["dry_run"]:
+            pending = CaseEvent.objects.filter(created_at__lt=before).count()
+            self.stdout.write(f"{pending} eventos anteriores a {before:%Y-%m-%d} por archivar")
+            return
+
+        total, batches, cases = 0, 0, set()
+        while not options["max_batches"] or batches < options["max_batches"]:
+            archived, case_ids = archive_batch(before, options["batch_size"])
+            if not archived:
+                break
+            total += archived
+            batches += 1
+            cases |= case_ids
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} eventos archivados en {batches} lotes ({len(cases)} solicitudes)")
+        )
@@ -0,0 +1,78 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from audit.chain import GENESIS, create_checkpoints, link, verify_case, verify_log
+from audit.models import CaseEvent, EventType
+from cases.models import Case
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de la cadena de auditoría sobre una tabla sintética: inserta N eventos "
+        "encadenados, cierra checkpoints y mide verificación incremental, por case y completa. "
+        "Todo se revierte al final salvo --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2_000_000)
+        parser.add_argument("--cases", type=int, default=20_000)
+        parser.add_argument("--tail", type=int, default=1_000, help="Eventos nuevos después del último checkpoint.")
+        parser.add_argument("--checkpoint-size", type=int, default=100_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--skip-full", action="store_true", help="No medir la verificación completa.")
+        parser.add_argument("--keep", action="store_true", help="Confirmar los datos sintéticos.")
+
+    def timed(self, label, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.stdout.write(f"{label:<32} {time.perf_counter() - start:9.3f} s")
+        return result
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email=f"bench-audit-{time.time_ns()}@example.com", password=None, role="GESTOR"
+            )
+            cases = self.timed("crear cases", lambda: Case.objects.bulk_create(
+                [Case(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=user)
+                 for _ in range(options["cases"])],
+                batch_size=options["batch_size"],
+            ))
+            case_ids = [case.id for case in cases]
+            heads = dict.fromkeys(case_ids, GENESIS)
+
+            def insert(count):
+                for offset in range(0, count, options["batch_size"]):
+                    now = timezone.now()
+                    batch = [
+                        CaseEvent(case_id=case_ids[(offset + i) % len(case_ids)], event_type=EventType.UPDATED,
+                                  payload={"n": offset + i}, created_by=user, created_at=now)
+                        for i in range(min(options["batch_size"], count - offset))
+                    ]
+                    for event in batch:
+                        heads[event.case_id] = link([event], heads[event.case_id])
+                    CaseEvent.objects.bulk_create(batch)
+
+            body = options["events"] - options["tail"]
+            self.timed(f"insertar {body} eventos", lambda: insert(body))
+            checkpoints = self.timed(
+                "checkpoints", lambda: create_checkpoints(options["checkpoint_size"], lag_seconds=0)
+            )
+            self.stdout.write(f"  {len(checkpoints)} checkpoints")
+            self.timed(f"insertar {options['tail']} eventos", lambda: insert(options["tail"]))
+
+            incremental = self.timed("verificar incremental", verify_log)
+            one = self.timed("verificar 1 case", lambda: verify_case(case_ids[0]))
+            results = [incremental, one]
+            if not options["skip_full"]:
+                results.append(self.timed("verificar completa", lambda: verify_log(full=True)))
+
+            for result in results:
+                self.stdout.write(f"  {result['checked_events']} eventos, ok={result['ok']}")
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from audit.chain import backfill, create_checkpoints
+
+
+class Command(BaseCommand):
+    help = (
+        "Encadena los CaseEvent que aún no tienen hash y cierra checkpoints Merkle "
+        "de AUDIT_CHECKPOINT_SIZE eventos desde el último."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=settings.AUDIT_CHECKPOINT_SIZE)
+        parser.add_argument("--lag-seconds", type=int, default=settings.AUDIT_CHECKPOINT_LAG_SECONDS)
+        parser.add_argument("--skip-backfill", action="store_true")
+
+    def handle(self, *args, **options):
+        if not options["skip_backfill"]:
+            cases = backfill()
+            if cases:
+                self.stdout.write(f"{cases} solicitudes con eventos encadenados por primera vez")
+
+        checkpoints = create_checkpoints(options["size"], options["lag_seconds"])
+        events = sum(c.event_count for c in checkpoints)
+        last = f" (hasta id {checkpoints[-1].last_event_id})" if checkpoints else ""
+        self.stdout.write(self.style.SUCCESS(f"{len(checkpoints)} checkpoints nuevos, {events} eventos{last}"))
@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from audit.chain import verify_case, verify_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Verifica la cadena de hashes de auditoría. Por defecto solo re-hashea lo "
+        "posterior al último checkpoint; --full lo re-hashea todo; --case una solicitud."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--case", type=int, help="Verificar solo esta solicitud.")
+        parser.add_argument("--full", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["case"]:
+            result = verify_case(options["case"])
+        else:
+            result = verify_log(full=options["full"])
+
+        self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
+        if not result["ok"]:
+            raise CommandError(f"{result['error_count']} errores en la cadena de auditoría")
+        self.stdout.write(self.style.SUCCESS(f"OK: {result['checked_events']} eventos verificados"))
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+        ('cases', '0009_case_code'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='caseevent',
+            index=models.Index(fields=['case', 'created_at', 'id'], name='event_case_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_event_timeline_index'),
+        ('cases', '0009_case_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseEventArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('event_count', models.PositiveIntegerField()),
+                ('first_event_id', models.BigIntegerField()),
+                ('last_event_id', models.BigIntegerField()),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_archives', to='cases.case')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['case', 'month'], name='event_archive_case_month_idx')],
+            },
+        ),
+    ]
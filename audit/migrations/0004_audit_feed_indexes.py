@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_case_event_archive'),
+        ('cases', '0009_case_code'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='caseevent',
+            index=models.Index(fields=['created_at', 'id'], name='event_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caseevent',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='event_actor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caseevent',
+            index=models.Index(fields=['event_type', 'created_at', 'id'], name='event_type_created_idx'),
+        ),
+    ]
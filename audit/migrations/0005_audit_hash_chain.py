@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:20
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_audit_feed_indexes'),
+        ('cases', '0009_case_code'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_event_id', models.BigIntegerField()),
+                ('last_event_id', models.BigIntegerField(unique=True)),
+                ('event_count', models.PositiveIntegerField()),
+                ('merkle_root', models.CharField(max_length=64)),
+                ('prev_root', models.CharField(max_length=64)),
+                ('root', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['last_event_id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='caseevent',
+            name='event_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='caseevent',
+            name='prev_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='caseevent',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='caseevent',
+            index=models.Index(fields=['case', '-id'], name='event_case_id_idx'),
+        ),
+    ]
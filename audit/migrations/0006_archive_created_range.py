@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:40
+
+import json
+import zlib
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def fill_created_range(apps, schema_editor):
+    # segmentos ya archivados: el rango sale del propio contenido
+    CaseEventArchive = apps.get_model("audit", "CaseEventArchive")
+    for segment in CaseEventArchive.objects.filter(first_created_at__isnull=True).iterator(chunk_size=200):
+        moments = [
+            parse_datetime(json.loads(line)["created_at"])
+            for line in zlib.decompress(bytes(segment.data)).decode().splitlines()
+        ]
+        segment.first_created_at, segment.last_created_at = min(moments), max(moments)
+        segment.save(update_fields=["first_created_at", "last_created_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_audit_hash_chain'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='caseeventarchive',
+            name='first_created_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='caseeventarchive',
+            name='last_created_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_created_range, migrations.RunPython.noop),
+    ]
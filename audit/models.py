@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 class EventType(models.TextChoices):
     CREATED = "CREATED", "Created"
@@ -14,4 +15,65 @@ class CaseEvent(models.Model):
     payload = models.JSONField(default=dict, blank=True)
 
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
+    # default (no auto_now_add): el writer necesita el valor antes del INSERT para el hash
+    created_at = models.DateTimeField(default=timezone.now)
+
+    # cadena por case (audit/chain.py): event_hash = sha256(prev_hash + contenido)
+    prev_hash = models.CharField(max_length=64, blank=True, default="")
+    event_hash = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # cabeza de la cadena de cada case (último id)
+            models.Index(fields=["case", "-id"], name="event_case_id_idx"),
+            # timeline paginado por (created_at, id) dentro de un case
+            models.Index(fields=["case", "created_at", "id"], name="event_case_created_id_idx"),
+            # feed global /admin/auditoria/ (keyset por -created_at, -id)
+            models.Index(fields=["created_at", "id"], name="event_created_id_idx"),
+            models.Index(fields=["created_by", "created_at", "id"], name="event_actor_created_idx"),
+            models.Index(fields=["event_type", "created_at", "id"], name="event_type_created_idx"),
+        ]
+
+
+class CaseEventArchive(models.Model):
+    """
+    Segmento frío de auditoría: eventos de un case en un mes, sacados de
+    CaseEvent por `archive_audit_events` y guardados como NDJSON comprimido
+    (zlib). Un (case, month) puede tener varios segmentos si se archivó en
+    varias pasadas; audit/archive.py los une al leer.
+    """
+    case = models.ForeignKey("cases.Case", on_delete=models.CASCADE, related_name="event_archives")
+    month = models.DateField()  # primer día del mes (created_at de los eventos)
+    event_count = models.PositiveIntegerField()
+    first_event_id = models.BigIntegerField()
+    last_event_id = models.BigIntegerField()
+    # rango de created_at del segmento: el timeline paginado solo descomprime
+    # los segmentos que tocan la página (audit/archive.py::archived_page)
+    first_created_at = models.DateTimeField(null=True)
+    last_created_at = models.DateTimeField(null=True)
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["case", "month"], name="event_archive_case_month_idx"),
+        ]
+
+
+class AuditCheckpoint(models.Model):
+    """
+    Raíz Merkle de los event_hash de CaseEvent con id en
+    [first_event_id, last_event_id]. Cada checkpoint encadena la raíz del
+    anterior (root = sha256(prev_root + merkle_root)), así que alterar uno
+    invalida todos los siguientes. Lo crea `checkpoint_audit_log`.
+    """
+    first_event_id = models.BigIntegerField()
+    last_event_id = models.BigIntegerField(unique=True)
+    event_count = models.PositiveIntegerField()
+    merkle_root = models.CharField(max_length=64)
+    prev_root = models.CharField(max_length=64)
+    root = models.CharField(max_length=64)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["last_event_id"]
@@ -1,8 +1,25 @@
 from rest_framework import serializers
 from .models import CaseEvent
 
+from accounts.serializers import UserSummarySerializer
+
 
 class CaseEventSerializer(serializers.ModelSerializer):
     class Meta:
         model = CaseEvent
         fields = ["id", "event_type", "from_status", "to_status", "payload", "created_by", "created_at"]
+
+
+class CaseEventTimelineSerializer(CaseEventSerializer):
+    # actor incrustado (requiere select_related("created_by") en la vista)
+    actor = UserSummarySerializer(source="created_by", read_only=True)
+
+    class Meta(CaseEventSerializer.Meta):
+        fields = CaseEventSerializer.Meta.fields + ["actor"]
+
+
+class AuditFeedSerializer(CaseEventTimelineSerializer):
+    case_code = serializers.CharField(read_only=True)  # anotado en la vista
+
+    class Meta(CaseEventTimelineSerializer.Meta):
+        fields = ["case", "case_code"] + CaseEventTimelineSerializer.Meta.fields + ["prev_hash", "event_hash"]
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# se envía después de insertar un lote de CaseEvent con bulk_create
+# (bulk_create no dispara post_save). kwargs: events=[CaseEvent, ...]
+events_written = Signal()
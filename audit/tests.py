@@ -1,3 +1,331 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cases.models import Case
+from . import archive as archive_module
+from .archive import archived_events
+from .chain import GENESIS, create_checkpoints, verify_case, verify_log
+from .models import AuditCheckpoint, CaseEvent, CaseEventArchive, EventType
+from .writer import record_event
+
+User = get_user_model()
+
+
+@override_settings(AUDIT_WRITE_MODE="buffered")
+class BufferedAuditWriterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="audit@test.com", password="pass12345", role="CAMPESINO")
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+
+    def inserts(self, queries):
+        return [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "audit_caseevent"')]
+
+    def test_events_are_written_once_on_commit(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    record_event(self.case, EventType.UPDATED, actor=self.user)
+                    record_event(self.case, EventType.UPDATED, actor=self.user)
+                    record_event(self.case, EventType.STATUS_CHANGED, to_status="REGISTRADA")
+                    self.assertFalse(CaseEvent.objects.exists())
+
+        self.assertEqual(CaseEvent.objects.count(), 3)
+        self.assertEqual(len(self.inserts(queries)), 1)
+
+    def test_rolled_back_work_leaves_no_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                record_event(self.case, EventType.UPDATED, payload={"n": 1})
+                try:
+                    with transaction.atomic():
+                        record_event(self.case, EventType.UPDATED, payload={"n": 2})
+                        raise ValueError
+                except ValueError:
+                    pass
+                record_event(self.case, EventType.UPDATED, payload={"n": 3})
+
+            try:
+                with transaction.atomic():
+                    record_event(self.case, EventType.UPDATED, payload={"n": 4})
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(sorted(e.payload["n"] for e in CaseEvent.objects.all()), [1, 3])
+
+    def test_eventos_endpoint_unchanged(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            r = client.post(
+                "/api/solicitudes/",
+                data={"applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": {}},
+                format="json",
+            )
+        self.assertEqual(r.status_code, 201)
+
+        events = client.get(f"/api/solicitudes/{r.json()['id']}/eventos/").json()
+        self.assertEqual([e["event_type"] for e in events], ["CREATED"])
+
+    @override_settings(AUDIT_WRITE_MODE="strict")
+    def test_strict_mode_writes_immediately(self):
+        with transaction.atomic():
+            record_event(self.case, EventType.UPDATED)
+            self.assertEqual(CaseEvent.objects.count(), 1)
+
+
+class AuditArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="archive@test.com", password="pass12345", role="CAMPESINO")
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        now = timezone.now()
+        ages = [800, 800, 770, 770, 760, 5]  # días: tres meses viejos + uno reciente
+        for i, days in enumerate(ages):
+            event = CaseEvent.objects.create(
+                case=self.case, event_type=EventType.UPDATED if i % 2 else EventType.STATUS_CHANGED,
+                payload={"n": i}, created_by=self.user,
+            )
+            CaseEvent.objects.filter(id=event.id).update(created_at=now - timedelta(days=days))
+        self.before = self.timeline()
+
+    def timeline(self, query=""):
+        return self.client.get(f"/api/solicitudes/{self.case.id}/eventos/{query}").json()
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_audit_events", *args, stdout=out)
+        return out.getvalue()
+
+    def test_archives_old_events_in_batches(self):
+        self.assertIn("5 eventos", self.archive("--dry-run"))
+        self.assertIn("5 eventos archivados en 3 lotes", self.archive("--batch-size=2"))
+
+        self.assertEqual(CaseEvent.objects.count(), 1)
+        self.assertEqual(sum(CaseEventArchive.objects.values_list("event_count", flat=True)), 5)
+        self.assertGreaterEqual(CaseEventArchive.objects.values("month").distinct().count(), 2)
+
+        archived = archived_events([self.case.id])[self.case.id]
+        self.assertEqual([e.payload["n"] for e in archived], [0, 1, 2, 3, 4])
+
+    def test_readers_stitch_archived_and_hot_events(self):
+        self.archive()
+
+        self.assertEqual(self.timeline(), self.before)
+        self.assertEqual(
+            [e["id"] for e in self.timeline("?event_type=UPDATED")],
+            [e["id"] for e in self.before if e["event_type"] == "UPDATED"],
+        )
+
+        url, seen = f"/api/solicitudes/{self.case.id}/eventos/?cursor=&page_size=2", []
+        while url:
+            body = self.client.get(url).json()
+            seen += body["results"]
+            url = body["next"]
+        self.assertEqual(seen, self.before)
+
+        r = self.client.get("/api/solicitudes/export/?format=ndjson&include_events=1")
+        (line,) = [json.loads(raw) for raw in b"".join(r.streaming_content).decode().splitlines()]
+        self.assertEqual([e["id"] for e in line["eventos"]], [e["id"] for e in self.before])
+
+
+    def test_paged_timeline_only_inflates_overlapping_segments(self):
+        self.archive("--batch-size=2")
+        self.assertGreaterEqual(CaseEventArchive.objects.count(), 3)
+
+        inflated = []
+        real_unpack = archive_module.unpack
+
+        def counting_unpack(blob):
+            events = real_unpack(blob)
+            inflated.append(len(events))
+            return events
+
+        with patch.object(archive_module, "unpack", counting_unpack):
+            first = self.client.get(f"/api/solicitudes/{self.case.id}/eventos/?cursor=&page_size=1").json()
+            self.assertEqual(first["results"], self.before[:1])
+            self.assertEqual(len(inflated), 1)
+
+            # página que ya cae en CaseEvent: no descomprime nada
+            inflated.clear()
+            last = archive_module.archived_page(self.case.id, (timezone.now() - timedelta(days=6), 0), 2)
+            self.assertEqual((last, inflated), ([], []))
+
+
+class AdminAuditFeedTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(email="admin_feed@test.com", password="pass12345", role="ADMIN")
+        self.gestor = User.objects.create_user(email="gestor_feed@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_feed@test.com", password="pass12345", role="CAMPESINO")
+        self.case = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="CAPACITACION", status="REGISTRADA", created_by=self.camp
+        )
+
+        yesterday = timezone.now() - timedelta(days=1)
+        self.events = CaseEvent.objects.bulk_create(
+            [CaseEvent(case=self.case, event_type=EventType.UPDATED, created_by=self.camp) for _ in range(3)]
+            + [
+                CaseEvent(case=self.case, event_type=EventType.STATUS_CHANGED, from_status="REGISTRADA",
+                          to_status=to_status, created_by=self.gestor)
+                for to_status in ["EN_REVISION", "EN_AJUSTES", "EN_REVISION"]
+            ]
+        )
+        # mismo instante para todos los de ayer: el desempate por id tiene que aguantar
+        CaseEvent.objects.filter(id__in=[e.id for e in self.events[1:]]).update(created_at=yesterday)
+        self.client.force_authenticate(user=self.admin)
+
+    def feed(self, query=""):
+        r = self.client.get(f"/api/admin/auditoria/?{query}")
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def test_admin_only(self):
+        self.client.force_authenticate(user=self.gestor)
+        self.assertEqual(self.client.get("/api/admin/auditoria/").status_code, 403)
+
+    def test_filters(self):
+        day = (timezone.now() - timedelta(days=1)).date().isoformat()
+        body = self.feed(f"event_type=STATUS_CHANGED&created_by={self.gestor.id}&to_status=EN_REVISION"
+                         f"&created_after={day}&created_before={day}")
+
+        self.assertEqual([e["id"] for e in body["results"]], [self.events[5].id, self.events[3].id])
+        self.assertEqual(body["results"][0]["actor"]["email"], "gestor_feed@test.com")
+        self.assertEqual(body["results"][0]["case"], self.case.id)
+        self.assertEqual(body["results"][0]["case_code"], self.case.code)
+
+        self.assertEqual(self.client.get("/api/admin/auditoria/?event_type=NOPE").status_code, 400)
+
+    def test_keyset_pages_newest_first(self):
+        url, seen = "/api/admin/auditoria/?page_size=2", []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                body = self.client.get(url).json()
+                seen += [e["id"] for e in body["results"]]
+                url = body["next"]
+
+        expected = [e.id for e in self.events[:1]] + sorted((e.id for e in self.events[1:]), reverse=True)
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(queries.captured_queries), 3)  # 1 query por página
+        self.assertNotIn("COUNT(", " ".join(q["sql"] for q in queries.captured_queries))
+
+
+class AuditChainTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="chain@test.com", password="pass12345", role="CAMPESINO")
+        self.admin = User.objects.create_user(email="chain_admin@test.com", password="pass12345", role="ADMIN")
+        self.cases = [
+            Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+            for _ in range(2)
+        ]
+
+    def write(self, n):
+        return [
+            record_event(self.cases[i % 2], EventType.UPDATED, actor=self.user, payload={"n": i})
+            for i in range(n)
+        ]
+
+    def test_events_chain_per_case(self):
+        a1, b1, a2 = self.write(3)
+        self.assertEqual(a1.prev_hash, GENESIS)
+        self.assertEqual(a2.prev_hash, a1.event_hash)
+        self.assertEqual(b1.prev_hash, GENESIS)
+        self.assertTrue(verify_case(self.cases[0].id)["ok"])
+
+        CaseEvent.objects.filter(id=a1.id).update(payload={"n": 99})
+        result = verify_case(self.cases[0].id)
+        self.assertEqual(result["errors"], [{"id": a1.id, "case": self.cases[0].id, "error": "contenido"}])
+        self.assertEqual(result["checked_events"], 2)
+
+    def test_incremental_verification_starts_at_last_checkpoint(self):
+        old = self.write(6)
+        self.assertEqual(len(create_checkpoints(size=4, lag_seconds=0)), 2)
+        self.write(3)
+
+        result = verify_log()
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["checked_events"], 3)
+
+        # alterar algo ya cubierto por un checkpoint: solo lo ve la verificación completa
+        CaseEvent.objects.filter(id=old[1].id).update(to_status="VALIDADA")
+        self.assertTrue(verify_log()["ok"])
+        full = verify_log(full=True)
+        self.assertEqual(full["checked_events"], 9)
+        self.assertEqual([e["error"] for e in full["errors"]], ["contenido"])
+
+        # alterar un checkpoint rompe la cadena de checkpoints
+        AuditCheckpoint.objects.filter(last_event_id=old[3].id).update(merkle_root=GENESIS)
+        self.assertIn({"checkpoint": AuditCheckpoint.objects.first().id, "error": "checkpoint"}, verify_log()["errors"])
+
+    def test_legacy_events_are_backfilled_and_archive_keeps_chain(self):
+        legacy = CaseEvent.objects.create(case=self.cases[0], event_type=EventType.CREATED, created_by=self.user)
+        self.assertEqual(legacy.event_hash, "")
+
+        # el writer encadena primero la cola sin hash
+        (new,) = self.write(1)
+        legacy.refresh_from_db()
+        self.assertEqual(new.prev_hash, legacy.event_hash)
+
+        CaseEvent.objects.create(case=self.cases[1], event_type=EventType.CREATED, created_by=self.user)
+        call_command("checkpoint_audit_log", "--lag-seconds=0", stdout=StringIO())
+        self.assertFalse(CaseEvent.objects.filter(event_hash="").exists())
+
+        CaseEvent.objects.filter(case=self.cases[0]).update(created_at=timezone.now() - timedelta(days=400))
+        self.assertFalse(verify_case(self.cases[0].id)["ok"])  # created_at es parte del contenido
+
+    def test_archived_events_stay_verifiable(self):
+        self.write(4)
+        # el archivo guarda created_at exacto (microsegundos): los hashes siguen valiendo
+        call_command("archive_audit_events", "--older-than-days=-1", stdout=StringIO())
+        self.assertFalse(CaseEvent.objects.exists())
+
+        self.write(2)  # siguen la cadena desde el último evento archivado
+        self.assertTrue(verify_case(self.cases[0].id)["ok"])
+        self.assertTrue(verify_log(full=True)["ok"])
+
+    def test_verify_endpoint_and_command(self):
+        self.write(3)
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+
+        self.assertTrue(client.get("/api/admin/auditoria/verificar/").json()["ok"])
+        body = client.get(f"/api/admin/auditoria/verificar/?case={self.cases[0].id}").json()
+        self.assertEqual((body["ok"], body["checked_events"]), (True, 2))
+
+        client.force_authenticate(user=self.user)
+        self.assertEqual(client.get("/api/admin/auditoria/verificar/").status_code, 403)
+
+        out = StringIO()
+        call_command("verify_audit_chain", "--full", stdout=out)
+        self.assertIn("OK: 3 eventos", out.getvalue())
+
+    @override_settings(AUDIT_VERIFY_MAX_EVENTS=2)
+    def test_verify_endpoint_requires_checkpoint_for_large_tail(self):
+        self.write(3)
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        self.assertEqual(client.get("/api/admin/auditoria/verificar/").status_code, 409)
+
+        create_checkpoints(size=2, lag_seconds=0)
+        body = client.get("/api/admin/auditoria/verificar/").json()
+        self.assertEqual((body["ok"], body["checked_events"]), (True, 0))
+
+    def test_bench_runs_and_rolls_back(self):
+        out = StringIO()
+        call_command("bench_audit_chain", "--events=300", "--cases=7", "--tail=20", "--checkpoint-size=50", stdout=out)
+        self.assertIn("verificar incremental", out.getvalue())
+        self.assertNotIn("ok=False", out.getvalue())
+        self.assertFalse(CaseEvent.objects.exists())
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import AdminAuditFeedView, AdminAuditVerifyView
+
+urlpatterns = [
+    path("admin/auditoria/", AdminAuditFeedView.as_view(), name="admin-auditoria"),
+    path("admin/auditoria/verificar/", AdminAuditVerifyView.as_view(), name="admin-auditoria-verificar"),
+]
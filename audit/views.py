@@ -1,3 +1,67 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.db.models import F
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from accounts.permissions import IsAdmin
+from config.pagination import KeysetPagination
+
+from .chain import TailTooLarge, verify_case, verify_log
+from .filters import filter_events
+from .models import CaseEvent
+from .serializers import AuditFeedSerializer
+
+
+class AuditFeedPagination(KeysetPagination):
+    descending = True
+
+
+class AdminAuditFeedView(generics.ListAPIView):
+    """
+    GET /admin/auditoria/  -> eventos de todas las solicitudes, más nuevos primero.
+
+    Paginación keyset por (created_at, id) con ?cursor= (sin COUNT ni OFFSET),
+    filtros en audit/filters.py. Solo CaseEvent (los eventos ya archivados
+    se ven en el timeline de cada solicitud).
+    """
+    serializer_class = AuditFeedSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = AuditFeedPagination
+
+    def get_queryset(self):
+        # solo el code del case (join por PK), no toda la fila con su data
+        queryset = CaseEvent.objects.select_related("created_by").annotate(case_code=F("case__code"))
+        return filter_events(queryset, self.request.query_params)
+
+
+class AdminAuditVerifyView(APIView):
+    """
+    GET /admin/auditoria/verificar/           -> verificación incremental (desde el último checkpoint)
+    GET /admin/auditoria/verificar/?case=<id> -> cadena completa de una solicitud
+
+    La verificación completa es pesada: solo por comando (verify_audit_chain --full).
+    Si la cola sin checkpoint pasa de AUDIT_VERIFY_MAX_EVENTS (o aún no hay
+    checkpoints en una tabla grande) responde 409: primero checkpoint_audit_log.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        case_id = request.query_params.get("case")
+        if case_id:
+            try:
+                return Response(verify_case(int(case_id)))
+            except ValueError:
+                raise ValidationError({"case": "Debe ser un número entero."})
+        try:
+            return Response(verify_log(max_events=settings.AUDIT_VERIFY_MAX_EVENTS))
+        except TailTooLarge:
+            return Response(
+                {
+                    "detail": "Demasiados eventos sin checkpoint para verificar en línea. "
+                    "Ejecute checkpoint_audit_log o verify_audit_chain."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
@@ -0,0 +1,93 @@
+"""
+API de escritura de auditoría.
+
+Dentro de una transacción los eventos se acumulan y se insertan con un solo
+bulk_create en transaction.on_commit: si la transacción (o el savepoint
+donde se registraron) se revierte, Django descarta el callback y los
+eventos no se escriben. Fuera de una transacción se escriben de inmediato.
+
+Cada lote se encadena (prev_hash/event_hash, ver audit/chain.py) en la
+misma transacción del INSERT.
+
+AUDIT_WRITE_MODE = "strict" escribe siempre al momento (tests con
+TestCase, donde on_commit no se ejecuta).
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .chain import chain_events
+from .models import CaseEvent
+from .signals import events_written
+
+
+_state = threading.local()
+
+
+class _Batch:
+    """Eventos pendientes de un mismo nivel de savepoint; es el callback de on_commit."""
+
+    def __init__(self, sids):
+        self.sids = sids
+        self.events = []
+
+    def __call__(self):
+        write(self.events)
+
+
+def write(events):
+    if not events:
+        return events
+    # la cadena de hashes se calcula con los cases bloqueados hasta el INSERT
+    with transaction.atomic():
+        chain_events(events)
+        CaseEvent.objects.bulk_create(events)
+    events_written.send(sender=CaseEvent, events=events)
+    return events
+
+
+def _current_batch(connection):
+    """
+    El lote abierto sigue sirviendo si su callback está aún registrado (no
+    hubo commit ni rollback que lo consumiera) y estamos en el mismo
+    savepoint; si no, hay que abrir uno nuevo.
+    """
+    batch = getattr(_state, "batch", None)
+    if batch is None or batch.sids != tuple(connection.savepoint_ids):
+        return None
+    if not any(entry[1] is batch for entry in connection.run_on_commit):
+        return None
+    return batch
+
+
+def record_events(events):
+    """Registra CaseEvent (sin guardar). Devuelve la misma lista."""
+    events = list(events)
+    connection = transaction.get_connection()
+
+    if settings.AUDIT_WRITE_MODE == "strict" or not connection.in_atomic_block:
+        return write(events)
+
+    batch = _current_batch(connection)
+    if batch is None:
+        batch = _state.batch = _Batch(tuple(connection.savepoint_ids))
+        transaction.on_commit(batch)
+    batch.events.extend(events)
+    return events
+
+
+def record_event(case, event_type, *, actor=None, from_status="", to_status="", payload=None):
+    return record_events(
+        [
+            CaseEvent(
+                case=case,
+                event_type=event_type,
+                from_status=from_status,
+                to_status=to_status,
+                payload=payload or {},
+                created_by=actor,
+            )
+        ]
+    )[0]
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CasesConfig(AppConfig):
     name = 'cases'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,76 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import metrics
+
+HITS = "case_cache.hits"
+MISSES = "case_cache.misses"
+
+
+def _case_version_key(case_id):
+    return f"casecache:case:{case_id}"
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _bump(case_ids):
+    cache.set_many({_case_version_key(case_id): _new_version() for case_id in case_ids}, timeout=None)
+
+
+def invalidate_cases(case_ids):
+    """
+    Cambia la versión de cada case. Se hace ya (misma petición) y otra vez
+    al hacer commit, para que un lector concurrente no deje cacheado el
+    estado previo al commit.
+
+    Es un extra: las llaves de cached() llevan el ETag, que sale de la BD,
+    así que un cambio hecho en otro proceso (LocMemCache es por proceso)
+    tampoco sirve un cuerpo viejo.
+    """
+    case_ids = list(case_ids)
+    _bump(case_ids)
+    transaction.on_commit(lambda: _bump(case_ids))
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def case_version(case_id):
+    return _version(_case_version_key(case_id))
+
+
+def cached(parts, build):
+    """
+    Devuelve (data, hit). `parts` arma la llave; debe incluir el ETag de la
+    respuesta (cases/etags.py: se calcula de la BD en cada request) para que
+    un cambio nunca sirva un cuerpo viejo, y si aplica case_version().
+    Registra aciertos/fallos en cases.metrics.
+    """
+    key = "casecache:repr:" + hashlib.sha256(repr(parts).encode()).hexdigest()
+    data = cache.get(key)
+    if data is not None:
+        metrics.incr(HITS)
+        return data, True
+
+    metrics.incr(MISSES)
+    data = build()
+    cache.set(key, data, timeout=settings.CASE_CACHE_TIMEOUT)
+    return data, False
+
+
+def stats():
+    hits, misses = metrics.get(HITS), metrics.get(MISSES)
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": (hits / total) if total else 0.0}
@@ -0,0 +1,19 @@
+from django.core.checks import Tags, Warning, register
+
+from .metrics import is_shared
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """Idempotency-Key y cases.metrics necesitan un cache compartido entre workers."""
+    if is_shared():
+        return []
+    return [
+        Warning(
+            "El cache default es LocMemCache (uno por proceso).",
+            hint="Con varios workers un reintento con Idempotency-Key que cae en otro proceso se vuelve "
+            "a ejecutar, y las métricas (case_cache_stats, /admin/metricas/) son por proceso. "
+            "Configure CACHE_BACKEND con un backend compartido (Redis, DatabaseCache).",
+            id="cases.W001",
+        )
+    ]
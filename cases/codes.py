@@ -0,0 +1,159 @@
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .models import CaseCodeSequence, RequestType
+
+PREFIXES = {
+    RequestType.CAPACITACION: "CAP",
+    RequestType.PROYECTO_PRODUCTIVO: "PRO",
+}
+
+# bloques reservados por este proceso: (prefix, year) -> [siguiente, fin)
+_blocks = {}
+_lock = threading.Lock()
+# secuencias de PostgreSQL ya verificadas: nombre -> INCREMENT BY real
+_sequences = {}
+
+
+def format_code(prefix, year, number):
+    return f"{prefix}-{year}-{number:06d}"
+
+
+SEQUENCE_LOOKUP = "SELECT increment_by FROM pg_sequences WHERE schemaname = current_schema() AND sequencename = %s"
+
+
+def _create_sequence(name):
+    """
+    Crea la secuencia en una conexión aparte, en autocommit: queda confirmada
+    aunque la transacción de quien llama (perform_create, un bloque del sync)
+    haga rollback después. Dentro de esa transacción el rollback la borraba y
+    este proceso seguía sirviendo bloques de una secuencia inexistente.
+    """
+    other = connections.create_connection(connection.alias)
+    try:
+        with other.cursor() as cursor:
+            # advisory lock de sesión: dos procesos no corren el CREATE a la vez
+            # (chocaban en pg_type)
+            cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", [name])
+            try:
+                cursor.execute(SEQUENCE_LOOKUP, [name])
+                row = cursor.fetchone()
+                if row is None:
+                    size = settings.CASE_CODE_BLOCK_SIZE
+                    cursor.execute(f"CREATE SEQUENCE {name} INCREMENT BY {size} START WITH 1")
+                    row = (size,)
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", [name])
+    finally:
+        other.close()
+    return row
+
+
+def _sequence_increment(cursor, name):
+    """
+    Crea la secuencia del prefijo/año si falta (una vez por proceso) y
+    devuelve su INCREMENT BY real: CASE_CODE_BLOCK_SIZE solo aplica a las
+    secuencias nuevas, cambiarlo después no puede solapar bloques. Solo se
+    guarda en _sequences lo ya confirmado.
+    """
+    if name in _sequences:
+        return _sequences[name]
+
+    cursor.execute(SEQUENCE_LOOKUP, [name])
+    row = cursor.fetchone() or _create_sequence(name)
+    _sequences[name] = row[0]
+    return row[0]
+
+
+def _reserve_postgres(prefix, year, count):
+    """
+    nextval() no es transaccional ni bloquea filas: cada llamada reserva un
+    bloque de INCREMENT BY números. Pide en una sola query los bloques
+    necesarios para `count` códigos.
+    """
+    name = f"case_code_{prefix.lower()}_{year}"
+    with connection.cursor() as cursor:
+        size = _sequence_increment(cursor, name)
+        blocks = -(-count // size)
+        cursor.execute(f"SELECT nextval('{name}') FROM generate_series(1, %s)", [blocks])
+        return [(start, start + size) for (start,) in cursor.fetchall()]
+
+
+def _reserve_table(prefix, year, count):
+    size = max(settings.CASE_CODE_BLOCK_SIZE, count)
+    with transaction.atomic():
+        CaseCodeSequence.objects.get_or_create(prefix=prefix, year=year)
+        seq = CaseCodeSequence.objects.select_for_update().get(prefix=prefix, year=year)
+        start = seq.next_value
+        seq.next_value = start + size
+        seq.save(update_fields=["next_value"])
+    return [(start, start + size)]
+
+
+def _remember(key, block):
+    with _lock:
+        _blocks[key] = block
+
+
+def allocate(prefix, year, count):
+    """
+    Devuelve `count` números únicos para (prefix, year). Se sirven de bloques
+    reservados en memoria; solo se toca la BD al agotar el bloque. Puede
+    dejar huecos (bloques no usados al reiniciar), nunca duplicados.
+    """
+    postgres = connection.vendor == "postgresql"
+    reserve = _reserve_postgres if postgres else _reserve_table
+    key = (prefix, year)
+    numbers = []
+    fresh = False
+    with _lock:
+        block = _blocks.pop(key, None)
+        while True:
+            if block is not None:
+                take = min(block[1] - block[0], count - len(numbers))
+                numbers.extend(range(block[0], block[0] + take))
+                block[0] += take
+            if len(numbers) >= count:
+                break
+            new_blocks = reserve(prefix, year, count - len(numbers))
+            for start, end in new_blocks[:-1]:
+                take = min(end - start, count - len(numbers))
+                numbers.extend(range(start, start + take))
+            block = list(new_blocks[-1])
+            fresh = True
+
+        # con la tabla, la reserva vive en la transacción de quien llama: si hace
+        # rollback, otro proceso vuelve a recibir esos números. El resto del
+        # bloque solo se guarda en memoria si confirma.
+        deferred = fresh and not postgres and connection.in_atomic_block
+        if block[0] < block[1] and not deferred:
+            _blocks[key] = block
+
+    if block[0] < block[1] and deferred:
+        transaction.on_commit(lambda: _remember(key, block))
+    return numbers
+
+
+def assign_codes(cases, year=None):
+    """Asigna Case.code (en memoria) a los cases que lo necesiten; no guarda."""
+    year = year or timezone.localdate().year
+    pending = defaultdict(list)
+    for case in cases:
+        if case.needs_code():
+            pending[PREFIXES.get(case.request_type, "SOL")].append(case)
+
+    for prefix, group in pending.items():
+        for case, number in zip(group, allocate(prefix, year, len(group))):
+            case.code = format_code(prefix, year, number)
+    return [case for group in pending.values() for case in group]
+
+
+def reset_blocks():
+    """Olvida los bloques en memoria (tests)."""
+    with _lock:
+        _blocks.clear()
+        _sequences.clear()
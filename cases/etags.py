@@ -0,0 +1,72 @@
+import hashlib
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Case, CaseDocument
+from audit.models import CaseEvent
+
+
+def _weak_etag(*parts):
+    digest = hashlib.md5(":".join(str(p) for p in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def case_etag(request, case_id):
+    """
+    ETag de un case (detalle, timeline, documentos) en una sola query:
+    updated_at del case + id del último evento + id y updated_at del último
+    documento tocado (PENDING -> READY cambia el ETag).
+    La URL completa entra en el hash para distinguir ?fields=/?expand=/etc.
+    """
+    last_event = CaseEvent.objects.filter(case=OuterRef("pk")).order_by("-id").values("id")[:1]
+    docs = CaseDocument.objects.filter(case=OuterRef("pk"))
+    last_doc = docs.order_by("-id").values("id")[:1]
+    doc_version = docs.order_by("-updated_at").values("updated_at")[:1]
+    row = (
+        Case.objects.filter(pk=case_id)
+        .annotate(last_event=Subquery(last_event), last_doc=Subquery(last_doc), doc_version=Subquery(doc_version))
+        .values_list("updated_at", "last_event", "last_doc", "doc_version")
+        .first()
+    )
+    return _weak_etag(case_id, *(row or ()), request.get_full_path())
+
+
+def list_etag(request, queryset, extra=()):
+    """
+    ETag de un listado: max(updated_at), max(id) y count(id) del alcance ya
+    filtrado (una sola query de agregación). El count cubre lo que los max
+    no ven: borrar un case viejo o que uno salga del filtro. Incluye el
+    usuario porque el alcance depende del rol, y la URL completa
+    (paginación, filtros). `extra` permite sumar versiones de relaciones
+    expandidas.
+    """
+    agg = queryset.order_by().aggregate(last=Max("updated_at"), top=Max("id"), total=Count("id"))
+    return _weak_etag(request.user.pk, agg["last"], agg["top"], agg["total"], *extra, request.get_full_path())
+
+
+def related_versions(queryset, expand):
+    """Último id (y updated_at de documentos) de documentos/eventos del alcance, solo si se expanden."""
+    versions = []
+    if "documents" in expand:
+        agg = CaseDocument.objects.filter(case__in=queryset.values("id")).aggregate(m=Max("id"), v=Max("updated_at"))
+        versions += [agg["m"], agg["v"]]
+    if "last_event" in expand:
+        versions.append(CaseEvent.objects.filter(case__in=queryset.values("id")).aggregate(m=Max("id"))["m"])
+    return versions
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # comparación débil: W/"x" == "x"
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
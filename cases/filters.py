@@ -0,0 +1,68 @@
+from config.filters import parse_choice, parse_decimal, parse_int, parse_moment
+
+from .models import ApplicantType, CaseStatus, RequestType
+from .search import search_cases
+
+
+def filter_cases(queryset, params):
+    """
+    Filtros del listado de solicitudes (?status=, ?request_type=, ...).
+    Cada combinación frecuente tiene su índice compuesto en Case.Meta.indexes.
+    """
+    status = parse_choice(params, "status", CaseStatus)
+    request_type = parse_choice(params, "request_type", RequestType)
+    applicant_type = parse_choice(params, "applicant_type", ApplicantType)
+    assigned_to = parse_int(params, "assigned_to")
+    created_after = parse_moment(params, "created_after")
+    created_before = parse_moment(params, "created_before", end_of_day=True)
+    updated_after = parse_moment(params, "updated_after")
+    municipio = (params.get("municipio") or "").strip()
+    actividad = (params.get("actividad_productiva") or "").strip()
+    monto_min = parse_decimal(params, "monto_min")
+    monto_max = parse_decimal(params, "monto_max")
+
+    if status:
+        queryset = queryset.filter(status=status)
+    if request_type:
+        queryset = queryset.filter(request_type=request_type)
+    if applicant_type:
+        queryset = queryset.filter(applicant_type=applicant_type)
+    if assigned_to is not None:
+        queryset = queryset.filter(assigned_to_id=assigned_to)
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    if created_before:
+        queryset = queryset.filter(created_at__lte=created_before)
+    if updated_after:
+        queryset = queryset.filter(updated_at__gt=updated_after)
+
+    # columnas proyectadas desde data (indexadas)
+    if municipio:
+        queryset = queryset.filter(municipio=municipio)
+    if actividad:
+        queryset = queryset.filter(actividad_productiva=actividad)
+    if monto_min is not None:
+        queryset = queryset.filter(monto_estimado__gte=monto_min)
+    if monto_max is not None:
+        queryset = queryset.filter(monto_estimado__lte=monto_max)
+
+    return queryset
+
+
+def visible_cases(queryset, user, params):
+    """?mias=true -> solo las creadas por el usuario; si no, Case.objects.visible_to."""
+    mias = (params.get("mias") or "").lower() in ["true", "1", "yes"]
+    return queryset.filter(created_by=user) if mias else queryset.visible_to(user)
+
+
+def list_cases(queryset, user, params):
+    """
+    Alcance completo del listado: visible_cases + filter_cases + ?q= (búsqueda
+    de texto completo, ordenada por relevancia). Lo comparten el listado y
+    el export para que no se separen.
+    """
+    queryset = filter_cases(visible_cases(queryset, user, params), params)
+    q = (params.get("q") or "").strip()
+    if q:
+        queryset = search_cases(queryset, q)
+    return queryset
@@ -0,0 +1,66 @@
+"""
+SHA-256 de los documentos subidos, para deduplicar por dueño (CaseDocument.sha256).
+
+Sha256UploadHandler calcula el hash mientras Django recibe el multipart
+(mismo paso que escribe el archivo temporal): no se vuelve a leer el archivo.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class Sha256UploadHandler(FileUploadHandler):
+    """
+    Va primero en request.upload_handlers: solo observa los bloques y los
+    pasa al siguiente handler (memoria/disco), que es el que arma el archivo.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self.hasher.hexdigest()
+        return None
+
+
+def install(request):
+    """
+    Agrega el handler a la HttpRequest de Django. Llamar desde
+    initialize_request() de la vista: ya en el handler del método puede ser
+    tarde (el CSRF de SessionAuthentication lee request.POST y eso parsea el
+    multipart), y entonces insertar en upload_handlers no tiene efecto.
+    """
+    handler = Sha256UploadHandler(request)
+    request.upload_handlers.insert(0, handler)
+    return handler
+
+
+def uploaded_sha256(handler, field_name, file):
+    """Hash calculado al recibir; si el handler no alcanzó a verlo, se lee el archivo (file.chunks())."""
+    digest = handler.digests.get(field_name)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in file.chunks(settings.DOCUMENT_UPLOAD_CHUNK_SIZE):
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(settings.DOCUMENT_UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
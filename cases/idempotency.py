@@ -0,0 +1,123 @@
+import functools
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# cuerpos que la vista lee como stream: no se pueden leer antes para la huella
+STREAMING_CONTENT_TYPES = ("application/x-ndjson", "application/offset+octet-stream")
+
+
+def _cache_key(request, key):
+    raw = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+    return "idem:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    """
+    Huella del cuerpo para detectar una llave reutilizada con otro contenido.
+    multipart: campos + nombre/tamaño de cada archivo (no se relee el archivo);
+    streams: solo Content-Length; el resto: el cuerpo crudo.
+    """
+    content_type = request.content_type.split(";")[0].strip()
+    hasher = hashlib.sha256(content_type.encode())
+    if content_type == "multipart/form-data":
+        for name, values in sorted(request.data.lists()):
+            for value in values:
+                if hasattr(value, "size"):
+                    value = f"archivo:{value.name}:{value.size}"
+                hasher.update(f"{name}={value}\n".encode())
+    elif content_type in STREAMING_CONTENT_TYPES:
+        hasher.update(request.headers.get("Content-Length", "").encode())
+    else:
+        hasher.update(request.body)
+    return hasher.hexdigest()
+
+
+def _release(lock_key, token):
+    # solo el dueño borra el lock: si venció y otra request lo tomó, no se le quita.
+    # get + delete no es atómico en la API de cache de Django; la ventana es mínima.
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _reused():
+    return Response(
+        {"detail": f"{IDEMPOTENCY_HEADER} ya se usó con otro cuerpo."},
+        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    )
+
+
+def _replay(stored):
+    return Response(stored["data"], status=stored["status"], headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(view_method):
+    """
+    Decorador para métodos de escritura (post/create) de vistas DRF.
+
+    Si el cliente manda `Idempotency-Key`, la primera respuesta (status + body)
+    se guarda en el cache durante IDEMPOTENCY_TTL segundos y los reintentos con
+    la misma llave la reciben tal cual, sin volver a ejecutar la vista.
+    Mientras la primera está en proceso, un duplicado concurrente recibe 409.
+
+    La llave queda aislada por usuario, método y ruta, y guarda la huella
+    del cuerpo: reusarla con otro cuerpo -> 422. Las respuestas en
+    streaming y los 5xx no se guardan (el reintento se vuelve a procesar).
+
+    Respuestas y lock viven en el cache `default`: con LocMemCache son por
+    proceso y un reintento que cae en otro worker se vuelve a ejecutar
+    (`manage.py check --deploy` lo avisa, ver cases/checks.py).
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} demasiado larga (máximo 255 caracteres)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored) if stored.get("fingerprint") == fingerprint else _reused()
+
+        lock_key = cache_key + ":lock"
+        token = uuid.uuid4().hex
+        if not cache.add(lock_key, token, timeout=settings.IDEMPOTENCY_LOCK_SECONDS):
+            return Response(
+                {"detail": "Ya hay una solicitud en proceso con esta Idempotency-Key."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            # pudo terminar otra mientras tomábamos el lock
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return _replay(stored) if stored.get("fingerprint") == fingerprint else _reused()
+
+            response = view_method(self, request, *args, **kwargs)
+
+            if isinstance(response, Response) and response.status_code < 500:
+                data = json.loads(json.dumps(response.data, cls=JSONEncoder))
+                cache.set(
+                    cache_key,
+                    {"status": response.status_code, "data": data, "fingerprint": fingerprint},
+                    timeout=settings.IDEMPOTENCY_TTL,
+                )
+            return response
+        finally:
+            _release(lock_key, token)
+
+    return wrapper
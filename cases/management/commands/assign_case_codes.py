@@ -0,0 +1,43 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from cases.cache import invalidate_cases
+from cases.codes import assign_codes
+from cases.models import Case, CaseStatus
+from cases.search import index_cases
+
+
+class Command(BaseCommand):
+    help = "Asigna Case.code a las solicitudes ya registradas que no lo tienen (año de creación)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total = 0
+
+        # el filtro code="" avanza solo: cada lote guardado sale del siguiente SELECT
+        while True:
+            batch = list(
+                Case.objects.filter(code="")
+                .exclude(status=CaseStatus.BORRADOR)
+                .order_by("created_at", "id")[:batch_size]
+            )
+            if not batch:
+                break
+
+            with transaction.atomic():
+                by_year = groupby(batch, key=lambda c: timezone.localtime(c.created_at).year)
+                for year, cases in by_year:
+                    assign_codes(list(cases), year=year)
+                Case.objects.bulk_update(batch, ["code"])
+                index_cases(batch)
+                invalidate_cases([c.id for c in batch])
+
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} solicitudes con código asignado"))
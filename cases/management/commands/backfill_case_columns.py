@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cases.models import Case
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena las columnas proyectadas desde Case.data "
+        "(municipio, actividad_productiva, tema_capacitacion, monto_estimado)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id, total, changed = 0, 0, 0
+
+        # lotes por id: cada lote es una transacción corta
+        while True:
+            batch = list(Case.objects.filter(id__gt=last_id).order_by("id")[:batch_size])
+            if not batch:
+                break
+
+            dirty = []
+            for case in batch:
+                before = [getattr(case, f) for f in Case.PROJECTED_FIELDS]
+                case.apply_data_projection()
+                if before != [getattr(case, f) for f in Case.PROJECTED_FIELDS]:
+                    dirty.append(case)
+
+            if dirty:
+                with transaction.atomic():
+                    Case.objects.bulk_update(dirty, Case.PROJECTED_FIELDS)
+
+            total += len(batch)
+            changed += len(dirty)
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"{total} solicitudes revisadas, {changed} actualizadas"))
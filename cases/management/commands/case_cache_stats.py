@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from cases import cache as case_cache
+from cases import metrics
+
+
+class Command(BaseCommand):
+    help = "Muestra aciertos/fallos del cache de representaciones de cases."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Pone los contadores en cero.")
+
+    def handle(self, *args, **options):
+        if not metrics.is_shared():
+            # el comando es otro proceso: con LocMemCache sus contadores siempre están en cero
+            self.stderr.write(
+                "El cache es LocMemCache (por proceso): estos contadores no son los de la API. "
+                "Use GET /api/admin/metricas/ o configure un cache compartido."
+            )
+        stats = case_cache.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit_ratio={stats['hit_ratio']:.2%}"
+        )
+        if options["reset"]:
+            metrics.reset(case_cache.HITS, case_cache.MISSES)
+            self.stdout.write("contadores reiniciados")
@@ -0,0 +1,40 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cases.models import UploadSession
+from cases.uploads import discard, spool_dir
+
+
+class Command(BaseCommand):
+    help = "Borra subidas reanudables vencidas y sus partes en disco (correr por cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        expired = list(UploadSession.objects.filter(expires_at__lte=timezone.now()))
+        if not dry_run:
+            for session in expired:
+                discard(session)
+            UploadSession.objects.filter(pk__in=[s.pk for s in expired]).delete()
+
+        # partes sin sesión (fila borrada a mano, proceso muerto a mitad de un DELETE...)
+        known = {f"{pk}.part" for pk in UploadSession.objects.values_list("pk", flat=True)}
+        cutoff = time.time() - settings.DOCUMENT_UPLOAD_SESSION_TTL
+        orphans = []
+        with os.scandir(spool_dir()) as entries:
+            for entry in entries:
+                if entry.name.endswith(".part") and entry.name not in known and entry.stat().st_mtime < cutoff:
+                    orphans.append(entry.path)
+        if not dry_run:
+            for path in orphans:
+                os.remove(path)
+
+        verb = "se borrarían" if dry_run else "borradas"
+        self.stdout.write(self.style.SUCCESS(f"{len(expired)} sesiones vencidas y {len(orphans)} partes huérfanas {verb}"))
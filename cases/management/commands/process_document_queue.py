@@ -0,0 +1,46 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from cases.offload import claim, purge_failed, retry_failed, run_batch
+
+
+class Command(BaseCommand):
+    help = "Sube al almacenamiento los documentos PENDING del spool local (DOCUMENT_UPLOAD_MODE=queue)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="hilos subiendo en paralelo")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--poll", type=float, default=2.0, help="segundos de espera con la cola vacía")
+        parser.add_argument("--once", action="store_true", help="vaciar lo vencido y salir (cron)")
+        parser.add_argument("--retry-failed", action="store_true", help="reencolar los FAILED que conservan su archivo")
+        parser.add_argument(
+            "--purge-failed",
+            action="store_true",
+            help="borrar del spool los FAILED más viejos que DOCUMENT_OFFLOAD_FAILED_RETENTION_DAYS",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        totals = Counter()
+
+        if options["retry_failed"]:
+            self.stdout.write(f"Reencolados: {retry_failed()}")
+        if options["purge_failed"]:
+            self.stdout.write(f"Spool purgado: {purge_failed()}")
+
+        try:
+            while True:
+                docs = claim(options["batch_size"])
+                if docs:
+                    totals.update(run_batch(docs, workers))
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll"])
+        except KeyboardInterrupt:
+            pass
+
+        summary = ", ".join(f"{status}={n}" for status, n in sorted(totals.items())) or "nada pendiente"
+        self.stdout.write(self.style.SUCCESS(f"Cola de documentos: {summary}"))
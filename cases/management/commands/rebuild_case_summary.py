@@ -0,0 +1,72 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from cases.models import Case, CaseSummary
+from cases.summary import KEY_FIELDS
+
+
+def expected_counts():
+    expected = Counter()
+    rows = (
+        Case.objects.annotate(day=TruncDate("created_at"))
+        .values(*KEY_FIELDS)
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        expected[tuple(row[f] for f in KEY_FIELDS)] = row["n"]
+    return expected
+
+
+def current_counts():
+    current = Counter()
+    for row in CaseSummary.objects.filter(count__gt=0).values(*KEY_FIELDS, "count"):
+        current[tuple(row[f] for f in KEY_FIELDS)] = row["count"]
+    return current
+
+
+def lock_summary():
+    """
+    Bloquea las escrituras a CaseSummary hasta el commit. record() corre en
+    la transacción del cambio de cases: las que ya sumaron se esperan (y el
+    conteo las ve), las que vienen después quedan esperando y suman sobre lo
+    reconstruido. Sin esto, un incremento confirmado entre el conteo y el
+    reemplazo se perdía. En SQLite la escritura ya bloquea toda la base.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {CaseSummary._meta.db_table} IN SHARE ROW EXCLUSIVE MODE")
+
+
+class Command(BaseCommand):
+    help = "Recalcula CaseSummary desde cero a partir de Case (o solo revisa drift con --check)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Solo reporta diferencias, no escribe.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if not options["check"]:
+                lock_summary()
+            # conteo y reemplazo bajo el mismo lock
+            expected, current = expected_counts(), current_counts()
+
+            drift = {
+                key: (current[key], expected[key]) for key in set(expected) | set(current) if current[key] != expected[key]
+            }
+            for key, (have, want) in sorted(drift.items(), key=lambda kv: str(kv[0])):
+                self.stdout.write(f"drift {dict(zip(KEY_FIELDS, key))}: resumen={have} real={want}")
+
+            if options["check"]:
+                self.stdout.write(f"{len(drift)} grupos con drift")
+                return
+
+            CaseSummary.objects.all().delete()
+            CaseSummary.objects.bulk_create(
+                [CaseSummary(count=n, **dict(zip(KEY_FIELDS, key))) for key, n in expected.items()]
+            )
+        self.stdout.write(self.style.SUCCESS(f"resumen reconstruido: {len(expected)} grupos ({len(drift)} corregidos)"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from cases.models import Case
+from cases.search import index_cases
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de solicitudes (CaseSearchEntry)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        batch, total = [], 0
+
+        for case in Case.objects.select_related("created_by").order_by("id").iterator(chunk_size=batch_size):
+            batch.append(case)
+            if len(batch) >= batch_size:
+                index_cases(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            index_cases(batch)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} solicitudes indexadas"))
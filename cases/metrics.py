@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.cache import cache
+
+PREFIX = "metrics:"
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def is_shared():
+    """False con LocMemCache: cada proceso (worker, manage.py) tiene sus propios contadores."""
+    return settings.CACHES["default"]["BACKEND"] != LOCMEM_BACKEND
+
+
+def incr(name, amount=1):
+    """Contador simple en el cache de Django (compartido si el backend lo es)."""
+    key = PREFIX + name
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # no existía (o expiró): lo creamos sin expiración
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def get(name):
+    return cache.get(PREFIX + name, 0)
+
+
+def reset(*names):
+    cache.delete_many([PREFIX + name for name in names])
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0003_casedocument'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['updated_at', 'id'], name='case_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['created_by', 'updated_at', 'id'], name='case_owner_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE cases_casesearchentry
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('spanish', content)) STORED
+    """,
+    "CREATE INDEX case_search_vector_gin ON cases_casesearchentry USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS case_search_vector_gin",
+    "ALTER TABLE cases_casesearchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE cases_casesearch_fts USING fts5(
+        content,
+        content='cases_casesearchentry',
+        content_rowid='case_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER cases_casesearch_ai AFTER INSERT ON cases_casesearchentry BEGIN
+        INSERT INTO cases_casesearch_fts(rowid, content) VALUES (new.case_id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER cases_casesearch_ad AFTER DELETE ON cases_casesearchentry BEGIN
+        INSERT INTO cases_casesearch_fts(cases_casesearch_fts, rowid, content) VALUES ('delete', old.case_id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER cases_casesearch_au AFTER UPDATE ON cases_casesearchentry BEGIN
+        INSERT INTO cases_casesearch_fts(cases_casesearch_fts, rowid, content) VALUES ('delete', old.case_id, old.content);
+        INSERT INTO cases_casesearch_fts(rowid, content) VALUES (new.case_id, new.content);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS cases_casesearch_au",
+    "DROP TRIGGER IF EXISTS cases_casesearch_ad",
+    "DROP TRIGGER IF EXISTS cases_casesearch_ai",
+    "DROP TABLE IF EXISTS cases_casesearch_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_case_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseSearchEntry',
+            fields=[
+                ('case', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='cases.case')),
+                ('content', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0006_case_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='actividad_productiva',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='case',
+            name='monto_estimado',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='case',
+            name='municipio',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='case',
+            name='tema_capacitacion',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0007_case_projected_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('BORRADOR', 'Borrador'), ('REGISTRADA', 'Registrada'), ('EN_REVISION', 'En revisión'), ('EN_AJUSTES', 'En ajustes'), ('VALIDADA', 'Validada'), ('VALIDADA_PARA_ENVIO', 'Validada para envío')], max_length=30)),
+                ('request_type', models.CharField(choices=[('CAPACITACION', 'Capacitación'), ('PROYECTO_PRODUCTIVO', 'Proyecto productivo')], max_length=30)),
+                ('applicant_type', models.CharField(choices=[('CAMPESINO', 'Campesino'), ('ASOCIACION', 'Asociación')], max_length=20)),
+                ('municipio', models.CharField(blank=True, default='', max_length=120)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'request_type', 'applicant_type', 'municipio'), name='uniq_case_summary_group')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0008_case_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseCodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10)),
+                ('year', models.PositiveIntegerField()),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='case',
+            constraint=models.UniqueConstraint(condition=models.Q(('code', ''), _negated=True), fields=('code',), name='uniq_case_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='casecodesequence',
+            constraint=models.UniqueConstraint(fields=('prefix', 'year'), name='uniq_case_code_sequence'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0010_upload_session'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casedocument',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='casedocument',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='casedocument',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='casedocument',
+            name='spool_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='casedocument',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pendiente'), ('READY', 'Listo'), ('FAILED', 'Fallido')], default='READY', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='casedocument',
+            name='file_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='casedocument',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='casedoc_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0011_document_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casedocument',
+            name='sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='casedocument',
+            index=models.Index(fields=['uploaded_by', 'sha256'], name='casedoc_owner_sha256_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_updated_at(apps, schema_editor):
+    CaseDocument = apps.get_model("cases", "CaseDocument")
+    CaseDocument.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0012_document_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casedocument',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='casedocument',
+            index=models.Index(fields=['updated_at', 'id'], name='casedoc_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0013_document_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='patch_lease',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,8 +1,40 @@
+import re
+from decimal import Decimal, InvalidOperation
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 import uuid
 
 
+# es-CO: punto = miles (en grupos de 3), coma = decimales (una sola)
+AMOUNT_RE = re.compile(r"-?(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?")
+
+
+def parse_amount(value):
+    """
+    Convierte monto_estimado del JSON a Decimal. Números tal cual (1500000);
+    textos en formato colombiano: "1500000", "$ 1.500.000", "1.500.000,50",
+    "1500,50". Cualquier otra cosa ("1,500,000.50", "1.5", "no sé") -> None.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        text = str(value)
+    else:
+        text = re.sub(r"[$\s]", "", str(value))
+        if not AMOUNT_RE.fullmatch(text):
+            return None
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or abs(amount) >= Decimal("1e14"):
+        return None
+    return amount.quantize(Decimal("0.01"))
+
+
 class ApplicantType(models.TextChoices):
     CAMPESINO = "CAMPESINO", "Campesino"
     ASOCIACION = "ASOCIACION", "Asociación"
@@ -22,6 +54,15 @@ class CaseStatus(models.TextChoices):
     VALIDADA_PARA_ENVIO = "VALIDADA_PARA_ENVIO", "Validada para envío"
 
 
+class CaseQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        # - ADMIN/GESTOR: ven todo
+        # - CAMPESINO/ASOCIACION: ven solo lo suyo
+        if user.role in ["ADMIN", "GESTOR"]:
+            return self
+        return self.filter(created_by=user)
+
+
 class Case(models.Model):
     code = models.CharField(max_length=30, blank=True, default="")
     applicant_type = models.CharField(max_length=20, choices=ApplicantType.choices)
@@ -45,9 +86,137 @@ class Case(models.Model):
     # uuid_externo (para que la app mande un id local y no duplique)
     external_uuid = models.UUIDField(null=True, blank=True, unique=True, db_index=True)
 
+    # proyección tipada de claves de `data` (data sigue siendo la fuente de verdad);
+    # la mantiene apply_data_projection() en save() y en los caminos bulk
+    municipio = models.CharField(max_length=120, blank=True, default="", db_index=True)
+    actividad_productiva = models.CharField(max_length=120, blank=True, default="", db_index=True)
+    tema_capacitacion = models.CharField(max_length=200, blank=True, default="")
+    monto_estimado = models.DecimalField(max_digits=16, decimal_places=2, null=True, blank=True, db_index=True)
+
+    PROJECTED_FIELDS = ["municipio", "actividad_productiva", "tema_capacitacion", "monto_estimado"]
+    # dimensiones del resumen del dashboard (CaseSummary)
+    SUMMARY_FIELDS = ["created_at", "status", "request_type", "applicant_type", "municipio"]
+
+    objects = CaseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # delta pull del sync offline: (updated_at, id) > cursor
+            models.Index(fields=["updated_at", "id"], name="case_updated_id_idx"),
+            models.Index(fields=["created_by", "updated_at", "id"], name="case_owner_updated_id_idx"),
+            # filtros del listado (cases/filters.py), ordenado por -id
+            models.Index(fields=["status", "-id"], name="case_status_id_idx"),
+            models.Index(fields=["created_by", "-id"], name="case_owner_id_idx"),
+            models.Index(fields=["request_type", "-id"], name="case_reqtype_id_idx"),
+            models.Index(fields=["assigned_to", "status"], name="case_assignee_status_idx"),
+            models.Index(fields=["created_at"], name="case_created_at_idx"),
+        ]
+        constraints = [
+            # code se asigna al pasar a REGISTRADA; los borradores quedan con ""
+            models.UniqueConstraint(fields=["code"], condition=~models.Q(code=""), name="uniq_case_code"),
+        ]
+
     def can_edit(self) -> bool:
         return self.status in [CaseStatus.BORRADOR, CaseStatus.EN_AJUSTES]
 
+    def apply_data_projection(self):
+        data = self.data if isinstance(self.data, dict) else {}
+
+        def text(key, max_length):
+            value = data.get(key)
+            return str(value).strip()[:max_length] if value not in (None, "") else ""
+
+        self.municipio = text("municipio", 120)
+        self.actividad_productiva = text("actividad_productiva", 120)
+        self.tema_capacitacion = text("tema_capacitacion", 200)
+        self.monto_estimado = parse_amount(data.get("monto_estimado"))
+
+    def needs_code(self):
+        return not self.code and self.status not in [CaseStatus.BORRADOR]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # foto de las dimensiones tal como están en BD, para mover el resumen al guardar
+        instance.summary_snapshot = instance.summary_key() if set(cls.SUMMARY_FIELDS) <= set(field_names) else None
+        return instance
+
+    def summary_key(self):
+        return (
+            timezone.localdate(self.created_at),
+            self.status,
+            self.request_type,
+            self.applicant_type,
+            self.municipio,
+        )
+
+    def save(self, *args, **kwargs):
+        self.apply_data_projection()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "data" in update_fields:
+            kwargs["update_fields"] = {*update_fields, *self.PROJECTED_FIELDS}
+
+        if self.needs_code():
+            from .codes import assign_codes
+            assign_codes([self])
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "code"}
+
+        # el resumen (señal post_save) se actualiza en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class CaseSearchEntry(models.Model):
+    """
+    Índice de búsqueda de texto completo (una fila por case), mantenido por
+    cases/search.py. `content` va normalizado (minúsculas, sin tildes).
+    - PostgreSQL: columna generada tsvector (spanish) + índice GIN
+    - SQLite: tabla virtual FTS5 cases_casesearch_fts mantenida con triggers
+    (ver migración 0006)
+    """
+    case = models.OneToOneField(Case, on_delete=models.CASCADE, primary_key=True, related_name="search_entry")
+    content = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class CaseCodeSequence(models.Model):
+    """
+    Contador por prefijo/año para Case.code, usado solo en bases sin
+    secuencias (SQLite). En PostgreSQL cases/codes.py usa una SEQUENCE
+    por prefijo/año, que no bloquea filas.
+    """
+    prefix = models.CharField(max_length=10)
+    year = models.PositiveIntegerField()
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["prefix", "year"], name="uniq_case_code_sequence"),
+        ]
+
+
+class CaseSummary(models.Model):
+    """
+    Conteo de cases por día de creación y dimensiones del dashboard.
+    Se mantiene incrementalmente (cases/summary.py) en cada alta o cambio
+    de estado/municipio; `rebuild_case_summary` lo recalcula y revisa drift.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=30, choices=CaseStatus.choices)
+    request_type = models.CharField(max_length=30, choices=RequestType.choices)
+    applicant_type = models.CharField(max_length=20, choices=ApplicantType.choices)
+    municipio = models.CharField(max_length=120, blank=True, default="")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "status", "request_type", "applicant_type", "municipio"],
+                name="uniq_case_summary_group",
+            )
+        ]
+
 
 # ==========================
 # Documentos asociados a Case
@@ -59,6 +228,13 @@ class DocumentCategory(models.TextChoices):
     OTRO = "OTRO", "Otro"
 
 
+class DocumentStatus(models.TextChoices):
+    # PENDING: en el spool local, esperando a process_document_queue (cases/offload.py)
+    PENDING = "PENDING", "Pendiente"
+    READY = "READY", "Listo"
+    FAILED = "FAILED", "Fallido"
+
+
 class CaseDocument(models.Model):
     case = models.ForeignKey("cases.Case", on_delete=models.CASCADE, related_name="documents")
 
@@ -68,10 +244,20 @@ class CaseDocument(models.Model):
         default=DocumentCategory.OTRO,
     )
 
-    # ✅ Cloudinary: guardamos URL y public_id (NO FileField)
-    file_url = models.URLField(max_length=500)
+    # ✅ Cloudinary: guardamos URL y public_id (NO FileField); vacíos mientras está PENDING
+    file_url = models.URLField(max_length=500, blank=True, default="")
     public_id = models.CharField(max_length=255, blank=True, default="")
 
+    status = models.CharField(max_length=10, choices=DocumentStatus.choices, default=DocumentStatus.READY)
+    # cola de subida: ruta relativa a DOCUMENT_SPOOL_DIR + reintentos con backoff
+    spool_path = models.CharField(max_length=255, blank=True, default="")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    # hash del contenido (cases/hashing.py): el mismo archivo del mismo dueño reutiliza public_id
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+
     # metadata
     original_name = models.CharField(max_length=255)
     size_bytes = models.BigIntegerField(default=0)
@@ -79,3 +265,44 @@ class CaseDocument(models.Model):
 
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
     created_at = models.DateTimeField(auto_now_add=True)
+    # versión del documento (ETag, delta pull): cambia con PENDING -> READY/FAILED.
+    # Los .update() de la cola la ponen a mano (auto_now solo corre en save()).
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # claim de la cola: status=PENDING AND next_attempt_at <= now
+            models.Index(fields=["status", "next_attempt_at"], name="casedoc_queue_idx"),
+            models.Index(fields=["uploaded_by", "sha256"], name="casedoc_owner_sha256_idx"),
+            # delta pull del sync offline: (updated_at, id) > cursor
+            models.Index(fields=["updated_at", "id"], name="casedoc_updated_id_idx"),
+        ]
+
+
+class UploadSession(models.Model):
+    """
+    Subida reanudable (estilo tus): el archivo llega por partes a
+    DOCUMENT_SPOOL_DIR/uploads/<id>.part y, completo, se entrega al
+    almacenamiento y se crea el CaseDocument. Ver cases/uploads.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    case = models.ForeignKey("cases.Case", on_delete=models.CASCADE, related_name="upload_sessions")
+    category = models.CharField(max_length=30, choices=DocumentCategory.choices, default=DocumentCategory.OTRO)
+    original_name = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=100, blank=True, default="")
+
+    length = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+
+    document = models.OneToOneField(
+        "cases.CaseDocument", null=True, blank=True, on_delete=models.SET_NULL, related_name="upload_session"
+    )
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # se corre con cada PATCH; vencida -> cleanup_upload_sessions borra fila y parte
+    expires_at = models.DateTimeField(db_index=True)
+    # PATCH escribiendo la parte (fuera de transacción): otro PATCH recibe 409 hasta que termine o venza
+    patch_lease = models.DateTimeField(null=True, blank=True)
+
+    def is_complete(self):
+        return self.offset >= self.length
@@ -0,0 +1,223 @@
+"""
+Cola de subida de documentos al almacenamiento (DOCUMENT_UPLOAD_MODE="queue").
+
+La request copia el archivo a DOCUMENT_SPOOL_DIR/queue/ y crea el
+CaseDocument en PENDING (202). process_document_queue lo toma de la BD
+(select_for_update skip_locked + lease), lo sube con el backend de
+cases/storage.py y lo pasa a READY. Si falla, reintenta con backoff
+exponencial; agotados los intentos queda FAILED con el archivo en el spool
+hasta que se reencola (retry_failed) o se purga pasado
+DOCUMENT_OFFLOAD_FAILED_RETENTION_DAYS (purge_failed).
+
+El worker debe correr en el mismo host/disco que la API.
+"""
+
+import os
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_cases
+from .models import CaseDocument, DocumentStatus
+from .storage import case_folder, get_storage
+
+
+def use_queue(request=None):
+    if settings.DOCUMENT_UPLOAD_MODE == "queue":
+        return True
+    return request is not None and "respond-async" in request.headers.get("Prefer", "")
+
+
+def queue_dir():
+    path = os.path.join(settings.DOCUMENT_SPOOL_DIR, "queue")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def absolute(spool_path):
+    return os.path.join(settings.DOCUMENT_SPOOL_DIR, spool_path)
+
+
+def spool(file):
+    """Copia un archivo subido al spool por bloques. Devuelve la ruta relativa."""
+    name = uuid.uuid4().hex
+    with open(os.path.join(queue_dir(), name), "wb") as out:
+        for chunk in file.chunks(settings.DOCUMENT_UPLOAD_CHUNK_SIZE):
+            out.write(chunk)
+    return f"queue/{name}"
+
+
+def new_spool_path():
+    return f"queue/{uuid.uuid4().hex}"
+
+
+def adopt(path, spool_path):
+    """
+    Mueve un archivo que ya está en disco local (p.ej. una subida reanudable)
+    a `spool_path` del spool. Se llama en on_commit: si la transacción que
+    encola se deshace, el archivo sigue donde estaba.
+    """
+    queue_dir()
+    os.replace(path, absolute(spool_path))
+
+
+def enqueue(case, user, spool_path, size, *, category, original_name, mime_type="", sha256=""):
+    return CaseDocument.objects.create(
+        case=case,
+        category=category,
+        original_name=original_name,
+        size_bytes=size,
+        mime_type=mime_type or "",
+        sha256=sha256,
+        uploaded_by=user,
+        status=DocumentStatus.PENDING,
+        spool_path=spool_path,
+        next_attempt_at=timezone.now(),
+    )
+
+
+def backoff(attempts):
+    delay = min(settings.DOCUMENT_OFFLOAD_BACKOFF_BASE * 2 ** (attempts - 1), settings.DOCUMENT_OFFLOAD_BACKOFF_MAX)
+    # jitter: los documentos que fallaron juntos no reintentan juntos
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(limit):
+    """
+    Toma hasta `limit` documentos vencidos. skip_locked: varios workers (o
+    procesos) no se pisan; el lease evita que otro los tome tras el commit.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        docs = list(
+            CaseDocument.objects.select_related("case")
+            .select_for_update(skip_locked=True, of=("self",))
+            .filter(status=DocumentStatus.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:limit]
+        )
+        lease = now + timedelta(seconds=settings.DOCUMENT_OFFLOAD_LEASE_SECONDS)
+        CaseDocument.objects.filter(pk__in=[d.pk for d in docs]).update(next_attempt_at=lease)
+    for doc in docs:
+        # process() guarda solo si el lease sigue siendo este
+        doc.next_attempt_at = lease
+    return docs
+
+
+# process(): el lease venció y otro worker tomó el documento, o la fila se borró
+LOST = "LOST"
+
+
+def process(doc):
+    """
+    Sube un documento tomado con claim(). Devuelve el status final de este
+    intento, o LOST si al terminar ya no era nuestro: ambos guardados son un
+    UPDATE condicionado a PENDING + nuestro lease.
+    """
+    path = absolute(doc.spool_path)
+    owned = CaseDocument.objects.filter(pk=doc.pk, status=DocumentStatus.PENDING, next_attempt_at=doc.next_attempt_at)
+    storage = get_storage()
+    try:
+        with open(path, "rb") as fh:
+            stored = storage.upload(File(fh, name=doc.original_name), case_folder(doc.case))
+    except Exception as e:  # cualquier fallo del backend/disco se reintenta
+        attempts = doc.attempts + 1
+        if attempts >= settings.DOCUMENT_OFFLOAD_MAX_ATTEMPTS:
+            status, next_attempt_at = DocumentStatus.FAILED, None
+        else:
+            status, next_attempt_at = DocumentStatus.PENDING, timezone.now() + backoff(attempts)
+        if not owned.update(
+            updated_at=timezone.now(),
+            attempts=attempts,
+            last_error=f"{type(e).__name__}: {e}"[:1000],
+            status=status,
+            next_attempt_at=next_attempt_at,
+        ):
+            return LOST
+        invalidate_cases([doc.case_id])
+        return status
+
+    if not owned.update(
+        updated_at=timezone.now(),
+        file_url=stored["file_url"],
+        public_id=stored["public_id"],
+        size_bytes=stored["size_bytes"],
+        status=DocumentStatus.READY,
+        spool_path="",
+        next_attempt_at=None,
+        last_error="",
+    ):
+        # nadie referencia esta copia; el spool es de quien tenga el documento ahora
+        storage.delete(stored["public_id"])
+        if not CaseDocument.objects.filter(pk=doc.pk).exists():
+            os.remove(path)
+        return LOST
+    # .update() no dispara post_save: invalidar a mano
+    invalidate_cases([doc.case_id])
+    os.remove(path)
+    return DocumentStatus.READY
+
+
+def retry_failed():
+    """Vuelve a PENDING (con los intentos en cero) los FAILED que aún tienen su archivo en el spool."""
+    return (
+        CaseDocument.objects.filter(status=DocumentStatus.FAILED)
+        .exclude(spool_path="")
+        .update(
+            status=DocumentStatus.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+    )
+
+
+def purge_failed(days=None):
+    """
+    Borra del spool los archivos de documentos FAILED sin cambios hace más de
+    `days` días (por defecto DOCUMENT_OFFLOAD_FAILED_RETENTION_DAYS). La fila
+    queda FAILED con spool_path vacío: ya no se puede reintentar.
+    """
+    if days is None:
+        days = settings.DOCUMENT_OFFLOAD_FAILED_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    stale = (
+        CaseDocument.objects.filter(status=DocumentStatus.FAILED, updated_at__lt=cutoff)
+        .exclude(spool_path="")
+        .values_list("pk", "spool_path")
+    )
+    purged = 0
+    for pk, spool_path in stale:
+        # condicionado: si otro proceso lo reencoló mientras tanto, el archivo sigue siendo suyo
+        if not CaseDocument.objects.filter(pk=pk, status=DocumentStatus.FAILED, spool_path=spool_path).update(
+            spool_path=""
+        ):
+            continue
+        try:
+            os.remove(absolute(spool_path))
+        except FileNotFoundError:
+            pass
+        purged += 1
+    return purged
+
+
+def _process_in_thread(doc):
+    # cada hilo usa su propia conexión: cerrarla al terminar
+    try:
+        return process(doc)
+    finally:
+        connection.close()
+
+
+def run_batch(docs, workers):
+    """Procesa un lote con `workers` hilos (la subida es I/O: los hilos no pelean el GIL)."""
+    if workers <= 1:
+        return [process(doc) for doc in docs]
+    close_old_connections()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_process_in_thread, docs))
@@ -21,3 +21,13 @@ class CanAccessCase(BasePermission):
         if request.user.role in ["ADMIN", "GESTOR"]:
             return True
         return obj.created_by_id == request.user.id
+
+
+class IsReviewer(BasePermission):
+    """ADMIN/GESTOR: dashboards y revisión de solicitudes."""
+    def has_permission(self, request, view):
+        return (
+            request.user
+            and request.user.is_authenticated
+            and request.user.role in ["ADMIN", "GESTOR"]
+        )
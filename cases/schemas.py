@@ -0,0 +1,83 @@
+"""
+Reglas de Case.data por (request_type, status), en un solo lugar.
+
+Se declaran como datos y se compilan una vez al importar el módulo en
+funciones data -> [errores]; crear (CaseCreateSerializer), sync JSON y sync
+NDJSON usan las mismas. Las combinaciones sin entrada no exigen nada
+(ej: los borradores).
+"""
+
+from .models import CaseStatus, RequestType, parse_amount
+
+COMMON_FIELDS = {
+    "municipio": {"required": True},
+    "actividad_productiva": {"required": True},
+    "descripcion_idea": {"required": True},
+}
+
+SCHEMAS = {
+    (RequestType.CAPACITACION, CaseStatus.REGISTRADA): {
+        **COMMON_FIELDS,
+        "tema_capacitacion": {"required": True},
+    },
+    (RequestType.PROYECTO_PRODUCTIVO, CaseStatus.REGISTRADA): {
+        **COMMON_FIELDS,
+        "monto_estimado": {"required": True, "type": "amount"},
+    },
+}
+
+NOT_AN_OBJECT = "debe ser un objeto."
+
+# chequeos de tipo: valor -> mensaje de error o None
+TYPE_CHECKS = {
+    "amount": lambda value: None if parse_amount(value) is not None else "debe ser un monto numérico.",
+}
+
+
+def compile_schema(status, fields):
+    required = tuple(name for name, rule in fields.items() if rule.get("required"))
+    typed = tuple((name, TYPE_CHECKS[rule["type"]]) for name, rule in fields.items() if rule.get("type"))
+    missing_prefix = f"Faltan campos obligatorios para enviar como {status}: "
+
+    def validate(data):
+        if not isinstance(data, dict):
+            return [NOT_AN_OBJECT]
+        errors = []
+        missing = [name for name in required if not data.get(name)]
+        if missing:
+            errors.append(missing_prefix + ", ".join(missing))
+        for name, check in typed:
+            value = data.get(name)
+            if value not in (None, ""):
+                error = check(value)
+                if error:
+                    errors.append(f"{name}: {error}")
+        return errors
+
+    return validate
+
+
+VALIDATORS = {key: compile_schema(key[1], fields) for key, fields in SCHEMAS.items()}
+
+
+def no_rules(data):
+    return []
+
+
+def validate_case(request_type, status, data):
+    """Errores de `data` para ese tipo/estado ([] si es válido)."""
+    return VALIDATORS.get((request_type, status), no_rules)(data or {})
+
+
+def validate_batch(items, submit_all=False):
+    """
+    Valida un lote de items de sync en una pasada. Devuelve una lista
+    alineada con `items`: {} si el item es válido, {"data": [...]} si no.
+    """
+    get = VALIDATORS.get
+    results = []
+    for item in items:
+        status = CaseStatus.REGISTRADA if submit_all else item.get("status", CaseStatus.BORRADOR)
+        errors = get((item.get("request_type"), status), no_rules)(item.get("data") or {})
+        results.append({"data": errors} if errors else {})
+    return results
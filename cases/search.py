@@ -0,0 +1,81 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import CaseSearchEntry
+
+# claves de Case.data que entran al índice
+DATA_KEYS = ["descripcion_idea", "actividad_productiva", "municipio", "tema_capacitacion"]
+
+
+def normalize(text):
+    """Minúsculas y sin tildes: 'Capacitación' -> 'capacitacion'."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def build_content(case):
+    data = case.data if isinstance(case.data, dict) else {}
+    user = case.created_by
+    parts = [case.code]
+    parts += [str(data.get(key) or "") for key in DATA_KEYS]
+    parts += [user.first_name, user.last_name, user.document_id or "", user.document_number or ""]
+    return normalize(" ".join(p for p in parts if p))
+
+
+def index_cases(cases):
+    """
+    Inserta/actualiza la fila de índice de cada case en un solo upsert.
+    Los cases deben traer created_by cargado (select_related o asignado).
+    """
+    entries = [CaseSearchEntry(case_id=case.pk, content=build_content(case)) for case in cases]
+    if entries:
+        CaseSearchEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["case"],
+            update_fields=["content", "updated_at"],
+        )
+
+
+def _terms(q):
+    return re.findall(r"\w+", normalize(q))
+
+
+def search_cases(queryset, q):
+    """
+    Filtra `queryset` a los cases que contienen todos los términos de `q`
+    (prefijo, sin tildes) y lo ordena por relevancia (`search_rank`).
+    """
+    terms = _terms(q)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{t}:*" for t in terms)
+        matches = RawSQL(
+            "SELECT case_id FROM cases_casesearchentry "
+            "WHERE search_vector @@ to_tsquery('spanish', %s)",
+            (tsquery,),
+        )
+        rank = RawSQL(
+            "SELECT ts_rank(search_vector, to_tsquery('spanish', %s)) "
+            "FROM cases_casesearchentry WHERE case_id = cases_case.id",
+            (tsquery,),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by("-search_rank", "-id")
+
+    # SQLite (tests/dev): FTS5; bm25() es menor cuanto más relevante
+    match = " ".join(f'"{t}"*' for t in terms)
+    matches = RawSQL(
+        "SELECT rowid FROM cases_casesearch_fts WHERE cases_casesearch_fts MATCH %s",
+        (match,),
+    )
+    rank = RawSQL(
+        "SELECT -bm25(cases_casesearch_fts) FROM cases_casesearch_fts "
+        "WHERE cases_casesearch_fts MATCH %s AND rowid = cases_case.id",
+        (match,),
+    )
+    return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by("-search_rank", "-id")
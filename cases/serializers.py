@@ -1,8 +1,70 @@
 from rest_framework import serializers
 from .models import Case, CaseStatus
-
-
-class CaseSerializer(serializers.ModelSerializer):
+from .schemas import validate_case
+from .serializers_documents import CaseDocumentSerializer
+
+from accounts.serializers import UserSummarySerializer
+from audit.serializers import CaseEventSerializer
+
+
+def split_param(params, name):
+    """?expand=a,b -> ["a", "b"] (sin vacíos)."""
+    return [v.strip() for v in (params.get(name) or "").split(",") if v.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Soporta en lectura:
+    - ?fields=id,status,data.municipio -> solo esos campos; `data.<key>` recorta el JSON de data
+    - ?expand=created_by,assigned_to,documents,last_event -> incrusta los objetos relacionados
+
+    Las expansiones deben venir precargadas por la vista (select_related /
+    prefetch_related) para que el número de queries no crezca con la página.
+    """
+    EXPANDABLE = ("created_by", "assigned_to", "documents", "last_event")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.data_keys = None
+
+        request = self.context.get("request")
+        if request is None:
+            return
+
+        expand = [name for name in split_param(request.query_params, "expand") if name in self.EXPANDABLE]
+        for name in expand:
+            if name in ("created_by", "assigned_to"):
+                self.fields[name] = UserSummarySerializer(read_only=True)
+            elif name == "documents":
+                self.fields[name] = CaseDocumentSerializer(many=True, read_only=True)
+            elif name == "last_event":
+                self.fields[name] = serializers.SerializerMethodField()
+
+        requested = split_param(request.query_params, "fields")
+        if requested:
+            keep = {name.split(".", 1)[0] for name in requested} | set(expand)
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+            if "data" not in requested:
+                self.data_keys = [name.split(".", 1)[1] for name in requested if name.startswith("data.")] or None
+
+    def get_last_event(self, obj):
+        events = getattr(obj, "prefetched_last_event", None)
+        if events is None:
+            events = list(obj.events.order_by("-id")[:1])
+        return CaseEventSerializer(events[0]).data if events else None
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        if self.data_keys is not None and "data" in ret:
+            data = ret["data"] or {}
+            ret["data"] = {k: data[k] for k in self.data_keys if k in data}
+        return ret
+
+
+class CaseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     can_edit = serializers.SerializerMethodField()
 
     class Meta:
@@ -14,6 +76,10 @@ class CaseSerializer(serializers.ModelSerializer):
             "request_type",
             "status",
             "data",
+            "municipio",
+            "actividad_productiva",
+            "tema_capacitacion",
+            "monto_estimado",
             "created_by",
             "assigned_to",
             "created_at",
@@ -24,6 +90,10 @@ class CaseSerializer(serializers.ModelSerializer):
             "id",
             "code",
             "status",
+            "municipio",
+            "actividad_productiva",
+            "tema_capacitacion",
+            "monto_estimado",
             "created_by",
             "assigned_to",
             "created_at",
@@ -58,21 +128,11 @@ class CaseCreateSerializer(serializers.ModelSerializer):
         if user.role == "ASOCIACION" and applicant_type != "ASOCIACION":
             raise serializers.ValidationError("Un usuario ASOCIACION solo puede crear solicitudes tipo ASOCIACION.")
 
-        # 2) Validaciones mínimas por tipo (ajústalas a lo que ustedes definan)
-        required_common = ["municipio", "actividad_productiva", "descripcion_idea"]
-        required_cap = required_common + ["tema_capacitacion"]
-        required_proj = required_common + ["monto_estimado"]
-
-        if status == CaseStatus.REGISTRADA:
-            if request_type == "CAPACITACION":
-                missing = [k for k in required_cap if not data.get(k)]
-            else:  # PROYECTO_PRODUCTIVO
-                missing = [k for k in required_proj if not data.get(k)]
-
-            if missing:
-                raise serializers.ValidationError(
-                    {"data": f"Faltan campos obligatorios para enviar como REGISTRADA: {', '.join(missing)}"}
-                )
+        # 2) Campos obligatorios por tipo/estado (cases/schemas.py, compartido con el sync)
+        # un solo mensaje por campo `data`, como antes de cases/schemas.py (clientes leen data[0])
+        errors = validate_case(request_type, status, data)
+        if errors:
+            raise serializers.ValidationError({"data": "; ".join(errors)})
 
         return attrs
 
@@ -94,7 +154,7 @@ class CaseUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Esta solicitud no se puede editar en el estado actual.")
         return attrs
 
-class CaseListSerializer(serializers.ModelSerializer):
+class CaseListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Case
         fields = ["id", "applicant_type", "request_type", "status", "created_at", "updated_at"]
\ No newline at end of file
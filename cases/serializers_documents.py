@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import CaseDocument, DocumentCategory
+from .models import CaseDocument, DocumentCategory, UploadSession
 
 class CaseDocumentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,10 +14,12 @@ class CaseDocumentSerializer(serializers.ModelSerializer):
             "original_name",
             "size_bytes",
             "mime_type",
+            "status",
             "uploaded_by",
             "created_at",
+            "updated_at",
         ]
-        read_only_fields = ["id", "uploaded_by", "created_at"]
+        read_only_fields = ["id", "status", "uploaded_by", "created_at", "updated_at"]
 
 
 class CaseDocumentUploadSerializer(serializers.Serializer):
@@ -26,7 +29,50 @@ class CaseDocumentUploadSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         f = attrs["file"]
-        max_mb = 10
+        max_mb = settings.DOCUMENT_MAX_MB
         if f.size > max_mb * 1024 * 1024:
             raise serializers.ValidationError(f"Archivo demasiado grande. Máximo {max_mb}MB.")
         return attrs
+
+
+class DocumentSignSerializer(serializers.Serializer):
+    case_id = serializers.IntegerField()
+    category = serializers.ChoiceField(choices=DocumentCategory.choices, required=False)
+    original_name = serializers.CharField(max_length=255)
+    mime_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    size_bytes = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_size_bytes(self, value):
+        max_mb = settings.DOCUMENT_MAX_MB
+        if value > max_mb * 1024 * 1024:
+            raise serializers.ValidationError(f"Archivo demasiado grande. Máximo {max_mb}MB.")
+        return value
+
+
+class DocumentConfirmSerializer(serializers.Serializer):
+    # ticket: lo devolvió /documentos/firmar/; result: respuesta tal cual del almacenamiento
+    ticket = serializers.CharField()
+    result = serializers.DictField()
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    case_id = serializers.IntegerField()
+    category = serializers.ChoiceField(choices=DocumentCategory.choices, required=False)
+    original_name = serializers.CharField(max_length=255)
+    mime_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    length = serializers.IntegerField(min_value=1)
+
+    def validate_length(self, value):
+        max_mb = settings.DOCUMENT_MAX_MB
+        if value > max_mb * 1024 * 1024:
+            raise serializers.ValidationError(f"Archivo demasiado grande. Máximo {max_mb}MB.")
+        return value
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    document = CaseDocumentSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "case", "original_name", "length", "offset", "expires_at", "document"]
+        read_only_fields = fields
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import ApplicantType, RequestType, CaseStatus
+from .schemas import validate_batch, validate_case
 
 class SyncSolicitudItemSerializer(serializers.Serializer):
     uuid_externo = serializers.UUIDField()
@@ -9,7 +10,25 @@ class SyncSolicitudItemSerializer(serializers.Serializer):
     # opcional: si offline ya decidió enviarla
     status = serializers.ChoiceField(choices=[CaseStatus.BORRADOR, CaseStatus.REGISTRADA], required=False)
 
+    def validate(self, attrs):
+        # dentro de un lote (SyncSolicitudesSerializer) el esquema se aplica
+        # a todo el lote de una vez; suelto (NDJSON) se aplica aquí.
+        # context["submit"] = True -> se valida como REGISTRADA
+        if self.parent is None:
+            status = CaseStatus.REGISTRADA if self.context.get("submit") else attrs.get("status", CaseStatus.BORRADOR)
+            errors = validate_case(attrs["request_type"], status, attrs.get("data"))
+            if errors:
+                raise serializers.ValidationError({"data": errors})
+        return attrs
+
 class SyncSolicitudesSerializer(serializers.Serializer):
     solicitudes = SyncSolicitudItemSerializer(many=True)
     # si true, fuerza todas a REGISTRADA (útil botón "Sincronizar y enviar")
     submit = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        # ✅ esquemas por tipo/estado sobre todo el lote; errores alineados por item
+        errors = validate_batch(attrs["solicitudes"], submit_all=attrs.get("submit", False))
+        if any(errors):
+            raise serializers.ValidationError({"solicitudes": errors})
+        return attrs
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from .models import CaseStatus
+
+
+class CaseTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    from_status = serializers.ChoiceField(choices=CaseStatus.choices)
+    to_status = serializers.ChoiceField(choices=CaseStatus.choices)
+
+    def validate(self, attrs):
+        if attrs["from_status"] == attrs["to_status"]:
+            raise serializers.ValidationError("from_status y to_status deben ser distintos.")
+        # volver a borrador es cosa del solicitante, no de una revisión en bloque
+        if attrs["to_status"] == CaseStatus.BORRADOR:
+            raise serializers.ValidationError({"to_status": "Una revisión no puede devolver solicitudes a BORRADOR."})
+        return attrs
@@ -0,0 +1,41 @@
+from . import metrics
+from .models import CaseDocument, DocumentStatus
+
+DEDUP_BYTES_SAVED = "documents_dedup_bytes_saved"
+
+
+def create_document(case, user, stored, *, category, original_name, mime_type="", sha256=""):
+    """Registra un CaseDocument para un archivo ya guardado por el backend (cases/storage.py)."""
+    return CaseDocument.objects.create(
+        case=case,
+        category=category,
+        file_url=stored["file_url"],
+        public_id=stored["public_id"],
+        original_name=original_name,
+        size_bytes=stored["size_bytes"],
+        mime_type=mime_type or "",
+        sha256=sha256,
+        uploaded_by=user,
+    )
+
+
+def find_duplicate(user, sha256):
+    """Documento ya subido (READY) por el mismo usuario con el mismo contenido."""
+    if not sha256 or user is None:
+        return None
+    return (
+        CaseDocument.objects.filter(uploaded_by=user, sha256=sha256, status=DocumentStatus.READY)
+        .exclude(file_url="")
+        .order_by("-id")
+        .first()
+    )
+
+
+def reuse_document(original, case, user, *, category, original_name, mime_type=""):
+    """Nueva fila de metadata apuntando al mismo objeto almacenado: no se vuelve a subir."""
+    stored = {"file_url": original.file_url, "public_id": original.public_id, "size_bytes": original.size_bytes}
+    doc = create_document(
+        case, user, stored, category=category, original_name=original_name, mime_type=mime_type, sha256=original.sha256
+    )
+    metrics.incr(DEDUP_BYTES_SAVED, original.size_bytes)
+    return doc
@@ -0,0 +1,120 @@
+from django.utils import timezone
+
+from .cache import invalidate_cases
+from .codes import assign_codes
+from .models import Case, CaseStatus
+from .search import index_cases
+from .summary import record, transition_deltas
+from audit.models import CaseEvent, EventType
+from audit.writer import record_events
+
+
+def sync_solicitudes(user, items, submit_all=False):
+    """
+    Aplica un lote de solicitudes offline con un número constante de queries:
+    1 SELECT por external_uuid__in, 1 bulk_create de cases, 1 bulk_update,
+    1 bulk_create de eventos CREATED (audit.writer, al confirmar) y 1 upsert del índice de búsqueda
+    (sin importar el tamaño del lote), más 1-2 queries por grupo del resumen
+    del dashboard que se mueva.
+
+    Devuelve una lista con el resultado de cada item, en el mismo orden:
+    {"uuid_externo": str, "id": int | None, "status": "created" | "updated" | "skipped"}
+    """
+    uuids = {item["uuid_externo"] for item in items}
+    existing = {c.external_uuid: c for c in Case.objects.filter(external_uuid__in=uuids)}
+
+    to_create = {}   # uuid -> Case (nuevo, aún sin id)
+    to_update = {}   # uuid -> Case (existente del usuario)
+    outcomes = []    # (uuid, status) en el orden recibido
+
+    for item in items:
+        ext_uuid = item["uuid_externo"]
+        data = item.get("data", {}) or {}
+        desired_status = item.get("status", CaseStatus.BORRADOR)
+        if submit_all:
+            desired_status = CaseStatus.REGISTRADA
+
+        # ✅ idempotente: si existe ese external_uuid (en BD o antes en el lote), NO se crea otro
+        case = existing.get(ext_uuid) or to_create.get(ext_uuid)
+
+        if case:
+            # seguridad: si el uuid existe pero no es del usuario, no lo tocamos
+            if case.created_by_id != user.id:
+                outcomes.append((ext_uuid, "skipped"))
+                continue
+
+            # index_cases lee created_by: es el usuario (evita 1 SELECT por case)
+            case.created_by = user
+
+            # MVP: merge simple
+            case.data = data or case.data
+
+            # si se pide REGISTRADA y está en BORRADOR, lo subimos
+            if desired_status == CaseStatus.REGISTRADA and case.status == CaseStatus.BORRADOR:
+                case.status = CaseStatus.REGISTRADA
+
+            if ext_uuid in existing:
+                to_update[ext_uuid] = case
+            outcomes.append((ext_uuid, "updated"))
+            continue
+
+        to_create[ext_uuid] = Case(
+            applicant_type=item["applicant_type"],
+            request_type=item["request_type"],
+            data=data,
+            status=desired_status,
+            created_by=user,
+            external_uuid=ext_uuid,
+        )
+        outcomes.append((ext_uuid, "created"))
+
+    # bulk_create/bulk_update no llaman a save(): proyectamos data y
+    # asignamos code a mano (un bloque de códigos por prefijo, no uno por case)
+    for case in [*to_create.values(), *to_update.values()]:
+        case.apply_data_projection()
+    assign_codes([*to_create.values(), *to_update.values()])
+
+    if to_create:
+        Case.objects.bulk_create(to_create.values())
+        record_events(
+            [
+                CaseEvent(
+                    case=case,
+                    event_type=EventType.CREATED,
+                    to_status=case.status,
+                    payload={"source": "offline_sync"},
+                    created_by=user,
+                )
+                for case in to_create.values()
+            ]
+        )
+
+    if to_update:
+        # bulk_update no aplica auto_now
+        now = timezone.now()
+        for case in to_update.values():
+            case.updated_at = now
+        Case.objects.bulk_update(
+            to_update.values(), ["data", "status", "code", "updated_at", *Case.PROJECTED_FIELDS]
+        )
+
+    # bulk_* no dispara señales: resumen, cache e índice a mano
+    record(transition_deltas(
+        [(None, case.summary_key()) for case in to_create.values()]
+        + [(case.summary_snapshot, case.summary_key()) for case in to_update.values()]
+    ))
+
+    touched = [*to_create.values(), *to_update.values()]
+    if touched:
+        invalidate_cases([case.id for case in touched])
+        index_cases(touched)
+
+    results = []
+    for ext_uuid, outcome in outcomes:
+        case = existing.get(ext_uuid) or to_create.get(ext_uuid)
+        results.append({
+            "uuid_externo": str(ext_uuid),
+            "id": case.id if outcome != "skipped" else None,
+            "status": outcome,
+        })
+    return results
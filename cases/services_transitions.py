@@ -0,0 +1,82 @@
+from django.utils import timezone
+
+from .cache import invalidate_cases
+from .codes import assign_codes
+from .models import Case, CaseStatus
+from .schemas import validate_case
+from .search import index_cases
+from .summary import record, transition_deltas
+from audit.models import CaseEvent, EventType
+from audit.writer import record_events
+
+
+def transition_cases(user, ids, from_status, to_status):
+    """
+    Mueve en bloque los cases `ids` que sigan en `from_status` a `to_status`.
+    Debe llamarse dentro de transaction.atomic().
+
+    Queries constantes: SELECT ... FOR UPDATE de los que cumplen la condición,
+    1 UPDATE ... WHERE status = from_status, 1 bulk insert de STATUS_CHANGED,
+    1 SELECT para explicar los omitidos (+ 1 UPDATE por grupo del resumen).
+    Los que salen de BORRADOR sin code reciben uno en un solo bulk_update.
+    Si otra revisión ya los movió, quedan en `skipped` con su estado actual.
+    Los que entrarían a REGISTRADA sin cumplir cases/schemas.py tampoco se
+    mueven: quedan en `skipped` con sus `errors`.
+    """
+    ids = list(dict.fromkeys(ids))
+    matched = list(Case.objects.select_for_update().filter(id__in=ids, status=from_status).order_by("id"))
+
+    invalid = {}
+    if to_status == CaseStatus.REGISTRADA:
+        # mismas reglas que crear/sync: un revisor no puede saltarse el esquema
+        for case in matched:
+            errors = validate_case(case.request_type, to_status, case.data)
+            if errors:
+                invalid[case.id] = errors
+        matched = [case for case in matched if case.id not in invalid]
+    matched_ids = [case.id for case in matched]
+
+    if matched_ids:
+        now = timezone.now()
+        Case.objects.filter(id__in=matched_ids, status=from_status).update(status=to_status, updated_at=now)
+
+        record_events(
+            [
+                CaseEvent(
+                    case_id=case_id,
+                    event_type=EventType.STATUS_CHANGED,
+                    from_status=from_status,
+                    to_status=to_status,
+                    payload={"action": "bulk_transition"},
+                    created_by=user,
+                )
+                for case_id in matched_ids
+            ]
+        )
+
+        changes = []
+        for case in matched:
+            before = case.summary_snapshot
+            case.status, case.updated_at = to_status, now
+            changes.append((before, case.summary_key()))
+        record(transition_deltas(changes))
+
+        coded = assign_codes(matched)
+        if coded:
+            Case.objects.bulk_update(coded, ["code"])
+            index_cases(coded)
+
+        # .update()/bulk_create no disparan señales
+        invalidate_cases(matched_ids)
+
+    matched_set = set(matched_ids)
+    skipped_ids = [i for i in ids if i not in matched_set]
+    current = dict(Case.objects.filter(id__in=skipped_ids).values_list("id", "status")) if skipped_ids else {}
+
+    skipped = []
+    for i in skipped_ids:
+        entry = {"id": i, "status": current.get(i)}
+        if i in invalid:
+            entry["errors"] = {"data": invalid[i]}
+        skipped.append(entry)
+    return {"transitioned": matched_ids, "skipped": skipped}
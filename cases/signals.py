@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from audit.signals import events_written
+
+from .cache import invalidate_cases
+from .models import Case, CaseDocument
+from .search import index_cases
+from .summary import record, transition_deltas
+
+
+@receiver([post_save, post_delete], sender=Case)
+def case_changed(sender, instance, **kwargs):
+    invalidate_cases([instance.pk])
+
+
+@receiver(post_save, sender=Case)
+def case_saved_reindex(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_cases([instance])
+
+
+@receiver(post_save, sender=Case)
+def case_saved_summary(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else getattr(instance, "summary_snapshot", None)
+    if not created and before is None:
+        # cargado con campos diferidos: no sabemos de dónde sale; lo corrige rebuild_case_summary
+        return
+    after = instance.summary_key()
+    record(transition_deltas([(before, after)]))
+    instance.summary_snapshot = after
+
+
+@receiver(post_delete, sender=Case)
+def case_deleted_summary(sender, instance, **kwargs):
+    key = getattr(instance, "summary_snapshot", None) or instance.summary_key()
+    record(transition_deltas([(key, None)]))
+
+
+@receiver([post_save, post_delete], sender=CaseDocument)
+@receiver([post_save, post_delete], sender="audit.CaseEvent")
+def case_child_changed(sender, instance, **kwargs):
+    invalidate_cases([instance.case_id])
+
+
+@receiver(events_written)
+def case_events_written(sender, events, **kwargs):
+    # lotes del writer de auditoría (bulk_create, sin post_save)
+    invalidate_cases({event.case_id for event in events})
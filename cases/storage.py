@@ -0,0 +1,166 @@
+"""
+Backends de almacenamiento de documentos (DOCUMENT_STORAGE).
+
+- "cloudinary": producción. upload() sube desde el servidor (endpoint
+  /documentos/subir/); sign_upload()/verify_upload() permiten que la app
+  suba directo a Cloudinary y solo confirme al API.
+- "local": disco en DOCUMENT_LOCAL_ROOT, con un "servidor" falso
+  (/documentos/local/subir/) que imita la subida firmada. Tests y desarrollo.
+
+upload() y verify_upload() devuelven {"file_url", "public_id", "size_bytes"};
+delete() borra una subida firmada que confirmar rechazó.
+"""
+
+import time
+import uuid
+
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+
+LOCAL_TOKEN_SALT = "documentos.local.subir"
+LOCAL_RESULT_SALT = "documentos.local.resultado"
+
+
+class StorageError(Exception):
+    """Respuesta de subida inválida (firma, public_id o archivo que no cuadran)."""
+
+
+def new_public_id(folder):
+    return f"{folder}/{uuid.uuid4().hex}"
+
+
+class CloudinaryStorage:
+    name = "cloudinary"
+    RESOURCE_TYPES = ("image", "raw", "video")
+
+    def upload(self, file, folder):
+        result = cloudinary.uploader.upload(file, folder=folder, resource_type="auto")
+        return {
+            "file_url": result["secure_url"],
+            "public_id": result.get("public_id", ""),
+            "size_bytes": result.get("bytes", getattr(file, "size", 0)),
+        }
+
+    def sign_upload(self, folder):
+        # la app hace POST multipart a `url` con `fields` + file
+        config = cloudinary.config()
+        public_id = new_public_id(folder)
+        params = {"public_id": public_id, "timestamp": int(time.time())}
+        return {
+            "public_id": public_id,
+            "url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/auto/upload",
+            "method": "POST",
+            "fields": {
+                **params,
+                "api_key": config.api_key,
+                "signature": cloudinary.utils.api_sign_request(params, config.api_secret),
+            },
+        }
+
+    def verify_upload(self, result, public_id):
+        # la firma de Cloudinary solo cubre public_id + version: tamaño, URL y
+        # tipo se leen del Admin API, no del `result` que manda la app
+        try:
+            version, signature = result["version"], result["signature"]
+        except (KeyError, TypeError):
+            raise StorageError("Respuesta de Cloudinary incompleta.")
+        if result.get("public_id") != public_id:
+            raise StorageError("public_id no corresponde a la subida firmada.")
+        if not cloudinary.utils.verify_api_response_signature(public_id, version, signature):
+            raise StorageError("Firma de Cloudinary inválida.")
+
+        resource_type = result.get("resource_type")
+        if resource_type not in self.RESOURCE_TYPES:
+            raise StorageError("resource_type inválido.")
+        try:
+            resource = cloudinary.api.resource(public_id, resource_type=resource_type, type="upload")
+        except cloudinary.exceptions.Error:
+            raise StorageError("El archivo no existe en Cloudinary.")
+        return {"file_url": resource["secure_url"], "public_id": public_id, "size_bytes": int(resource["bytes"])}
+
+    def delete(self, public_id):
+        # subida rechazada: no dejar el objeto huérfano (no sabemos su tipo: se prueban todos)
+        for resource_type in self.RESOURCE_TYPES:
+            try:
+                result = cloudinary.uploader.destroy(public_id, resource_type=resource_type, invalidate=True)
+            except cloudinary.exceptions.Error:
+                continue
+            if result.get("result") == "ok":
+                return
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self):
+        self.files = FileSystemStorage(location=settings.DOCUMENT_LOCAL_ROOT)
+
+    def url(self, public_id):
+        return settings.DOCUMENT_LOCAL_URL + public_id
+
+    def upload(self, file, folder):
+        # FileSystemStorage copia por chunks: memoria acotada
+        public_id = self.files.save(new_public_id(folder), file)
+        return {"file_url": self.url(public_id), "public_id": public_id, "size_bytes": self.files.size(public_id)}
+
+    def sign_upload(self, folder):
+        public_id = new_public_id(folder)
+        return {
+            "public_id": public_id,
+            "url": reverse("documentos-local-subir"),
+            "method": "POST",
+            "fields": {"token": signing.dumps({"public_id": public_id}, salt=LOCAL_TOKEN_SALT)},
+        }
+
+    def receive(self, token, file):
+        """Lado "servidor" de la subida firmada: guarda y responde firmado."""
+        try:
+            public_id = signing.loads(
+                token, salt=LOCAL_TOKEN_SALT, max_age=settings.DOCUMENT_SIGNED_UPLOAD_TTL
+            )["public_id"]
+        except (signing.BadSignature, KeyError, TypeError):
+            raise StorageError("Token de subida inválido o vencido.")
+        if self.files.exists(public_id):
+            raise StorageError("Token de subida ya usado.")
+
+        public_id = self.files.save(public_id, file)
+        size = self.files.size(public_id)
+        return {
+            "public_id": public_id,
+            "bytes": size,
+            "signature": signing.dumps({"public_id": public_id, "bytes": size}, salt=LOCAL_RESULT_SALT),
+        }
+
+    def verify_upload(self, result, public_id):
+        try:
+            signed = signing.loads(result["signature"], salt=LOCAL_RESULT_SALT)
+        except (signing.BadSignature, KeyError, TypeError):
+            raise StorageError("Firma de la subida inválida.")
+        if signed["public_id"] != public_id or not self.files.exists(public_id):
+            raise StorageError("public_id no corresponde a la subida firmada.")
+        return {"file_url": self.url(public_id), "public_id": public_id, "size_bytes": signed["bytes"]}
+
+    def delete(self, public_id):
+        if self.files.exists(public_id):
+            self.files.delete(public_id)
+
+
+BACKENDS = {
+    CloudinaryStorage.name: CloudinaryStorage,
+    LocalStorage.name: LocalStorage,
+}
+
+
+def get_storage():
+    return BACKENDS[settings.DOCUMENT_STORAGE]()
+
+
+def case_folder(case):
+    return f"campesena/cases/{case.id}"
@@ -0,0 +1,41 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CaseSummary
+
+KEY_FIELDS = ["day", "status", "request_type", "applicant_type", "municipio"]
+
+
+def record(deltas):
+    """
+    Aplica {summary_key: +n/-n} a CaseSummary con UPDATE count = count + n
+    (una query por grupo, no por case). Debe llamarse dentro de la misma
+    transacción que el cambio de los cases.
+    """
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        lookup = dict(zip(KEY_FIELDS, key))
+        if CaseSummary.objects.filter(**lookup).update(count=F("count") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                CaseSummary.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            # otro worker creó el grupo entre el UPDATE y el INSERT
+            CaseSummary.objects.filter(**lookup).update(count=F("count") + delta)
+
+
+def transition_deltas(changes):
+    """[(clave_anterior | None, clave_nueva | None), ...] -> Counter de deltas."""
+    deltas = Counter()
+    for before, after in changes:
+        if before == after:
+            continue
+        if before is not None:
+            deltas[before] -= 1
+        if after is not None:
+            deltas[after] += 1
+    return deltas
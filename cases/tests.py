@@ -1,15 +1,47 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
 import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 
-from cases.models import Case
+from django.utils import timezone
+
+from config.pagination import encode_cursor
+
+from cases import cache as case_cache
+from cases import metrics
+from cases.codes import allocate, reset_blocks
+from cases.filters import filter_cases
+from cases.offload import LOST, claim, process, purge_failed, retry_failed
+from cases.schemas import validate_batch
+from cases.services_documents import DEDUP_BYTES_SAVED
+from cases.storage import LocalStorage
+from cases.uploads import append, part_path
+from cases.models import Case, CaseCodeSequence, CaseDocument, CaseSummary, UploadSession, parse_amount
+from audit.models import CaseEvent
 
 User = get_user_model()
 
+# data mínima válida para enviar como REGISTRADA (cases/schemas.py)
+CAP_DATA = {"municipio": "Neiva", "actividad_productiva": "Café", "descripcion_idea": "Idea", "tema_capacitacion": "Riego"}
+PRO_DATA = {"municipio": "Neiva", "actividad_productiva": "Café", "descripcion_idea": "Idea", "monto_estimado": 1500000}
+
 
 class PermissionsTests(TestCase):
     def setUp(self):
@@ -55,6 +87,790 @@ class PermissionsTests(TestCase):
         self.assertEqual(r.status_code, 403)
 
 
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_pag@test.com", password="pass12345", role="GESTOR")
+        owner = User.objects.create_user(email="camp_pag@test.com", password="pass12345", role="CAMPESINO")
+        Case.objects.bulk_create(
+            [Case(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=owner) for _ in range(25)]
+        )
+        self.client.force_authenticate(user=self.gestor)
+
+    def test_default_is_page_number(self):
+        body = self.client.get("/api/solicitudes/").json()
+        self.assertEqual(body["count"], 25)
+
+    def test_cursor_mode_seeks_without_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            first = self.client.get("/api/solicitudes/?cursor=").json()
+        self.assertNotIn("count", first)
+        # el único COUNT es el del ETag (misma query que los MAX); la paginación no cuenta
+        counts = [q["sql"].upper() for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()]
+        self.assertTrue(all("MAX(" in sql for sql in counts))
+        self.assertEqual(len(first["results"]), 20)
+
+        second = self.client.get(first["next"]).json()
+        ids = [c["id"] for c in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 25)
+        self.assertIsNone(second["next"])
+
+
+class CaseListFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_f@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_f@test.com", password="pass12345", role="CAMPESINO")
+
+        self.reg = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="CAPACITACION", status="REGISTRADA",
+            created_by=self.camp, assigned_to=self.gestor,
+        )
+        self.draft = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="PROYECTO_PRODUCTIVO", created_by=self.camp,
+        )
+        self.client.force_authenticate(user=self.gestor)
+
+    def ids(self, query):
+        r = self.client.get(f"/api/solicitudes/?{query}")
+        self.assertEqual(r.status_code, 200)
+        return [c["id"] for c in r.json()["results"]]
+
+    def test_filters(self):
+        self.assertEqual(self.ids("status=REGISTRADA"), [self.reg.id])
+        self.assertEqual(self.ids("request_type=PROYECTO_PRODUCTIVO"), [self.draft.id])
+        self.assertEqual(self.ids(f"assigned_to={self.gestor.id}&status=REGISTRADA"), [self.reg.id])
+        self.assertEqual(self.ids("applicant_type=ASOCIACION"), [])
+
+        today = timezone.now().date().isoformat()
+        self.assertEqual(len(self.ids(f"created_after={today}&created_before={today}")), 2)
+        self.assertEqual(self.ids("created_before=2000-01-01"), [])
+
+    def test_invalid_filter_values(self):
+        for query in ["status=NOPE", "assigned_to=x", "created_after=ayer"]:
+            r = self.client.get(f"/api/solicitudes/?{query}")
+            self.assertEqual(r.status_code, 400, query)
+
+    def test_hot_filters_use_indexes(self):
+        base = Case.objects.order_by("-id")
+        combos = {
+            "case_status_id_idx": {"status": "REGISTRADA"},
+            "case_assignee_status_idx": {"assigned_to": str(self.gestor.id), "status": "REGISTRADA"},
+            "case_reqtype_id_idx": {"request_type": "CAPACITACION"},
+        }
+        for index, params in combos.items():
+            plan = filter_cases(base, params).explain()
+            self.assertIn(index, plan, plan)
+            self.assertNotIn("TEMP B-TREE", plan, plan)
+
+        # ?mias=true / CAMPESINO: en SQLite basta el índice del FK (termina en rowid)
+        plan = base.filter(created_by=self.camp).explain()
+        self.assertRegex(plan, r"SEARCH cases_case USING (COVERING )?INDEX \w+ \(created_by_id=\?\)")
+        self.assertNotIn("TEMP B-TREE", plan, plan)
+
+
+class SparseFieldsExpandTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_sf@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_sf@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.gestor)
+
+    def make_cases(self, n):
+        for i in range(n):
+            case = Case.objects.create(
+                applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp,
+                data={"municipio": f"M{i}", "descripcion_idea": "x" * 200},
+            )
+            CaseEvent.objects.create(case=case, event_type="CREATED", to_status="BORRADOR", created_by=self.camp)
+            CaseEvent.objects.create(case=case, event_type="UPDATED", created_by=self.camp)
+            CaseDocument.objects.create(case=case, file_url="https://example.com/a.pdf", original_name="a.pdf")
+
+    def test_fields_trims_response_and_data(self):
+        self.make_cases(1)
+        r = self.client.get("/api/solicitudes/?fields=id,status,data.municipio")
+        row = r.json()["results"][0]
+        self.assertEqual(set(row), {"id", "status", "data"})
+        self.assertEqual(row["data"], {"municipio": "M0"})
+
+    def test_expand_inlines_related(self):
+        self.make_cases(1)
+        r = self.client.get("/api/solicitudes/?expand=created_by,documents,last_event")
+        row = r.json()["results"][0]
+        self.assertEqual(row["created_by"]["email"], "camp_sf@test.com")
+        self.assertEqual(len(row["documents"]), 1)
+        self.assertEqual(row["last_event"]["event_type"], "UPDATED")
+
+    def test_expand_query_count_does_not_grow_with_page(self):
+        url = "/api/solicitudes/?expand=created_by,assigned_to,documents,last_event"
+        self.make_cases(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        self.make_cases(8)
+        with CaptureQueriesContext(connection) as big:
+            r = self.client.get(url)
+        self.assertEqual(len(r.json()["results"]), 10)
+        self.assertEqual(len(small.captured_queries), len(big.captured_queries))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.camp = User.objects.create_user(email="camp_etag@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.camp)
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp)
+
+    def assert_revalidates(self, url, change):
+        r1 = self.client.get(url)
+        self.assertEqual(r1.status_code, 200)
+        etag = r1["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        r2 = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r2.status_code, 304)
+        self.assertEqual(r2["ETag"], etag)
+
+        change()
+        r3 = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r3.status_code, 200)
+        self.assertNotEqual(r3["ETag"], etag)
+
+    def test_detail(self):
+        def change():
+            self.case.data = {"municipio": "Y"}
+            self.case.save()
+        self.assert_revalidates(f"/api/solicitudes/{self.case.id}/", change)
+
+    def test_timeline(self):
+        self.assert_revalidates(
+            f"/api/solicitudes/{self.case.id}/eventos/",
+            lambda: CaseEvent.objects.create(case=self.case, event_type="UPDATED"),
+        )
+
+    def test_documents(self):
+        self.assert_revalidates(
+            f"/api/documentos/?case_id={self.case.id}",
+            lambda: CaseDocument.objects.create(case=self.case, file_url="https://example.com/a", original_name="a"),
+        )
+
+    def test_list(self):
+        self.assert_revalidates(
+            "/api/solicitudes/",
+            lambda: Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp),
+        )
+
+    def test_list_after_deleting_older_case(self):
+        # max(id) y max(updated_at) no cambian: el count sí
+        Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp)
+        self.assert_revalidates("/api/solicitudes/", self.case.delete)
+        self.assertEqual(self.client.get("/api/solicitudes/").json()["count"], 1)
+
+    def test_not_modified_skips_serialization(self):
+        url = f"/api/solicitudes/{self.case.id}/?expand=documents,last_event"
+        etag = self.client.get(url)["ETag"]
+        # get_object + 1 query de ETag
+        with self.assertNumQueries(2):
+            r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+
+
+class CaseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_cc@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_cc@test.com", password="pass12345", role="CAMPESINO")
+        self.other = User.objects.create_user(email="otro_cc@test.com", password="pass12345", role="CAMPESINO")
+        self.case = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp, external_uuid=uuid.uuid4()
+        )
+        Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.other)
+
+    def get(self, user, url):
+        self.client.force_authenticate(user=user)
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        return r
+
+    def test_detail_hit_and_invalidation_on_bulk_sync(self):
+        url = f"/api/solicitudes/{self.case.id}/"
+        self.assertEqual(self.get(self.camp, url)["X-Cache"], "MISS")
+        self.assertEqual(self.get(self.camp, url)["X-Cache"], "HIT")
+
+        self.client.post(
+            "/api/sync/solicitudes/",
+            data={"solicitudes": [{"uuid_externo": str(self.case.external_uuid), "applicant_type": "CAMPESINO",
+                                   "request_type": "CAPACITACION", "data": {"nuevo": True}}]},
+            format="json",
+        )
+        r = self.get(self.camp, url)
+        self.assertEqual(r["X-Cache"], "MISS")
+        self.assertEqual(r.json()["data"], {"nuevo": True})
+
+    def test_timeline_invalidated_by_new_event(self):
+        url = f"/api/solicitudes/{self.case.id}/eventos/"
+        self.get(self.camp, url)
+        self.assertEqual(self.get(self.camp, url)["X-Cache"], "HIT")
+
+        CaseEvent.objects.create(case=self.case, event_type="UPDATED")
+        r = self.get(self.camp, url)
+        self.assertEqual(r["X-Cache"], "MISS")
+        self.assertEqual(len(r.json()), 1)
+
+    def test_list_pages_never_leak_across_scopes(self):
+        gestor_ids = [c["id"] for c in self.get(self.gestor, "/api/solicitudes/").json()["results"]]
+        self.assertEqual(len(gestor_ids), 2)
+
+        r = self.get(self.camp, "/api/solicitudes/")
+        self.assertEqual(r["X-Cache"], "MISS")
+        self.assertEqual([c["id"] for c in r.json()["results"]], [self.case.id])
+
+    def test_metrics_endpoint_reports_this_process(self):
+        url = f"/api/solicitudes/{self.case.id}/"
+        self.get(self.camp, url)
+        self.get(self.camp, url)
+
+        self.client.force_authenticate(user=self.camp)
+        self.assertEqual(self.client.get("/api/admin/metricas/").status_code, 403)
+
+        admin = User.objects.create_user(email="admin_cc@test.com", password="pass12345", role="ADMIN")
+        body = self.get(admin, "/api/admin/metricas/").json()
+        self.assertEqual((body["cache"]["hits"], body["cache"]["misses"]), (1, 1))
+        self.assertEqual((body["dedup_bytes_saved"], body["shared"]), (0, False))
+
+    def test_change_without_invalidation_is_not_served_stale(self):
+        # otro proceso (LocMemCache es por proceso) cambió el case: aquí no hubo invalidate_cases
+        url = f"/api/solicitudes/{self.case.id}/"
+        self.get(self.camp, url)
+        self.get(self.camp, "/api/solicitudes/")
+        with patch("cases.cache._bump"):
+            Case.objects.filter(pk=self.case.pk).update(status="EN_AJUSTES", updated_at=timezone.now())
+
+        r = self.get(self.camp, url)
+        self.assertEqual((r["X-Cache"], r.json()["status"]), ("MISS", "EN_AJUSTES"))
+        r = self.get(self.camp, "/api/solicitudes/")
+        self.assertEqual((r["X-Cache"], r.json()["results"][0]["status"]), ("MISS", "EN_AJUSTES"))
+
+    def test_change_in_other_scope_keeps_list_hit(self):
+        self.get(self.camp, "/api/solicitudes/")
+        otro = Case.objects.get(created_by=self.other)
+        otro.data = {"nuevo": True}
+        otro.save()
+        self.assertEqual(self.get(self.camp, "/api/solicitudes/")["X-Cache"], "HIT")
+
+    def test_hit_ratio_is_reported(self):
+        url = f"/api/solicitudes/{self.case.id}/"
+        for _ in range(4):
+            self.get(self.camp, url)
+        self.assertEqual(case_cache.stats(), {"hits": 3, "misses": 1, "hit_ratio": 0.75})
+
+
+class CaseSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_q@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(
+            email="camp_q@test.com", password="pass12345", role="CAMPESINO",
+            first_name="María", last_name="Pérez", document_number="123456",
+        )
+        self.client.force_authenticate(user=self.gestor)
+
+        self.cafe = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp,
+            data={"descripcion_idea": "Capacitación en café especial", "municipio": "Pitalito",
+                  "actividad_productiva": "Café"},
+        )
+        self.cacao = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="PROYECTO_PRODUCTIVO", created_by=self.camp,
+            data={"descripcion_idea": "Secado de cacao; café solo de paso", "municipio": "Tumaco",
+                  "actividad_productiva": "Cacao"},
+        )
+
+    def search(self, q):
+        r = self.client.get("/api/solicitudes/", {"q": q})
+        self.assertEqual(r.status_code, 200)
+        return [c["id"] for c in r.json()["results"]]
+
+    def test_accent_insensitive_and_ranked(self):
+        self.assertEqual(self.search("capacitacion"), [self.cafe.id])
+        self.assertEqual(self.search("TUMACÓ"), [self.cacao.id])
+        # 'café' aparece más en el primero
+        self.assertEqual(self.search("cafe"), [self.cafe.id, self.cacao.id])
+
+    def test_non_object_data_is_indexed_without_it(self):
+        self.client.force_authenticate(user=self.camp)
+        r = self.client.post(
+            "/api/solicitudes/",
+            data={"applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": [1, 2]},
+            format="json",
+        )
+        self.assertEqual(r.status_code, 201)
+
+    def test_applicant_name_and_document(self):
+        self.assertEqual(len(self.search("maria perez")), 2)
+        self.assertEqual(len(self.search("123456")), 2)
+
+    def test_index_follows_saves_and_sync(self):
+        self.cafe.data = {"descripcion_idea": "Apicultura"}
+        self.cafe.save()
+        self.assertEqual(self.search("apicultura"), [self.cafe.id])
+        self.assertEqual(self.search("pitalito"), [])
+
+        self.client.force_authenticate(user=self.camp)
+        self.client.post(
+            "/api/sync/solicitudes/",
+            data={"solicitudes": [{"uuid_externo": str(uuid.uuid4()), "applicant_type": "CAMPESINO",
+                                   "request_type": "CAPACITACION", "data": {"municipio": "Garzón"}}]},
+            format="json",
+        )
+        self.client.force_authenticate(user=self.gestor)
+        self.assertEqual(len(self.search("garzon")), 1)
+
+    def test_search_respects_scope(self):
+        other = User.objects.create_user(email="otro_q@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.search("cafe"), [])
+
+
+class ProjectedColumnsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_pc@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_pc@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.gestor)
+
+    def make(self, **data):
+        return Case.objects.create(
+            applicant_type="CAMPESINO", request_type="PROYECTO_PRODUCTIVO", created_by=self.camp, data=data
+        )
+
+    def test_projection_on_save(self):
+        case = self.make(municipio=" Pitalito ", monto_estimado="$ 1.500.000", actividad_productiva="Café")
+        case.refresh_from_db()
+        self.assertEqual(case.municipio, "Pitalito")
+        self.assertEqual(case.actividad_productiva, "Café")
+        self.assertEqual(case.monto_estimado, Decimal("1500000.00"))
+
+        case.data = {"municipio": "Garzón", "monto_estimado": "no sé"}
+        case.save(update_fields=["data"])
+        case.refresh_from_db()
+        self.assertEqual(case.municipio, "Garzón")
+        self.assertIsNone(case.monto_estimado)
+
+    def test_parse_amount_es_co(self):
+        self.assertEqual(parse_amount("$ 1.500"), Decimal("1500.00"))
+        self.assertEqual(parse_amount("2.500"), Decimal("2500.00"))
+        self.assertEqual(parse_amount("1.500.000,50"), Decimal("1500000.50"))
+        self.assertEqual(parse_amount("1500,50"), Decimal("1500.50"))
+        self.assertEqual(parse_amount(1500000.5), Decimal("1500000.50"))
+        for bad in ["1,500,000.50", "1.5", "1.50.000", "1,5,0", "no sé", ""]:
+            self.assertIsNone(parse_amount(bad), bad)
+
+    def test_filters_use_columns(self):
+        small = self.make(municipio="Pitalito", monto_estimado=1000)
+        big = self.make(municipio="Pitalito", monto_estimado="2500000")
+        self.make(municipio="Garzón", monto_estimado=5000000)
+
+        r = self.client.get("/api/solicitudes/?municipio=Pitalito&monto_min=2000000")
+        self.assertEqual([c["id"] for c in r.json()["results"]], [big.id])
+
+        r = self.client.get("/api/solicitudes/?monto_max=1000&fields=id,municipio,monto_estimado")
+        self.assertEqual(r.json()["results"], [{"id": small.id, "municipio": "Pitalito", "monto_estimado": "1000.00"}])
+
+        self.assertEqual(self.client.get("/api/solicitudes/?monto_min=mucho").status_code, 400)
+
+    def test_sync_projects_and_backfill(self):
+        self.client.force_authenticate(user=self.camp)
+        u = str(uuid.uuid4())
+        self.client.post(
+            "/api/sync/solicitudes/",
+            data={"solicitudes": [{"uuid_externo": u, "applicant_type": "CAMPESINO",
+                                   "request_type": "CAPACITACION", "data": {"municipio": "Neiva"}}]},
+            format="json",
+        )
+        case = Case.objects.get(external_uuid=u)
+        self.assertEqual(case.municipio, "Neiva")
+
+        # simular filas viejas sin proyección
+        Case.objects.filter(id=case.id).update(municipio="")
+        call_command("backfill_case_columns", stdout=StringIO())
+        case.refresh_from_db()
+        self.assertEqual(case.municipio, "Neiva")
+
+
+class CaseSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_rs@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_rs@test.com", password="pass12345", role="CAMPESINO")
+
+    def resumen(self, query=""):
+        self.client.force_authenticate(user=self.gestor)
+        r = self.client.get(f"/api/solicitudes/resumen/{query}")
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def test_counts_follow_creates_status_changes_and_sync(self):
+        case = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp, data={"municipio": "Neiva"}
+        )
+        Case.objects.create(applicant_type="CAMPESINO", request_type="PROYECTO_PRODUCTIVO", created_by=self.camp)
+
+        case.status = "REGISTRADA"
+        case.save()
+
+        self.client.force_authenticate(user=self.camp)
+        u = str(uuid.uuid4())
+        for submit in (False, True):
+            self.client.post(
+                "/api/sync/solicitudes/",
+                data={"submit": submit, "solicitudes": [{"uuid_externo": u, "applicant_type": "CAMPESINO",
+                                                         "request_type": "CAPACITACION", "data": CAP_DATA}]},
+                format="json",
+            )
+
+        body = self.resumen()
+        self.assertEqual(body["total"], 3)
+        self.assertEqual(body["por_estado"], {"BORRADOR": 1, "REGISTRADA": 2})
+        self.assertEqual(body["por_tipo"], {"CAPACITACION": 2, "PROYECTO_PRODUCTIVO": 1})
+        self.assertEqual(body["por_municipio"], {"": 1, "Neiva": 2})
+
+        out = StringIO()
+        call_command("rebuild_case_summary", "--check", stdout=out)
+        self.assertIn("0 grupos con drift", out.getvalue())
+
+    def test_bucketing_and_permissions(self):
+        Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp)
+        body = self.resumen("?bucket=month")
+        self.assertEqual(len(body["series"]), 1)
+        self.assertEqual(body["series"][0]["total"], 1)
+        self.assertEqual(body["series"][0]["periodo"], timezone.localdate().replace(day=1).isoformat())
+
+        self.assertEqual(self.resumen("?desde=2000-01-01&hasta=2000-12-31")["total"], 0)
+
+        self.client.force_authenticate(user=self.camp)
+        self.assertEqual(self.client.get("/api/solicitudes/resumen/").status_code, 403)
+
+    def test_rebuild_fixes_drift(self):
+        Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.camp)
+        CaseSummary.objects.update(count=99)
+
+        call_command("rebuild_case_summary", stdout=StringIO())
+        self.assertEqual(self.resumen()["total"], 1)
+
+
+class BulkTransitionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_tr@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_tr@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.gestor)
+
+    def make(self, n, status="REGISTRADA"):
+        return [
+            Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", status=status, created_by=self.camp)
+            for _ in range(n)
+        ]
+
+    def transition(self, ids, from_status="REGISTRADA", to_status="EN_REVISION"):
+        return self.client.post(
+            "/api/solicitudes/transiciones/",
+            data={"ids": ids, "from_status": from_status, "to_status": to_status},
+            format="json",
+        )
+
+    def test_conditional_transition_reports_skipped(self):
+        a, b = self.make(2)
+        (already,) = self.make(1, status="EN_REVISION")
+
+        r = self.transition([a.id, b.id, already.id, 999999])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["transitioned"], [a.id, b.id])
+        self.assertEqual(
+            r.json()["skipped"], [{"id": already.id, "status": "EN_REVISION"}, {"id": 999999, "status": None}]
+        )
+
+        self.assertEqual(Case.objects.filter(status="EN_REVISION").count(), 3)
+        self.assertEqual(
+            CaseEvent.objects.filter(event_type="STATUS_CHANGED", to_status="EN_REVISION").count(), 2
+        )
+        self.assertEqual(
+            dict(CaseSummary.objects.filter(count__gt=0).values_list("status", "count")), {"EN_REVISION": 3}
+        )
+
+        # reintento: ya no hay nada que mover
+        r = self.transition([a.id])
+        self.assertEqual(r.json()["transitioned"], [])
+
+    def test_query_count_is_constant(self):
+        # el primer movimiento crea el grupo EN_REVISION del resumen
+        self.transition([c.id for c in self.make(1)])
+        few = [c.id for c in self.make(2)]
+        many = [c.id for c in self.make(20)]
+
+        with CaptureQueriesContext(connection) as small:
+            self.transition(few)
+        with CaptureQueriesContext(connection) as big:
+            self.transition(many)
+        self.assertEqual(len(small.captured_queries), len(big.captured_queries))
+
+    def test_registering_drafts_applies_the_schema(self):
+        (incomplete,) = self.make(1, status="BORRADOR")
+        complete = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="CAPACITACION", status="BORRADOR", created_by=self.camp,
+            data=CAP_DATA,
+        )
+        r = self.transition([incomplete.id, complete.id], "BORRADOR", "REGISTRADA")
+        self.assertEqual(r.json()["transitioned"], [complete.id])
+        (skipped,) = r.json()["skipped"]
+        self.assertEqual((skipped["id"], skipped["status"]), (incomplete.id, "BORRADOR"))
+        self.assertIn("municipio", skipped["errors"]["data"][0])
+
+    def test_validation_and_permissions(self):
+        self.assertEqual(self.transition([1], "REGISTRADA", "REGISTRADA").status_code, 400)
+        self.assertEqual(self.transition([1], "REGISTRADA", "BORRADOR").status_code, 400)
+
+        self.client.force_authenticate(user=self.camp)
+        self.assertEqual(self.transition([1]).status_code, 403)
+
+
+class CaseExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.gestor = User.objects.create_user(email="gestor_exp@test.com", password="pass12345", role="GESTOR")
+        self.camp = User.objects.create_user(email="camp_exp@test.com", password="pass12345", role="CAMPESINO")
+        self.otro = User.objects.create_user(email="otro_exp@test.com", password="pass12345", role="CAMPESINO")
+
+        self.cases = [
+            Case.objects.create(
+                applicant_type="CAMPESINO", request_type="CAPACITACION", status=status,
+                created_by=self.camp, data={**CAP_DATA, "hectareas": i},
+            )
+            for i, status in enumerate(["BORRADOR", "REGISTRADA", "REGISTRADA"])
+        ]
+        self.ajeno = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.otro)
+        CaseEvent.objects.create(case=self.cases[1], event_type="CREATED", to_status="REGISTRADA", created_by=self.camp)
+
+    def export(self, query):
+        r = self.client.get(f"/api/solicitudes/export/?{query}")
+        self.assertEqual(r.status_code, 200)
+        return b"".join(r.streaming_content).decode()
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_csv_with_data_keys_and_filters(self):
+        self.client.force_authenticate(user=self.gestor)
+        rows = list(csv.DictReader(StringIO(self.export("format=csv&status=REGISTRADA&data_keys=hectareas,no_existe"))))
+
+        self.assertEqual([int(r["id"]) for r in rows], [self.cases[1].id, self.cases[2].id])
+        self.assertEqual(rows[0]["data.hectareas"], "1")
+        self.assertEqual(rows[0]["data.no_existe"], "")
+        self.assertEqual(rows[0]["created_by"], "camp_exp@test.com")
+        self.assertEqual(rows[0]["municipio"], "Neiva")
+        self.assertNotIn("eventos", rows[0])
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_with_events_respects_scope(self):
+        self.client.force_authenticate(user=self.camp)
+        lines = [json.loads(line) for line in self.export("format=ndjson&include_events=1").splitlines()]
+
+        self.assertEqual([line["id"] for line in lines], [c.id for c in self.cases])
+        self.assertEqual([e["event_type"] for e in lines[1]["eventos"]], ["CREATED"])
+        self.assertEqual(lines[0]["eventos"], [])
+
+    def test_csv_events_column_and_bad_format(self):
+        self.client.force_authenticate(user=self.camp)
+        rows = list(csv.DictReader(StringIO(self.export("include_events=true"))))
+        self.assertEqual(json.loads(rows[1]["eventos"])[0]["to_status"], "REGISTRADA")
+
+        self.assertEqual(self.client.get("/api/solicitudes/export/?format=xlsx").status_code, 400)
+        self.assertEqual(self.client.get("/api/solicitudes/export/?status=NOPE").status_code, 400)
+
+    def test_non_object_data_does_not_abort_export(self):
+        Case.objects.filter(pk=self.cases[0].pk).update(data=[1, 2])
+        self.client.force_authenticate(user=self.camp)
+        lines = self.export("format=csv&data_keys=hectareas").strip().splitlines()
+        self.assertEqual(len(lines), 4)
+
+    def test_csv_escapes_formulas(self):
+        case = self.cases[1]
+        case.data = {**case.data, "nota": '=HYPERLINK("http://x")', "otra": "-2+3", "ok": "Neiva"}
+        case.save(update_fields=["data"])
+        self.client.force_authenticate(user=self.camp)
+
+        rows = list(csv.DictReader(StringIO(self.export("data_keys=nota,otra,ok"))))
+        self.assertEqual(rows[1]["data.nota"], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(rows[1]["data.otra"], "'-2+3")
+        self.assertEqual(rows[1]["data.ok"], "Neiva")
+
+
+@override_settings(CASE_CODE_BLOCK_SIZE=5)
+class CaseCodeTests(TestCase):
+    CODE_RE = re.compile(r"^(CAP|PRO)-\d{4}-\d{6}$")
+
+    def setUp(self):
+        reset_blocks()
+        self.client = APIClient()
+        self.camp = User.objects.create_user(email="camp_code@test.com", password="pass12345", role="CAMPESINO")
+        self.otro = User.objects.create_user(email="otro_code@test.com", password="pass12345", role="CAMPESINO")
+        self.gestor = User.objects.create_user(email="gestor_code@test.com", password="pass12345", role="GESTOR")
+        self.client.force_authenticate(user=self.camp)
+
+    def make(self, status="REGISTRADA", request_type="CAPACITACION", **extra):
+        return Case.objects.create(
+            applicant_type="CAMPESINO", request_type=request_type, status=status, created_by=self.camp, **extra
+        )
+
+    def test_code_assigned_on_registration(self):
+        draft = self.make(status="BORRADOR")
+        self.assertEqual(draft.code, "")
+
+        draft.status = "REGISTRADA"
+        draft.save(update_fields=["status"])
+        draft.refresh_from_db()
+        self.assertRegex(draft.code, self.CODE_RE)
+        self.assertTrue(draft.code.startswith(f"CAP-{timezone.localdate().year}-"))
+        self.assertTrue(self.make(request_type="PROYECTO_PRODUCTIVO").code.startswith("PRO-"))
+
+    def test_blocks_never_overlap(self):
+        first = allocate("CAP", 2026, 3)
+        reset_blocks()  # otro proceso / reinicio: el resto del bloque se pierde
+        second = allocate("CAP", 2026, 12)
+
+        self.assertEqual(first, [1, 2, 3])
+        self.assertEqual(second, list(range(6, 18)))
+        self.assertEqual(CaseCodeSequence.objects.get(prefix="CAP", year=2026).next_value, 18)
+
+    def test_rolled_back_block_is_not_reused(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.assertEqual(allocate("CAP", 2026, 1), [1])
+            raise RuntimeError()
+        # la reserva se deshizo: el bloque no quedó en memoria para repartir 2..5
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(allocate("CAP", 2026, 1), [1])
+        self.assertEqual(allocate("CAP", 2026, 2), [2, 3])
+        self.assertEqual(CaseCodeSequence.objects.get(prefix="CAP", year=2026).next_value, 6)
+
+    def test_sync_and_bulk_transition_assign_unique_codes(self):
+        items = [
+            {"uuid_externo": str(uuid.uuid4()), "applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": CAP_DATA}
+            for _ in range(12)
+        ]
+        r = self.client.post("/api/sync/solicitudes/", data={"submit": True, "solicitudes": items}, format="json")
+        self.assertEqual(r.status_code, 200)
+
+        drafts = [self.make(status="BORRADOR", data=CAP_DATA) for _ in range(7)]
+        self.client.force_authenticate(user=self.gestor)
+        r = self.client.post(
+            "/api/solicitudes/transiciones/",
+            data={"ids": [c.id for c in drafts], "from_status": "BORRADOR", "to_status": "REGISTRADA"},
+            format="json",
+        )
+        self.assertEqual(len(r.json()["transitioned"]), 7)
+
+        codes = list(Case.objects.values_list("code", flat=True))
+        self.assertEqual(len(codes), 19)
+        self.assertEqual(len(set(codes)), 19)
+        self.assertTrue(all(self.CODE_RE.match(c) for c in codes))
+
+    def test_code_is_unique(self):
+        case = self.make()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Case.objects.create(
+                applicant_type="CAMPESINO", request_type="CAPACITACION", status="REGISTRADA",
+                created_by=self.camp, code=case.code,
+            )
+        # los borradores comparten code="" sin chocar
+        self.make(status="BORRADOR")
+        self.make(status="BORRADOR")
+
+    def test_lookup_by_code(self):
+        case = self.make()
+
+        r = self.client.get(f"/api/solicitudes/por-codigo/{case.code.lower()}/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["id"], case.id)
+
+        self.client.force_authenticate(user=self.otro)
+        self.assertEqual(self.client.get(f"/api/solicitudes/por-codigo/{case.code}/").status_code, 404)
+
+        self.client.force_authenticate(user=self.gestor)
+        self.assertEqual(self.client.get(f"/api/solicitudes/por-codigo/{case.code}/").status_code, 200)
+        self.assertEqual(self.client.get("/api/solicitudes/por-codigo/CAP-1999-000001/").status_code, 404)
+
+
+class CaseSchemaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="schema@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+
+    def item(self, data, request_type="CAPACITACION", **extra):
+        return {"uuid_externo": str(uuid.uuid4()), "applicant_type": "CAMPESINO",
+                "request_type": request_type, "data": data, **extra}
+
+    def test_create_checks_types(self):
+        r = self.client.post(
+            "/api/solicitudes/",
+            data={"applicant_type": "CAMPESINO", "request_type": "PROYECTO_PRODUCTIVO", "status": "REGISTRADA",
+                  "data": {**PRO_DATA, "monto_estimado": "mucho"}},
+            format="json",
+        )
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()["data"], ["monto_estimado: debe ser un monto numérico."])
+
+        # mismo formato de siempre: un solo mensaje en la lista de `data`
+        r = self.client.post(
+            "/api/solicitudes/",
+            data={"applicant_type": "CAMPESINO", "request_type": "PROYECTO_PRODUCTIVO", "status": "REGISTRADA",
+                  "data": {"municipio": "Neiva", "monto_estimado": "mucho"}},
+            format="json",
+        )
+        self.assertEqual(
+            r.json()["data"],
+            ["Faltan campos obligatorios para enviar como REGISTRADA: actividad_productiva, descripcion_idea; "
+             "monto_estimado: debe ser un monto numérico."],
+        )
+
+    def test_sync_batch_reports_errors_per_item(self):
+        items = [self.item(CAP_DATA), self.item({"municipio": "Neiva"}), self.item({}, status="BORRADOR")]
+        # sin submit todo queda en BORRADOR: no se exige nada
+        r = self.client.post("/api/sync/solicitudes/", data={"solicitudes": items}, format="json")
+        self.assertEqual(r.status_code, 200)
+
+        r = self.client.post("/api/sync/solicitudes/", data={"submit": True, "solicitudes": items}, format="json")
+        self.assertEqual(r.status_code, 400)
+        errors = r.json()["solicitudes"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("tema_capacitacion", errors[1]["data"][0])
+        self.assertIn("municipio", errors[2]["data"][0])
+        self.assertFalse(Case.objects.filter(status="REGISTRADA").exists())
+
+    def test_ndjson_rejects_invalid_registrations(self):
+        body = "\n".join(json.dumps(i) for i in [self.item(CAP_DATA), self.item({"municipio": "Neiva"})])
+        r = self.client.post("/api/sync/solicitudes/?submit=true", data=body, content_type="application/x-ndjson")
+        out = {line["linea"]: line for line in map(json.loads, b"".join(r.streaming_content).decode().splitlines()) if "linea" in line}
+
+        self.assertEqual(out[1]["status"], "created")
+        self.assertEqual(out[2]["status"], "error")
+        self.assertIn("data", out[2]["errors"])
+        self.assertEqual(Case.objects.count(), 1)
+
+    def test_validating_10k_items_is_one_pass(self):
+        items = [
+            self.item(CAP_DATA if i % 3 else {"municipio": "Neiva"})
+            if i % 2 else self.item({**PRO_DATA, "monto_estimado": "$ 1.500.000"}, request_type="PROYECTO_PRODUCTIVO")
+            for i in range(10_000)
+        ]
+        # esquemas compilados al importar: el lote no recompila ni toca la BD
+        with patch("cases.schemas.compile_schema") as compile_schema, self.assertNumQueries(0):
+            errors = validate_batch(items, submit_all=True)
+
+        compile_schema.assert_not_called()
+        self.assertEqual(len(errors), 10_000)
+        self.assertTrue(any(errors) and not all(errors))
+
+
 class CrearSolicitudCampesinoTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -128,6 +944,604 @@ class DocumentosTests(TestCase):
         self.assertEqual(len(r2.json()), 1)
 
 
+class SignedUploadTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_ctx = override_settings(DOCUMENT_STORAGE="local", DOCUMENT_LOCAL_ROOT=self.root)
+        settings_ctx.enable()
+        self.addCleanup(settings_ctx.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="firmar@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+
+    def firmar(self, **extra):
+        payload = {"case_id": self.case.id, "original_name": "cedula.pdf", "mime_type": "application/pdf", **extra}
+        return self.client.post("/api/documentos/firmar/", data=payload, format="json")
+
+    def subir(self, upload, content=b"%PDF-1.4 hola"):
+        # cliente sin JWT: como la app hablando directo con el almacenamiento
+        f = SimpleUploadedFile("cedula.pdf", content, content_type="application/pdf")
+        return APIClient().post(upload["url"], data={**upload["fields"], "file": f}, format="multipart")
+
+    def test_sign_upload_confirm_flow(self):
+        r = self.firmar(category="IDENTIDAD")
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertTrue(body["upload"]["url"].startswith("http://testserver/api/documentos/local/subir/"))
+        self.assertTrue(body["upload"]["public_id"].startswith(f"campesena/cases/{self.case.id}/"))
+
+        up = self.subir(body["upload"])
+        self.assertEqual(up.status_code, 201)
+
+        r2 = self.client.post(
+            "/api/documentos/confirmar/", data={"ticket": body["ticket"], "result": up.json()}, format="json"
+        )
+        self.assertEqual(r2.status_code, 201)
+        doc = CaseDocument.objects.get(case=self.case)
+        self.assertEqual(
+            (doc.category, doc.original_name, doc.size_bytes, doc.public_id),
+            ("IDENTIDAD", "cedula.pdf", 13, body["upload"]["public_id"]),
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.root, doc.public_id)))
+
+        # confirmar otra vez el mismo ticket no duplica
+        r3 = self.client.post(
+            "/api/documentos/confirmar/", data={"ticket": body["ticket"], "result": up.json()}, format="json"
+        )
+        self.assertEqual((r3.status_code, r3.json()["id"]), (200, doc.id))
+        self.assertEqual(self.case.documents.count(), 1)
+
+        # el token de subida no se puede reutilizar
+        self.assertEqual(self.subir(body["upload"]).status_code, 400)
+
+    def test_confirm_rejects_forged_result_and_foreign_ticket(self):
+        body = self.firmar().json()
+        up = self.subir(body["upload"]).json()
+
+        otro = User.objects.create_user(email="otro_firmar@test.com", password="pass12345", role="CAMPESINO")
+        client = APIClient()
+        client.force_authenticate(user=otro)
+        r2 = client.post("/api/documentos/confirmar/", data={"ticket": body["ticket"], "result": up}, format="json")
+        self.assertEqual(r2.status_code, 400)
+
+        r3 = self.client.post("/api/documentos/confirmar/", data={"ticket": "basura", "result": up}, format="json")
+        self.assertEqual(r3.status_code, 400)
+
+        # respuesta falsificada: se rechaza y el archivo subido se borra
+        forged = {**up, "bytes": 1, "signature": "falsa"}
+        r = self.client.post("/api/documentos/confirmar/", data={"ticket": body["ticket"], "result": forged}, format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertFalse(os.path.exists(os.path.join(self.root, body["upload"]["public_id"])))
+        self.assertFalse(CaseDocument.objects.exists())
+
+    def test_sign_checks_permission_and_size(self):
+        otro = User.objects.create_user(email="ajeno_firmar@test.com", password="pass12345", role="CAMPESINO")
+        client = APIClient()
+        client.force_authenticate(user=otro)
+        r = client.post(
+            "/api/documentos/firmar/", data={"case_id": self.case.id, "original_name": "x.pdf"}, format="json"
+        )
+        self.assertEqual(r.status_code, 403)
+
+        r2 = self.firmar(size_bytes=50 * 1024 * 1024)
+        self.assertEqual(r2.status_code, 400)
+
+    @override_settings(DOCUMENT_STORAGE="cloudinary")
+    def test_cloudinary_signature_and_metadata_are_verified(self):
+        import cloudinary
+        import cloudinary.utils
+
+        config = cloudinary.config()
+        with patch.object(config, "cloud_name", "demo", create=True), \
+                patch.object(config, "api_key", "123", create=True), \
+                patch.object(config, "api_secret", "secreto", create=True), \
+                patch("cloudinary.api.resource") as resource, \
+                patch("cloudinary.uploader.destroy", return_value={"result": "ok"}) as destroy:
+            body = self.firmar().json()
+            self.assertEqual(body["upload"]["url"], "https://api.cloudinary.com/v1_1/demo/auto/upload")
+            public_id = body["upload"]["public_id"]
+
+            def confirmar(**result):
+                return self.client.post(
+                    "/api/documentos/confirmar/", data={"ticket": body["ticket"], "result": result}, format="json"
+                )
+
+            result = {"public_id": public_id, "version": 1712, "resource_type": "raw", "bytes": 1}
+            self.assertEqual(confirmar(**result, signature="0" * 40).status_code, 400)
+            self.assertEqual(destroy.call_args.args, (public_id,))
+            resource.assert_not_called()
+
+            signature = cloudinary.utils.api_sign_request(
+                {"public_id": public_id, "version": 1712}, "secreto", signature_version=1
+            )
+            # el tamaño real viene del Admin API, no de `bytes` del cliente
+            resource.return_value = {"secure_url": "https://res.cloudinary.com/demo/raw/upload/x", "bytes": 50 * 1024 * 1024}
+            destroy.reset_mock()
+            self.assertEqual(confirmar(**result, signature=signature).status_code, 400)
+            destroy.assert_called_once()
+
+            resource.return_value = {"secure_url": f"https://res.cloudinary.com/demo/raw/upload/v1712/{public_id}", "bytes": 2048}
+            r = confirmar(**result, signature=signature)
+            self.assertEqual(r.status_code, 201)
+            self.assertEqual(r.json()["file_url"], f"https://res.cloudinary.com/demo/raw/upload/v1712/{public_id}")
+            self.assertEqual(r.json()["size_bytes"], 2048)
+            self.assertEqual(resource.call_args.kwargs["resource_type"], "raw")
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_ctx = override_settings(
+            DOCUMENT_STORAGE="local",
+            DOCUMENT_LOCAL_ROOT=os.path.join(self.root, "documentos"),
+            DOCUMENT_SPOOL_DIR=os.path.join(self.root, "spool"),
+            DOCUMENT_UPLOAD_CHUNK_SIZE=3,
+        )
+        settings_ctx.enable()
+        self.addCleanup(settings_ctx.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="reanudable@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+        self.content = b"0123456789abcdef"
+
+    def crear(self, **extra):
+        payload = {"case_id": self.case.id, "original_name": "cedula.pdf", "length": len(self.content), **extra}
+        r = self.client.post("/api/documentos/reanudable/", data=payload, format="json")
+        self.assertEqual(r.status_code, 201)
+        return r["Location"]
+
+    def patch(self, url, offset, chunk, client=None):
+        return (client or self.client).generic(
+            "PATCH", url, chunk, content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_resume_after_interrupted_patch(self):
+        url = self.crear()
+        self.assertEqual(self.patch(url, 0, self.content[:7]).status_code, 204)
+
+        # corte a mitad del segundo PATCH: quedaron bytes en disco que nunca se confirmaron
+        session = UploadSession.objects.get()
+        with open(part_path(session), "ab") as part:
+            part.write(b"basura")
+
+        head = self.client.head(url)
+        self.assertEqual((head.status_code, head["Upload-Offset"]), (200, "7"))
+        self.assertEqual(self.patch(url, 3, self.content[3:]).status_code, 409)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.patch(url, 7, self.content[7:])
+        self.assertEqual(r.status_code, 200)
+        doc = CaseDocument.objects.get(case=self.case)
+        self.assertEqual(r.json()["document"]["id"], doc.id)
+        self.assertEqual((doc.size_bytes, doc.original_name), (len(self.content), "cedula.pdf"))
+        with open(os.path.join(self.root, "documentos", doc.public_id), "rb") as fh:
+            self.assertEqual(fh.read(), self.content)
+        self.assertFalse(os.path.exists(part_path(session)))
+
+        # PATCH repetido sobre una sesión completa no crea otro documento
+        self.assertEqual(self.patch(url, len(self.content), b"").status_code, 200)
+        self.assertEqual(self.case.documents.count(), 1)
+
+    def test_lost_race_deletes_uploaded_copy(self):
+        url = self.crear()
+        self.assertEqual(self.patch(url, 0, self.content[:7]).status_code, 204)
+
+        real_upload = LocalStorage.upload
+        uploaded = []
+
+        def upload_while_other_finishes(storage, file, folder):
+            # otra request completa la sesión mientras esta sube al almacenamiento
+            winner = CaseDocument.objects.create(
+                case=self.case, category="OTRO", original_name="cedula.pdf", uploaded_by=self.user
+            )
+            UploadSession.objects.update(document=winner)
+            stored = real_upload(storage, file, folder)
+            uploaded.append(stored["public_id"])
+            return stored
+
+        with patch.object(LocalStorage, "upload", upload_while_other_finishes):
+            r = self.patch(url, 7, self.content[7:])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["document"]["id"], UploadSession.objects.get().document_id)
+        self.assertEqual(self.case.documents.count(), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "documentos", uploaded[0])))
+
+    def test_patch_holds_a_lease_instead_of_the_row_lock(self):
+        url = self.crear()
+        # otro PATCH escribiendo: este espera su turno
+        UploadSession.objects.update(patch_lease=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(self.patch(url, 0, self.content[:4]).status_code, 409)
+
+        # lease vencido (proceso muerto a mitad): se puede retomar
+        UploadSession.objects.update(patch_lease=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.patch(url, 0, self.content[:4]).status_code, 204)
+        session = UploadSession.objects.get()
+        self.assertEqual((session.offset, session.patch_lease), (4, None))
+
+        # la sesión cambió mientras se escribía: el offset nuevo no se guarda
+        real_append = append
+
+        def append_while_offset_moves(session, stream, offset):
+            UploadSession.objects.update(offset=8)
+            return real_append(session, stream, offset)
+
+        with patch("cases.views_uploads.append", append_while_offset_moves):
+            r = self.patch(url, 4, self.content[4:8])
+        self.assertEqual((r.status_code, r["Upload-Offset"]), (409, "8"))
+
+    def test_rejects_excess_bytes_and_foreign_user(self):
+        url = self.crear()
+        r = self.patch(url, 0, self.content + b"extra")
+        self.assertEqual((r.status_code, r["Upload-Offset"]), (400, "0"))
+
+        otro = User.objects.create_user(email="otro_reanudable@test.com", password="pass12345", role="CAMPESINO")
+        client = APIClient()
+        client.force_authenticate(user=otro)
+        self.assertEqual(self.patch(url, 0, self.content, client=client).status_code, 404)
+        self.assertEqual(client.head(url).status_code, 404)
+
+        too_big = self.client.post(
+            "/api/documentos/reanudable/",
+            data={"case_id": self.case.id, "original_name": "x.pdf", "length": 50 * 1024 * 1024},
+            format="json",
+        )
+        self.assertEqual(too_big.status_code, 400)
+
+    def test_expired_sessions_are_cleaned_up(self):
+        url = self.crear()
+        self.patch(url, 0, self.content[:4])
+        session = UploadSession.objects.get()
+        UploadSession.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.patch(url, 4, self.content[4:]).status_code, 410)
+
+        out = StringIO()
+        call_command("cleanup_upload_sessions", stdout=out)
+        self.assertIn("1 sesiones vencidas", out.getvalue())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(part_path(session)))
+        self.assertFalse(CaseDocument.objects.exists())
+
+
+class DocumentQueueTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_ctx = override_settings(
+            DOCUMENT_STORAGE="local",
+            DOCUMENT_LOCAL_ROOT=os.path.join(self.root, "documentos"),
+            DOCUMENT_SPOOL_DIR=os.path.join(self.root, "spool"),
+            DOCUMENT_UPLOAD_MODE="queue",
+        )
+        settings_ctx.enable()
+        self.addCleanup(settings_ctx.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="cola@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+
+    def subir(self, **headers):
+        f = SimpleUploadedFile("cedula.pdf", b"%PDF cola", content_type="application/pdf")
+        return self.client.post(
+            "/api/documentos/subir/", data={"case_id": self.case.id, "file": f}, format="multipart", **headers
+        )
+
+    def procesar(self):
+        out = StringIO()
+        call_command("process_document_queue", "--once", "--workers", "1", stdout=out)
+        return out.getvalue()
+
+    def test_queued_upload_is_offloaded_by_worker(self):
+        r = self.subir()
+        self.assertEqual((r.status_code, r.json()["status"], r.json()["file_url"]), (202, "PENDING", ""))
+        doc = CaseDocument.objects.get()
+        spooled = os.path.join(self.root, "spool", doc.spool_path)
+        self.assertTrue(os.path.exists(spooled))
+
+        listing = self.client.get(f"/api/documentos/?case_id={self.case.id}&status=PENDING")
+        self.assertEqual([d["id"] for d in listing.json()], [doc.id])
+
+        self.assertIn("READY=1", self.procesar())
+        doc.refresh_from_db()
+        self.assertEqual((doc.status, doc.spool_path, doc.size_bytes), ("READY", "", 9))
+        self.assertTrue(doc.file_url.startswith("http://localhost:8000/media/documentos/campesena/cases/"))
+        self.assertFalse(os.path.exists(spooled))
+
+        listing = self.client.get(f"/api/documentos/?case_id={self.case.id}")
+        self.assertEqual(listing.json()[0]["status"], "READY")
+        self.assertEqual(self.client.get(f"/api/documentos/?case_id={self.case.id}&status=X").status_code, 400)
+
+    def test_failures_back_off_then_fail(self):
+        self.subir()
+        with patch("cases.storage.LocalStorage.upload", side_effect=OSError("sin red")):
+            self.procesar()
+            doc = CaseDocument.objects.get()
+            self.assertEqual((doc.status, doc.attempts), ("PENDING", 1))
+            self.assertIn("sin red", doc.last_error)
+            self.assertGreater(doc.next_attempt_at, timezone.now())
+
+            # todavía no le toca: --once no lo reintenta
+            self.assertIn("nada pendiente", self.procesar())
+
+            CaseDocument.objects.update(attempts=7, next_attempt_at=timezone.now())
+            self.procesar()
+            doc.refresh_from_db()
+            self.assertEqual((doc.status, doc.attempts, doc.next_attempt_at), ("FAILED", 8, None))
+
+    def test_failed_documents_can_be_retried(self):
+        self.subir()
+        doc = CaseDocument.objects.get()
+        spooled = os.path.join(self.root, "spool", doc.spool_path)
+        CaseDocument.objects.update(status="FAILED", attempts=8, next_attempt_at=None)
+
+        out = StringIO()
+        call_command("process_document_queue", "--once", "--workers", "1", "--retry-failed", stdout=out)
+        self.assertIn("Reencolados: 1", out.getvalue())
+        self.assertIn("READY=1", out.getvalue())
+        self.assertFalse(os.path.exists(spooled))
+
+    def test_failed_spool_is_purged_after_retention(self):
+        self.subir()
+        doc = CaseDocument.objects.get()
+        spooled = os.path.join(self.root, "spool", doc.spool_path)
+        CaseDocument.objects.update(status="FAILED", next_attempt_at=None)
+
+        # todavía dentro de la retención: se conserva
+        self.assertEqual(purge_failed(), 0)
+        CaseDocument.objects.filter(pk=doc.pk).update(updated_at=timezone.now() - timedelta(days=8))
+        out = StringIO()
+        call_command("process_document_queue", "--once", "--workers", "1", "--purge-failed", stdout=out)
+        self.assertIn("Spool purgado: 1", out.getvalue())
+        doc.refresh_from_db()
+        self.assertEqual((doc.status, doc.spool_path), ("FAILED", ""))
+        self.assertFalse(os.path.exists(spooled))
+        # sin archivo no hay nada que reencolar
+        self.assertEqual(retry_failed(), 0)
+
+    def test_claim_leases_rows(self):
+        self.subir()
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    def test_process_drops_result_when_lease_is_lost(self):
+        self.subir()
+        self.subir()
+        first, second = claim(10)
+        real_upload = LocalStorage.upload
+        uploaded = []
+
+        def slow_upload(storage, file, folder):
+            # mientras sube, el lease vence y otro worker lo toma / la fila se borra
+            CaseDocument.objects.filter(pk=first.pk).update(next_attempt_at=timezone.now())
+            CaseDocument.objects.filter(pk=second.pk).delete()
+            stored = real_upload(storage, file, folder)
+            uploaded.append(stored["public_id"])
+            return stored
+
+        with patch.object(LocalStorage, "upload", slow_upload):
+            self.assertEqual(process(first), LOST)
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.file_url), ("PENDING", ""))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "spool", first.spool_path)))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "documentos", uploaded[0])))
+
+        with patch.object(LocalStorage, "upload", real_upload):
+            self.assertEqual(process(second), LOST)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "spool", second.spool_path)))
+
+    @override_settings(SYNC_PULL_LAG_SECONDS=0)
+    def test_ready_changes_etag_and_reappears_in_pull(self):
+        self.subir()
+        doc = CaseDocument.objects.get()
+        url = f"/api/documentos/?case_id={self.case.id}"
+        etag = self.client.get(url)["ETag"]
+        cursor = self.client.get("/api/sync/solicitudes/").json()["cursor"]
+
+        self.procesar()
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((r.status_code, r.json()[0]["status"]), (200, "READY"))
+
+        pull = self.client.get(f"/api/sync/solicitudes/?since={cursor}").json()
+        self.assertEqual([(d["id"], d["status"]) for d in pull["documentos"]], [(doc.id, "READY")])
+        again = self.client.get(f"/api/sync/solicitudes/?since={pull['cursor']}").json()
+        self.assertEqual(again["documentos"], [])
+
+    def test_resumable_upload_is_spooled_on_commit(self):
+        content = b"%PDF reanudable"
+        r = self.client.post(
+            "/api/documentos/reanudable/",
+            data={"case_id": self.case.id, "original_name": "cedula.pdf", "length": len(content)},
+            format="json",
+        )
+        url = r["Location"]
+        session = UploadSession.objects.get()
+        patch_kwargs = {"content_type": "application/offset+octet-stream", "HTTP_UPLOAD_OFFSET": "0"}
+
+        # la transacción que encola se deshace: la parte no se movió y el PATCH se puede reintentar
+        with patch("cases.uploads.UploadSession") as sessions:
+            sessions.objects.filter.return_value.update.return_value = 0
+            self.assertEqual(self.client.generic("PATCH", url, content, **patch_kwargs).status_code, 409)
+        self.assertFalse(CaseDocument.objects.exists())
+        self.assertTrue(os.path.exists(part_path(session)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.client.generic("PATCH", url, b"", **{**patch_kwargs, "HTTP_UPLOAD_OFFSET": str(len(content))})
+        self.assertEqual((r.status_code, r.json()["document"]["status"]), (200, "PENDING"))
+        doc = CaseDocument.objects.get()
+        with open(os.path.join(self.root, "spool", doc.spool_path), "rb") as fh:
+            self.assertEqual(fh.read(), content)
+        self.assertFalse(os.path.exists(part_path(session)))
+
+    @override_settings(DOCUMENT_UPLOAD_MODE="sync")
+    def test_prefer_respond_async_in_sync_mode(self):
+        self.assertEqual(self.subir(HTTP_PREFER="respond-async").status_code, 202)
+        self.assertEqual(self.subir().status_code, 201)
+        self.assertEqual(
+            sorted(CaseDocument.objects.values_list("status", flat=True)), ["PENDING", "READY"]
+        )
+
+
+class DocumentDedupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_ctx = override_settings(
+            DOCUMENT_STORAGE="local",
+            DOCUMENT_LOCAL_ROOT=os.path.join(self.root, "documentos"),
+            DOCUMENT_SPOOL_DIR=os.path.join(self.root, "spool"),
+        )
+        settings_ctx.enable()
+        self.addCleanup(settings_ctx.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="dedup@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+        self.cases = [
+            Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+            for _ in range(3)
+        ]
+        self.content = b"cedula escaneada" * 100
+
+    def subir(self, case, client=None):
+        f = SimpleUploadedFile("cedula.jpg", self.content, content_type="image/jpeg")
+        return (client or self.client).post(
+            "/api/documentos/subir/", data={"case_id": case.id, "file": f}, format="multipart"
+        )
+
+    def stored_files(self):
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.root, "documentos")))
+
+    def test_same_owner_reuses_stored_object(self):
+        r1, r2 = self.subir(self.cases[0]), self.subir(self.cases[1])
+        self.assertEqual((r1.status_code, r2.status_code), (201, 201))
+        self.assertEqual(r1.json()["public_id"], r2.json()["public_id"])
+        self.assertNotEqual(r1.json()["id"], r2.json()["id"])
+        self.assertEqual(self.stored_files(), 1)
+
+        doc = CaseDocument.objects.get(id=r2.json()["id"])
+        self.assertEqual(doc.sha256, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(doc.case_id, self.cases[1].id)
+        self.assertEqual(metrics.get(DEDUP_BYTES_SAVED), len(self.content))
+
+        # la subida reanudable también deduplica
+        r = self.client.post(
+            "/api/documentos/reanudable/",
+            data={"case_id": self.cases[2].id, "original_name": "otra.jpg", "length": len(self.content)},
+            format="json",
+        )
+        r3 = self.client.generic(
+            "PATCH", r["Location"], self.content, content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET="0"
+        )
+        self.assertEqual(r3.json()["document"]["public_id"], r1.json()["public_id"])
+        self.assertEqual(self.stored_files(), 1)
+        self.assertEqual(metrics.get(DEDUP_BYTES_SAVED), 2 * len(self.content))
+
+    def test_hash_falls_back_to_reading_the_file(self):
+        # handler instalado tarde (multipart ya parseado): no vio los bloques
+        with patch("cases.hashing.Sha256UploadHandler.file_complete", return_value=None):
+            r = self.subir(self.cases[0])
+        self.assertEqual(r.status_code, 201)
+        doc = CaseDocument.objects.get(id=r.json()["id"])
+        self.assertEqual(doc.sha256, hashlib.sha256(self.content).hexdigest())
+        with open(os.path.join(self.root, "documentos", doc.public_id), "rb") as fh:
+            self.assertEqual(fh.read(), self.content)
+
+    def test_other_owner_uploads_again(self):
+        otro = User.objects.create_user(email="dedup_otro@test.com", password="pass12345", role="CAMPESINO")
+        case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=otro)
+        client = APIClient()
+        client.force_authenticate(user=otro)
+
+        r1, r2 = self.subir(self.cases[0]), self.subir(case, client=client)
+        self.assertNotEqual(r1.json()["public_id"], r2.json()["public_id"])
+        self.assertEqual(self.stored_files(), 2)
+        self.assertEqual(metrics.get(DEDUP_BYTES_SAVED), 0)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="idem@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+
+    @patch("cloudinary.uploader.upload")
+    def test_document_retry_is_replayed_without_reupload(self, mock_upload):
+        mock_upload.return_value = {"secure_url": "https://example.com/f.pdf", "public_id": "campesena/f"}
+
+        def subir():
+            f = SimpleUploadedFile("f.txt", b"hola", content_type="text/plain")
+            return self.client.post(
+                "/api/documentos/subir/",
+                data={"case_id": self.case.id, "file": f},
+                format="multipart",
+                HTTP_IDEMPOTENCY_KEY="doc-1",
+            )
+
+        r1, r2 = subir(), subir()
+        self.assertEqual((r1.status_code, r2.status_code), (201, 201))
+        self.assertEqual(r1.json(), r2.json())
+        self.assertEqual(r2["Idempotent-Replayed"], "true")
+        self.assertEqual(mock_upload.call_count, 1)
+        self.assertEqual(self.case.documents.count(), 1)
+
+    def test_create_retry_and_key_isolation(self):
+        payload = {"applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": {}}
+
+        r1 = self.client.post("/api/solicitudes/", data=payload, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        r2 = self.client.post("/api/solicitudes/", data=payload, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(r1.json()["id"], r2.json()["id"])
+
+        r3 = self.client.post("/api/solicitudes/", data=payload, format="json", HTTP_IDEMPOTENCY_KEY="k2")
+        self.assertNotEqual(r1.json()["id"], r3.json()["id"])
+        self.assertEqual(Case.objects.filter(created_by=self.user).count(), 3)
+
+    def test_key_reused_with_other_body_is_rejected(self):
+        payload = {"applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": {}}
+        r1 = self.client.post("/api/solicitudes/", data=payload, format="json", HTTP_IDEMPOTENCY_KEY="k-body")
+        self.assertEqual(r1.status_code, 201)
+
+        other = {**payload, "request_type": "PROYECTO_PRODUCTIVO"}
+        r2 = self.client.post("/api/solicitudes/", data=other, format="json", HTTP_IDEMPOTENCY_KEY="k-body")
+        self.assertEqual(r2.status_code, 422)
+        self.assertEqual(Case.objects.filter(created_by=self.user).count(), 2)
+
+    def test_expired_lock_taken_by_other_request_is_not_released(self):
+        from cases.idempotency import _release
+
+        cache.set("idem:x:lock", "de-otra-request")
+        _release("idem:x:lock", "mio")
+        self.assertEqual(cache.get("idem:x:lock"), "de-otra-request")
+        _release("idem:x:lock", "de-otra-request")
+        self.assertIsNone(cache.get("idem:x:lock"))
+
+    def test_concurrent_duplicate_gets_conflict(self):
+        from cases.idempotency import _cache_key
+
+        class FakeRequest:
+            user = self.user
+            method = "POST"
+            path = "/api/solicitudes/"
+
+        cache.add(_cache_key(FakeRequest, "k-lock") + ":lock", 1)
+        r = self.client.post(
+            "/api/solicitudes/",
+            data={"applicant_type": "CAMPESINO", "request_type": "CAPACITACION"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="k-lock",
+        )
+        self.assertEqual(r.status_code, 409)
+
+
 class SyncOfflineTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -143,8 +1557,8 @@ class SyncOfflineTests(TestCase):
             data={
                 "submit": True,
                 "solicitudes": [
-                    {"uuid_externo": u1, "applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": {"a": 1}},
-                    {"uuid_externo": u2, "applicant_type": "CAMPESINO", "request_type": "PROYECTO_PRODUCTIVO", "data": {"b": 2}},
+                    {"uuid_externo": u1, "applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": CAP_DATA},
+                    {"uuid_externo": u2, "applicant_type": "CAMPESINO", "request_type": "PROYECTO_PRODUCTIVO", "data": PRO_DATA},
                 ],
             },
             format="json",
@@ -173,6 +1587,194 @@ class SyncOfflineTests(TestCase):
         # solo debe existir 1 case con ese uuid
         self.assertEqual(Case.objects.filter(external_uuid=u1).count(), 1)
 
+    def _sync_payload(self, n, uuids=None):
+        uuids = uuids or [str(uuid.uuid4()) for _ in range(n)]
+        return {
+            "solicitudes": [
+                {"uuid_externo": u, "applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": {"i": i}}
+                for i, u in enumerate(uuids)
+            ]
+        }
+
+    def test_sync_query_count_is_constant(self):
+        # calentar (ContentTypes, etc.)
+        self.client.post("/api/sync/solicitudes/", data=self._sync_payload(1), format="json")
+
+        # + 1 UPDATE por grupo del resumen (aquí un solo grupo)
+        # + savepoint, lock de los cases y 2 SELECT (cabezas de la cadena de auditoría) del writer
+        with self.assertNumQueries(12):
+            r = self.client.post("/api/sync/solicitudes/", data=self._sync_payload(3), format="json")
+        self.assertEqual(r.json()["created"], 3)
+
+        with self.assertNumQueries(12):
+            r = self.client.post("/api/sync/solicitudes/", data=self._sync_payload(50), format="json")
+        self.assertEqual(r.json()["created"], 50)
+
+    def test_sync_update_query_count_is_constant(self):
+        uuids = [str(uuid.uuid4()) for _ in range(20)]
+        self.client.post("/api/sync/solicitudes/", data=self._sync_payload(20, uuids), format="json")
+
+        def update(n):
+            with CaptureQueriesContext(connection) as ctx:
+                r = self.client.post("/api/sync/solicitudes/", data=self._sync_payload(n, uuids[:n]), format="json")
+            self.assertEqual(r.json()["updated"], n)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(update(2), update(20))
+
+    def test_sync_mixed_batch_counts(self):
+        existing = [str(uuid.uuid4()) for _ in range(3)]
+        self.client.post("/api/sync/solicitudes/", data=self._sync_payload(3, existing), format="json")
+
+        other = User.objects.create_user(email="otro@test.com", password="pass12345", role="CAMPESINO")
+        foreign = Case.objects.create(
+            applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=other, external_uuid=uuid.uuid4()
+        )
+
+        nuevos = [str(uuid.uuid4()) for _ in range(2)]
+        payload = self._sync_payload(0, existing + nuevos + [str(foreign.external_uuid)])
+        r = self.client.post("/api/sync/solicitudes/", data=payload, format="json")
+        self.assertEqual(r.status_code, 200)
+
+        body = r.json()
+        self.assertEqual(body["created"], 2)
+        self.assertEqual(body["updated"], 3)
+        self.assertNotIn(str(foreign.external_uuid), body["mapping"])
+        self.assertEqual(Case.objects.filter(created_by=self.user).count(), 5)
+
+
+class SyncNdjsonTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="ndjson@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+
+    def post_ndjson(self, lines, query=""):
+        body = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+        r = self.client.post(f"/api/sync/solicitudes/{query}", data=body, content_type="application/x-ndjson")
+        self.assertEqual(r.status_code, 200)
+        return [json.loads(line) for line in b"".join(r.streaming_content).decode().splitlines()]
+
+    def item(self, u=None):
+        return {"uuid_externo": u or str(uuid.uuid4()), "applicant_type": "CAMPESINO", "request_type": "CAPACITACION", "data": CAP_DATA}
+
+    @override_settings(SYNC_CHUNK_SIZE=2)
+    def test_streams_per_item_results_in_chunks(self):
+        items = [self.item() for _ in range(5)]
+        out = self.post_ndjson(items)
+
+        results, resumen = out[:-1], out[-1]["resumen"]
+        self.assertEqual([r["uuid_externo"] for r in results], [i["uuid_externo"] for i in items])
+        self.assertTrue(all(r["status"] == "created" and r["id"] for r in results))
+        self.assertEqual(resumen["created"], 5)
+        self.assertEqual(Case.objects.filter(created_by=self.user).count(), 5)
+
+    def test_bad_lines_do_not_discard_the_batch(self):
+        good = self.item()
+        out = self.post_ndjson([good, "{no es json", {"uuid_externo": "x"}])
+
+        # los errores de validación salen de inmediato; los válidos al cerrar el bloque
+        by_line = {r["linea"]: r["status"] for r in out[:-1]}
+        self.assertEqual(by_line, {1: "created", 2: "error", 3: "error"})
+        self.assertEqual(out[-1]["resumen"]["error"], 2)
+        self.assertTrue(Case.objects.filter(external_uuid=good["uuid_externo"]).exists())
+
+    def test_non_object_data_is_an_item_error(self):
+        bad = {**self.item(), "data": "hola", "status": "REGISTRADA"}
+        out = self.post_ndjson([bad, self.item()])
+        self.assertEqual([(r["linea"], r["status"]) for r in out[:-1]], [(1, "error"), (2, "created")])
+        self.assertEqual(out[0]["errors"], {"data": ["debe ser un objeto."]})
+
+        # mismo error en el sync JSON, alineado por item
+        r = self.client.post("/api/sync/solicitudes/", data={"solicitudes": [bad, self.item()]}, format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()["solicitudes"], [{"data": ["debe ser un objeto."]}, {}])
+
+    def test_resend_is_idempotent(self):
+        items = [self.item() for _ in range(3)]
+        self.post_ndjson(items[:2])
+        out = self.post_ndjson(items, query="?submit=true")
+
+        self.assertEqual([r["status"] for r in out[:-1]], ["updated", "updated", "created"])
+        self.assertEqual(Case.objects.filter(created_by=self.user, status="REGISTRADA").count(), 3)
+
+
+@override_settings(SYNC_PULL_LAG_SECONDS=0)
+class SyncPullTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="pull@test.com", password="pass12345", role="CAMPESINO")
+        self.other = User.objects.create_user(email="pull2@test.com", password="pass12345", role="CAMPESINO")
+        self.client.force_authenticate(user=self.user)
+
+        self.case = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+        Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.other)
+
+    def pull(self, since=None):
+        url = "/api/sync/solicitudes/" + (f"?since={since}" if since else "")
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def test_initial_pull_returns_only_own_scope(self):
+        body = self.pull()
+        self.assertEqual([c["id"] for c in body["solicitudes"]], [self.case.id])
+        self.assertFalse(body["has_more"])
+        self.assertTrue(body["cursor"])
+
+    def test_pull_since_cursor_returns_only_changes(self):
+        cursor = self.pull()["cursor"]
+
+        empty = self.pull(cursor)
+        self.assertEqual(empty["solicitudes"], [])
+        self.assertEqual(empty["eventos"], [])
+
+        # un GESTOR mueve el caso -> la app lo ve en el siguiente pull
+        self.case.status = "EN_AJUSTES"
+        self.case.save()
+        CaseEvent.objects.create(case=self.case, event_type="STATUS_CHANGED", from_status="REGISTRADA", to_status="EN_AJUSTES")
+
+        body = self.pull(empty["cursor"])
+        self.assertEqual([(c["id"], c["status"]) for c in body["solicitudes"]], [(self.case.id, "EN_AJUSTES")])
+        self.assertEqual([e["case"] for e in body["eventos"]], [self.case.id])
+
+        self.assertEqual(self.pull(body["cursor"])["solicitudes"], [])
+
+    @override_settings(SYNC_PULL_LIMIT=1)
+    def test_pull_pages_with_has_more(self):
+        second = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+
+        first_page = self.pull()
+        self.assertTrue(first_page["has_more"])
+        second_page = self.pull(first_page["cursor"])
+
+        ids = [c["id"] for c in first_page["solicitudes"] + second_page["solicitudes"]]
+        self.assertEqual(sorted(ids), sorted([self.case.id, second.id]))
+
+    @override_settings(SYNC_PULL_LAG_SECONDS=60)
+    def test_pull_holds_back_rows_newer_than_lag(self):
+        # un case tocado hace menos de SYNC_PULL_LAG_SECONDS no entra ni mueve el cursor
+        body = self.pull()
+        self.assertEqual(body["solicitudes"], [])
+
+        # otra transacción que confirma tarde con un updated_at anterior al cursor ya entregado
+        late = Case.objects.create(applicant_type="CAMPESINO", request_type="CAPACITACION", created_by=self.user)
+        Case.objects.filter(pk=self.case.pk).update(updated_at=timezone.now() - timedelta(seconds=120))
+        Case.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=90))
+
+        body = self.pull(body["cursor"])
+        self.assertEqual([c["id"] for c in body["solicitudes"]], [self.case.id, late.id])
+
+    def test_legacy_cursor_restarts_id_streams(self):
+        CaseEvent.objects.create(case=self.case, event_type="UPDATED")
+        legacy = encode_cursor({"c": None, "e": 10**9, "d": 10**9})
+        body = self.pull(legacy)
+        self.assertEqual([e["case"] for e in body["eventos"]], [self.case.id])
+
+    def test_invalid_cursor(self):
+        r = self.client.get("/api/sync/solicitudes/?since=basura")
+        self.assertEqual(r.status_code, 400)
+
 
 class TimelineEventosTests(TestCase):
     def setUp(self):
@@ -211,6 +1813,53 @@ class TimelineEventosTests(TestCase):
         events = r3.json()
         self.assertTrue(len(events) >= 2)
 
+    def make_events(self, n):
+        actors = [self.user] + [
+            User.objects.create_user(email=f"evt_{i}_{n}@test.com", password="pass12345", role="GESTOR", first_name="Ana")
+            for i in range(3)
+        ]
+        same_time = timezone.now()
+        CaseEvent.objects.bulk_create(
+            [
+                CaseEvent(case=self.case, event_type="UPDATED" if i % 2 else "STATUS_CHANGED",
+                          created_by=actors[i % len(actors)])
+                for i in range(n)
+            ]
+        )
+        # mismo created_at para todos: el desempate por id no debe saltar ni repetir
+        CaseEvent.objects.filter(case=self.case).update(created_at=same_time)
+        # bulk_create/update no disparan señales
+        case_cache.invalidate_cases([self.case.id])
+
+    def test_cursor_pagination_walks_all_events(self):
+        self.make_events(7)
+        url = f"/api/solicitudes/{self.case.id}/eventos/?cursor=&page_size=3"
+        seen = []
+        while url:
+            body = self.client.get(url).json()
+            seen += [e["id"] for e in body["results"]]
+            url = body["next"]
+
+        self.assertEqual(seen, sorted(CaseEvent.objects.filter(case=self.case).values_list("id", flat=True)))
+        self.assertEqual(self.client.get(f"/api/solicitudes/{self.case.id}/eventos/?cursor=basura").status_code, 404)
+
+    def test_event_type_filter_and_actor_in_constant_queries(self):
+        url = f"/api/solicitudes/{self.case.id}/eventos/?cursor=&event_type=UPDATED"
+
+        self.make_events(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+
+        self.make_events(12)
+        with CaptureQueriesContext(connection) as many:
+            body = self.client.get(url).json()
+
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+        self.assertEqual(len(body["results"]), 7)
+        self.assertEqual({e["event_type"] for e in body["results"]}, {"UPDATED"})
+        self.assertEqual(body["results"][0]["actor"]["first_name"], "Ana")
+        self.assertEqual(self.client.get(f"/api/solicitudes/{self.case.id}/eventos/?event_type=NOPE").status_code, 400)
+
 
 class LoginAuthTests(TestCase):
     def setUp(self):
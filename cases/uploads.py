@@ -0,0 +1,143 @@
+"""
+Subidas reanudables (estilo tus) sobre disco local.
+
+Cada UploadSession escribe en DOCUMENT_SPOOL_DIR/uploads/<id>.part. Los
+PATCH se copian a disco por bloques de DOCUMENT_UPLOAD_CHUNK_SIZE (memoria
+acotada sin importar el tamaño del archivo); cuando el offset llega a la
+longitud declarada, el archivo se entrega al backend de cases/storage.py.
+"""
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .hashing import file_sha256
+from .models import UploadSession
+from .offload import adopt, enqueue, new_spool_path, use_queue
+from .services_documents import create_document, find_duplicate, reuse_document
+from .storage import case_folder, get_storage
+
+
+class OffsetMismatch(Exception):
+    pass
+
+
+class LengthExceeded(Exception):
+    pass
+
+
+def spool_dir():
+    path = os.path.join(settings.DOCUMENT_SPOOL_DIR, "uploads")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def part_path(session):
+    return os.path.join(spool_dir(), f"{session.pk}.part")
+
+
+def new_expiry():
+    return timezone.now() + timedelta(seconds=settings.DOCUMENT_UPLOAD_SESSION_TTL)
+
+
+def append(session, stream, offset):
+    """
+    Copia `stream` al final de la parte. `offset` debe coincidir con lo ya
+    confirmado: si un PATCH anterior se cortó a mitad, lo escrito de más se
+    descarta (truncate) y el cliente reanuda desde session.offset.
+    Devuelve el nuevo offset (la sesión se guarda afuera).
+    """
+    if offset != session.offset:
+        raise OffsetMismatch()
+    if stream is None:  # PATCH sin cuerpo (DRF no expone stream con Content-Length 0)
+        return session.offset
+
+    remaining = session.length - session.offset
+    chunk_size = settings.DOCUMENT_UPLOAD_CHUNK_SIZE
+    mode = "r+b" if os.path.exists(part_path(session)) else "wb"
+    with open(part_path(session), mode) as part:
+        part.truncate(session.offset)
+        part.seek(session.offset)
+        written = 0
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if written + len(chunk) > remaining:
+                part.truncate(session.offset)
+                raise LengthExceeded()
+            part.write(chunk)
+            written += len(chunk)
+    return session.offset + written
+
+
+def record(session, build):
+    """
+    Crea el documento con build() y lo asocia a la sesión con un UPDATE
+    condicional (document IS NULL). Si otro PATCH ya la completó, o la
+    sesión se borró mientras se subía, no se asocia nada: se deshace lo
+    creado y devuelve None.
+    """
+    with transaction.atomic():
+        doc = build()
+        claimed = UploadSession.objects.filter(pk=session.pk, document__isnull=True).update(document=doc)
+        if not claimed:
+            transaction.set_rollback(True)
+            return None
+        # la parte se borra solo si el documento quedó registrado
+        transaction.on_commit(lambda: discard(session))
+    return doc
+
+
+def finish(session):
+    """
+    Entrega la parte completa al almacenamiento y registra el documento.
+    Corre sin lock de fila ni transacción abierta durante la subida; el
+    registro final es record(). Devuelve el documento, o None si otra
+    request se adelantó (o la parte ya no está).
+    """
+    path = part_path(session)
+    try:
+        # las partes llegan en requests distintas: el hash se calcula al final, sobre el disco local
+        sha256 = file_sha256(path)
+    except FileNotFoundError:
+        return None
+    meta = {"category": session.category, "original_name": session.original_name, "mime_type": session.mime_type}
+
+    original = find_duplicate(session.created_by, sha256)
+    if original is not None:
+        return record(session, lambda: reuse_document(original, session.case, session.created_by, **meta))
+
+    if use_queue():
+        spool_path = new_spool_path()
+
+        def build():
+            doc = enqueue(session.case, session.created_by, spool_path, session.length, sha256=sha256, **meta)
+            # la parte pasa tal cual al spool de la cola (mismo disco, sin copiar), solo tras el commit
+            transaction.on_commit(lambda: adopt(path, spool_path))
+            return doc
+
+        return record(session, build)
+
+    storage = get_storage()
+    try:
+        with open(path, "rb") as fh:
+            stored = storage.upload(File(fh, name=session.original_name), case_folder(session.case))
+    except FileNotFoundError:
+        return None
+    doc = record(session, lambda: create_document(session.case, session.created_by, stored, sha256=sha256, **meta))
+    if doc is None:
+        # perdimos la carrera: el objeto recién subido no lo referencia nadie
+        storage.delete(stored["public_id"])
+    return doc
+
+
+def discard(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
@@ -2,8 +2,19 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import CaseViewSet
-from .views_documents import DocumentUploadView, DocumentListView
+from .views_export import CaseExportView
+from .views_metrics import AdminMetricsView
+from .views_documents import (
+    DocumentConfirmView,
+    DocumentListView,
+    DocumentSignView,
+    DocumentUploadView,
+    LocalStorageUploadView,
+)
+from .views_summary import CaseSummaryView
 from .views_sync import SyncSolicitudesView
+from .views_transitions import CaseTransitionView
+from .views_uploads import UploadSessionCreateView, UploadSessionView
 
 
 router = DefaultRouter()
@@ -15,6 +26,7 @@ solicitudes_detail = CaseViewSet.as_view({"get": "retrieve", "patch": "partial_u
 
 # eventos/timeline con la ruta
 solicitudes_eventos = CaseViewSet.as_view({"get": "timeline"})
+solicitudes_por_codigo = CaseViewSet.as_view({"get": "by_code"})
 
 
 urlpatterns = [
@@ -22,6 +34,10 @@ urlpatterns = [
 
     # Solicitudes (alias)
     path("solicitudes/", solicitudes_list, name="solicitudes-list"),
+    path("solicitudes/export/", CaseExportView.as_view(), name="solicitudes-export"),
+    path("solicitudes/resumen/", CaseSummaryView.as_view(), name="solicitudes-resumen"),
+    path("solicitudes/transiciones/", CaseTransitionView.as_view(), name="solicitudes-transiciones"),
+    path("solicitudes/por-codigo/<str:code>/", solicitudes_por_codigo, name="solicitudes-por-codigo"),
     path("solicitudes/<int:pk>/", solicitudes_detail, name="solicitudes-detail"),
 
     # Auditoría / Timeline (alias solicitado en Trello)
@@ -29,8 +45,16 @@ urlpatterns = [
 
     # Documentos
     path("documentos/subir/", DocumentUploadView.as_view(), name="documentos-subir"),
+    path("documentos/firmar/", DocumentSignView.as_view(), name="documentos-firmar"),
+    path("documentos/confirmar/", DocumentConfirmView.as_view(), name="documentos-confirmar"),
+    path("documentos/local/subir/", LocalStorageUploadView.as_view(), name="documentos-local-subir"),
+    path("documentos/reanudable/", UploadSessionCreateView.as_view(), name="documentos-reanudable"),
+    path("documentos/reanudable/<uuid:pk>/", UploadSessionView.as_view(), name="documentos-reanudable-detail"),
     path("documentos/", DocumentListView.as_view(), name="documentos-list"),
 
     # Sync offline
     path("sync/solicitudes/", SyncSolicitudesView.as_view(), name="sync-solicitudes"),
+
+    # Métricas (cache de cases, deduplicación)
+    path("admin/metricas/", AdminMetricsView.as_view(), name="admin-metricas"),
 ]
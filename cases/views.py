@@ -1,44 +1,74 @@
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Case
+from config.pagination import KeysetPagination, PageOrCursorPagination
+
+from .models import Case, CaseDocument
 from .serializers import (
     CaseSerializer,
     CaseCreateSerializer,
     CaseUpdateSerializer,
     CaseListSerializer,
+    split_param,
 )
+from . import cache as case_cache
+from .etags import case_etag, etag_matches, list_etag, not_modified, related_versions
+from .filters import list_cases, visible_cases
 from .permissions import CanAccessCase
+from .idempotency import idempotent
 
+from audit.archive import archived_events, archived_page
 from audit.models import CaseEvent, EventType
-from audit.serializers import CaseEventSerializer
+from audit.writer import record_event
+from audit.serializers import CaseEventTimelineSerializer
 
 
 class CaseViewSet(viewsets.ModelViewSet):
     queryset = Case.objects.select_related("created_by", "assigned_to").all().order_by("-id")
     permission_classes = [IsAuthenticated, CanAccessCase]
+    pagination_class = PageOrCursorPagination
 
     def get_queryset(self):
         user = self.request.user
+        params = self.request.query_params
 
-        # ✅ query param: /solicitudes?mias=true
-        mias = (self.request.query_params.get("mias") or "").lower() in ["true", "1", "yes"]
-
-        if mias:
-            return self.queryset.filter(created_by=user)
-
-        # comportamiento normal:
-        # - ADMIN/GESTOR: ven todo
-        # - CAMPESINO/ASOCIACION: ven solo lo suyo
-        if user.role in ["ADMIN", "GESTOR"]:
-            return self.queryset
-        return self.queryset.filter(created_by=user)
+        if self.action == "list":
+            # ?mias=, ?status=&request_type=&...&updated_after=, ?q= (ver cases/filters.py::list_cases)
+            # (con ?cursor= el orden vuelve a ser por -id)
+            return list_cases(self.queryset, user, params).prefetch_related(*self.expand_prefetches())
+
+        # ✅ query param: /solicitudes?mias=true; si no, Case.objects.visible_to
+        return visible_cases(self.queryset, user, params)
+
+    def expand_prefetches(self):
+        # ?expand=documents,last_event -> 1 query extra por relación (no por fila)
+        expand = split_param(self.request.query_params, "expand")
+        prefetches = []
+        if "documents" in expand:
+            prefetches.append(Prefetch("documents", queryset=CaseDocument.objects.order_by("-id")))
+        if "last_event" in expand:
+            latest_id = CaseEvent.objects.filter(case=OuterRef("case")).order_by("-id").values("id")[:1]
+            prefetches.append(
+                Prefetch(
+                    "events",
+                    queryset=CaseEvent.objects.filter(id=Subquery(latest_id)),
+                    to_attr="prefetched_last_event",
+                )
+            )
+        return prefetches
 
     def get_serializer_class(self):
         # ✅ listado ligero para la app (estado, tipo, fechas)
         if self.action == "list":
+            # con ?fields= se puede pedir cualquier campo del detalle (ej. data.municipio)
+            if self.request.query_params.get("fields"):
+                return CaseSerializer
             return CaseListSerializer
 
         if self.action == "create":
@@ -49,34 +79,112 @@ class CaseViewSet(viewsets.ModelViewSet):
 
         return CaseSerializer
 
+    def list(self, request, *args, **kwargs):
+        # ETag del alcance filtrado -> 304 antes de paginar/serializar
+        queryset = self.filter_queryset(self.get_queryset())
+        expand = split_param(request.query_params, "expand")
+        etag = list_etag(request, queryset, related_versions(queryset, expand))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        # página cacheada por usuario/alcance: el ETag ya trae usuario, filtros y versión del alcance
+        parts = ("list", request.user.role, etag, request.build_absolute_uri())
+        data, hit = case_cache.cached(parts, lambda: super(CaseViewSet, self).list(request, *args, **kwargs).data)
+        return Response(data, headers={"ETag": etag, "X-Cache": "HIT" if hit else "MISS"})
+
+    def retrieve(self, request, *args, **kwargs):
+        case = self.get_object()
+        etag = case_etag(request, case.pk)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        def build():
+            prefetch_related_objects([case], *self.expand_prefetches())
+            return self.get_serializer(case).data
+
+        parts = ("detail", etag, case_cache.case_version(case.pk))
+        data, hit = case_cache.cached(parts, build)
+        return Response(data, headers={"ETag": etag, "X-Cache": "HIT" if hit else "MISS"})
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @transaction.atomic
     def perform_create(self, serializer):
+        # el evento se inserta al confirmar la transacción (audit/writer.py)
         case = serializer.save()
-        CaseEvent.objects.create(
-            case=case,
-            event_type=EventType.CREATED,
+        record_event(
+            case,
+            EventType.CREATED,
+            actor=self.request.user,
             to_status=case.status,
             payload={"applicant_type": case.applicant_type, "request_type": case.request_type},
-            created_by=self.request.user,
         )
 
+    @transaction.atomic
     def perform_update(self, serializer):
         case_before = self.get_object()
         case = serializer.save()
 
         status_changed = case_before.status != case.status
 
-        CaseEvent.objects.create(
-            case=case,
-            event_type=EventType.STATUS_CHANGED if status_changed else EventType.UPDATED,
+        record_event(
+            case,
+            EventType.STATUS_CHANGED if status_changed else EventType.UPDATED,
+            actor=self.request.user,
             from_status=case_before.status if status_changed else "",
             to_status=case.status if status_changed else "",
             payload={"action": "status_change"} if status_changed else {"changed": "data"},
-            created_by=self.request.user,
         )
 
 
+    @action(detail=False, methods=["GET"], url_path=r"por-codigo/(?P<code>[^/]+)")
+    def by_code(self, request, code=None):
+        # ✅ /solicitudes/por-codigo/CAP-2026-000123/ (índice único sobre code)
+        # fuera del alcance del usuario responde 404, igual que el detalle
+        case = get_object_or_404(self.get_queryset(), code=code.upper())
+        self.check_object_permissions(request, case)
+        return Response(self.get_serializer(case).data)
+
     @action(detail=True, methods=["GET"])
     def timeline(self, request, pk=None):
+        """
+        ?event_type=STATUS_CHANGED filtra por tipo.
+        Con ?cursor= (vacío para la primera página) pagina por (created_at, id)
+        y responde {"next", "results"}; sin cursor devuelve la lista completa.
+        """
         case = self.get_object()
-        events = CaseEvent.objects.filter(case=case).order_by("created_at")
-        return Response(CaseEventSerializer(events, many=True).data)
+
+        event_type = request.query_params.get("event_type")
+        if event_type and event_type not in EventType.values:
+            raise ValidationError({"event_type": f"Valor inválido. Opciones: {', '.join(EventType.values)}"})
+
+        etag = case_etag(request, case.pk)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        def build():
+            events = CaseEvent.objects.filter(case=case).select_related("created_by")
+            if event_type:
+                events = events.filter(event_type=event_type)
+
+            # los eventos archivados (audit/archive.py) son siempre anteriores a los de CaseEvent
+            if "cursor" not in request.query_params:
+                archived = archived_events([case.pk]).get(case.pk, [])
+                if event_type:
+                    archived = [e for e in archived if e.event_type == event_type]
+                prefetch_related_objects(archived, "created_by")
+                return CaseEventTimelineSerializer([*archived, *events.order_by("created_at", "id")], many=True).data
+
+            # paginado: solo se descomprimen los segmentos que tocan la página
+            def archived(position, count):
+                return archived_page(case.pk, position, count, event_type)
+
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(events, request, view=self, head=archived)
+            return paginator.get_paginated_response(CaseEventTimelineSerializer(page, many=True).data).data
+
+        parts = ("timeline", etag, case_cache.case_version(case.pk))
+        data, hit = case_cache.cached(parts, build)
+        return Response(data, headers={"ETag": etag, "X-Cache": "HIT" if hit else "MISS"})
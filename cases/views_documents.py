@@ -1,20 +1,41 @@
-import cloudinary.uploader
-
+from django.conf import settings
+from django.core import signing
+from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Case, CaseDocument
+from .etags import case_etag, etag_matches, not_modified
+from .hashing import install as install_sha256, uploaded_sha256
+from .idempotency import idempotent
+from .models import Case, CaseDocument, DocumentStatus
+from .offload import enqueue, spool, use_queue
 from .permissions import CanAccessCase
-from .serializers_documents import CaseDocumentSerializer, CaseDocumentUploadSerializer
+from .serializers_documents import (
+    CaseDocumentSerializer,
+    CaseDocumentUploadSerializer,
+    DocumentConfirmSerializer,
+    DocumentSignSerializer,
+)
+from .services_documents import create_document, find_duplicate, reuse_document
+from .storage import LocalStorage, StorageError, case_folder, get_storage
+
+TICKET_SALT = "documentos.firmar"
 
 
 class DocumentUploadView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
+    def initialize_request(self, request, *args, **kwargs):
+        # el hash se calcula mientras se recibe el multipart: el handler va antes de
+        # autenticar/parsear (ver cases/hashing.py)
+        self.sha256_handler = install_sha256(request)
+        return super().initialize_request(request, *args, **kwargs)
+
+    @idempotent
     def post(self, request):
         ser = CaseDocumentUploadSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
@@ -22,6 +43,7 @@ class DocumentUploadView(APIView):
         case_id = ser.validated_data["case_id"]
         category = ser.validated_data.get("category", "OTRO")
         file = ser.validated_data["file"]
+        sha256 = uploaded_sha256(self.sha256_handler, "file", file)
 
         case = Case.objects.get(id=case_id)
 
@@ -30,22 +52,50 @@ class DocumentUploadView(APIView):
         if not perm.has_object_permission(request, None, case):
             return Response({"detail": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
 
-        # ☁️ subir a Cloudinary
-        result = cloudinary.uploader.upload(
-            file,
-            folder=f"campesena/cases/{case.id}",
-            resource_type="auto",
-        )
+        # mismo contenido ya subido por este usuario: solo una fila nueva, sin volver a subir
+        original = find_duplicate(request.user, sha256)
+        if original is not None:
+            doc = reuse_document(
+                original,
+                case,
+                request.user,
+                category=category,
+                original_name=file.name,
+                mime_type=getattr(file, "content_type", ""),
+            )
+            return Response(
+                CaseDocumentSerializer(doc, context={"request": request}).data,
+                status=status.HTTP_201_CREATED,
+            )
 
-        doc = CaseDocument.objects.create(
-            case=case,
+        # modo cola: al spool local y 202; process_document_queue lo sube después
+        if use_queue(request):
+            doc = enqueue(
+                case,
+                request.user,
+                spool(file),
+                file.size,
+                category=category,
+                original_name=file.name,
+                mime_type=getattr(file, "content_type", ""),
+                sha256=sha256,
+            )
+            return Response(
+                CaseDocumentSerializer(doc, context={"request": request}).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        # ☁️ subir (Cloudinary o disco según DOCUMENT_STORAGE)
+        stored = get_storage().upload(file, case_folder(case))
+
+        doc = create_document(
+            case,
+            request.user,
+            stored,
             category=category,
-            file_url=result["secure_url"],
-            public_id=result.get("public_id", ""),
             original_name=file.name,
-            size_bytes=file.size,
-            mime_type=getattr(file, "content_type", "") or "",
-            uploaded_by=request.user,
+            mime_type=getattr(file, "content_type", ""),
+            sha256=sha256,
         )
 
         return Response(
@@ -54,6 +104,127 @@ class DocumentUploadView(APIView):
         )
 
 
+class DocumentSignView(APIView):
+    """
+    Paso 1 de la subida directa: la app pide una subida firmada, manda el
+    archivo al almacenamiento (POST multipart a upload.url con upload.fields)
+    y luego confirma en /documentos/confirmar/ con el ticket. El archivo no
+    pasa por este servidor.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ser = DocumentSignSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        case = get_object_or_404(Case, id=ser.validated_data["case_id"])
+        perm = CanAccessCase()
+        if not perm.has_object_permission(request, None, case):
+            return Response({"detail": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+
+        storage = get_storage()
+        upload = storage.sign_upload(case_folder(case))
+        upload["url"] = request.build_absolute_uri(upload["url"])
+
+        ticket = signing.dumps(
+            {
+                "case": case.id,
+                "user": request.user.pk,
+                "storage": storage.name,
+                "public_id": upload["public_id"],
+                "category": ser.validated_data.get("category", "OTRO"),
+                "original_name": ser.validated_data["original_name"],
+                "mime_type": ser.validated_data.get("mime_type", ""),
+            },
+            salt=TICKET_SALT,
+        )
+        return Response({"upload": upload, "ticket": ticket, "expires_in": settings.DOCUMENT_SIGNED_UPLOAD_TTL})
+
+
+class DocumentConfirmView(APIView):
+    """Paso 2: verifica la respuesta firmada del almacenamiento y registra el documento."""
+    permission_classes = [IsAuthenticated]
+
+    @idempotent
+    def post(self, request):
+        ser = DocumentConfirmSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        try:
+            ticket = signing.loads(
+                ser.validated_data["ticket"], salt=TICKET_SALT, max_age=settings.DOCUMENT_SIGNED_UPLOAD_TTL
+            )
+        except signing.BadSignature:
+            return Response({"ticket": ["Ticket inválido o vencido."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        storage = get_storage()
+        if ticket["user"] != request.user.pk or ticket["storage"] != storage.name:
+            return Response({"ticket": ["Ticket inválido o vencido."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        case = get_object_or_404(Case, id=ticket["case"])
+        perm = CanAccessCase()
+        if not perm.has_object_permission(request, None, case):
+            return Response({"detail": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+
+        # confirmar dos veces el mismo ticket no duplica el documento
+        doc = CaseDocument.objects.filter(case=case, public_id=ticket["public_id"]).first()
+        if doc is not None:
+            return Response(CaseDocumentSerializer(doc, context={"request": request}).data)
+
+        # rechazada -> se borra del almacenamiento (el public_id lo generó firmar/, no la app)
+        try:
+            stored = storage.verify_upload(ser.validated_data["result"], ticket["public_id"])
+        except StorageError as e:
+            storage.delete(ticket["public_id"])
+            return Response({"result": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_mb = settings.DOCUMENT_MAX_MB
+        if stored["size_bytes"] > max_mb * 1024 * 1024:
+            storage.delete(ticket["public_id"])
+            return Response(
+                {"result": [f"Archivo demasiado grande. Máximo {max_mb}MB."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        doc = create_document(
+            case,
+            request.user,
+            stored,
+            category=ticket["category"],
+            original_name=ticket["original_name"],
+            mime_type=ticket["mime_type"],
+        )
+        return Response(
+            CaseDocumentSerializer(doc, context={"request": request}).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class LocalStorageUploadView(APIView):
+    """
+    Imita el endpoint de subida de Cloudinary cuando DOCUMENT_STORAGE="local".
+    Sin JWT: lo autoriza el token firmado de /documentos/firmar/.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        storage = get_storage()
+        if not isinstance(storage, LocalStorage):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        file = request.data.get("file")
+        if file is None:
+            return Response({"file": ["Este campo es requerido."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = storage.receive(request.data.get("token", ""), file)
+        except StorageError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
 class DocumentListView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -68,5 +239,21 @@ class DocumentListView(APIView):
         if not perm.has_object_permission(request, None, case):
             return Response({"detail": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
 
+        etag = case_etag(request, case.pk)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
         docs = CaseDocument.objects.filter(case=case).order_by("-id")
-        return Response(CaseDocumentSerializer(docs, many=True, context={"request": request}).data)
+        # ?status=PENDING|READY|FAILED
+        doc_status = request.query_params.get("status")
+        if doc_status:
+            if doc_status not in DocumentStatus.values:
+                return Response(
+                    {"status": f"Valor inválido. Opciones: {', '.join(DocumentStatus.values)}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            docs = docs.filter(status=doc_status)
+        return Response(
+            CaseDocumentSerializer(docs, many=True, context={"request": request}).data,
+            headers={"ETag": etag},
+        )
@@ -0,0 +1,163 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .filters import list_cases
+from .models import Case
+from .serializers import split_param
+from audit.archive import archived_events
+from audit.models import CaseEvent
+from audit.serializers import CaseEventSerializer
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+BASE_COLUMNS = [
+    "id",
+    "code",
+    "applicant_type",
+    "request_type",
+    "status",
+    "municipio",
+    "actividad_productiva",
+    "tema_capacitacion",
+    "monto_estimado",
+    "created_by",
+    "assigned_to",
+    "created_at",
+    "updated_at",
+]
+
+
+# una celda que empieza así la ejecuta Excel/LibreOffice como fórmula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def case_row(case, data_keys, events=None):
+    data = case.data if isinstance(case.data, dict) else {}
+    row = {
+        "id": case.id,
+        "code": case.code,
+        "applicant_type": case.applicant_type,
+        "request_type": case.request_type,
+        "status": case.status,
+        "municipio": case.municipio,
+        "actividad_productiva": case.actividad_productiva,
+        "tema_capacitacion": case.tema_capacitacion,
+        "monto_estimado": case.monto_estimado,
+        "created_by": case.created_by.email if case.created_by else "",
+        "assigned_to": case.assigned_to.email if case.assigned_to else "",
+        "created_at": case.created_at.isoformat(),
+        "updated_at": case.updated_at.isoformat(),
+    }
+    for key in data_keys:
+        row[f"data.{key}"] = data.get(key, "")
+    if events is not None:
+        row["eventos"] = CaseEventSerializer(events, many=True).data
+    return row
+
+
+def iter_rows(queryset, data_keys, include_events):
+    """
+    Filas de export en bloques de EXPORT_CHUNK_SIZE. Con eventos, cada bloque
+    trae además sus eventos archivados (1 query) y los antepone a los de
+    CaseEvent (prefetch del mismo bloque).
+    """
+    cases = queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    if not include_events:
+        for case in cases:
+            yield case_row(case, data_keys)
+        return
+
+    while chunk := list(islice(cases, settings.EXPORT_CHUNK_SIZE)):
+        archived = archived_events([case.id for case in chunk])
+        for case in chunk:
+            yield case_row(case, data_keys, [*archived.get(case.id, []), *case.events.all()])
+
+
+class CaseExportView(APIView):
+    """
+    GET /solicitudes/export/?format=csv|ndjson
+
+    Mismos filtros que el listado (?status=, ?municipio=, ?q=, ?mias=, ...)
+    y opciones:
+    - ?data_keys=a,b -> columnas data.a, data.b con esas claves de Case.data
+    - ?include_events=true -> historial de CaseEvent de cada solicitud
+      (CSV: columna "eventos" con JSON; NDJSON: lista "eventos")
+
+    Se genera fila por fila con .iterator(chunk_size): memoria constante
+    y sin COUNT, haya 1k o 1M solicitudes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= es nuestro parámetro, no el override de renderer de DRF
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        params = request.query_params
+        fmt = (params.get("format") or "csv").lower()
+        if fmt not in EXPORT_FORMATS:
+            return Response(
+                {"format": f"Formato inválido. Opciones: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data_keys = split_param(params, "data_keys")
+        include_events = (params.get("include_events") or "").lower() in ["true", "1", "yes"]
+
+        rows = iter_rows(self.get_queryset(include_events), data_keys, include_events)
+        if fmt == "csv":
+            columns = BASE_COLUMNS + [f"data.{key}" for key in data_keys] + (["eventos"] if include_events else [])
+            content = self.stream_csv(rows, columns)
+        else:
+            content = (json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n" for row in rows)
+
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt])
+        filename = f"solicitudes-{timezone.localdate():%Y%m%d}.{fmt}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def get_queryset(self, include_events=False):
+        # mismo alcance y filtros que el listado
+        queryset = list_cases(Case.objects.all(), self.request.user, self.request.query_params)
+        queryset = queryset.select_related("created_by", "assigned_to").order_by("id")
+        if include_events:
+            # con iterator(chunk_size) el prefetch se hace por bloque
+            queryset = queryset.prefetch_related(
+                Prefetch("events", queryset=CaseEvent.objects.order_by("created_at", "id"))
+            )
+        return queryset
+
+    def stream_csv(self, rows, columns):
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            if "eventos" in row:
+                row["eventos"] = json.dumps(row["eventos"], cls=DjangoJSONEncoder, ensure_ascii=False)
+            yield writer.writerow([csv_cell(row[c]) for c in columns])
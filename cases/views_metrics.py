@@ -0,0 +1,32 @@
+import os
+
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.permissions import IsAdmin
+
+from . import cache as case_cache
+from . import metrics
+from .services_documents import DEDUP_BYTES_SAVED
+
+
+class AdminMetricsView(APIView):
+    """
+    GET /admin/metricas/ -> contadores de cases.metrics: aciertos del cache
+    de representaciones y bytes que la deduplicación evitó subir.
+
+    Con un cache compartido son los de todos los workers; con LocMemCache
+    (`shared: false`) son solo los del proceso que atendió esta request.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(
+            {
+                "cache": case_cache.stats(),
+                "dedup_bytes_saved": metrics.get(DEDUP_BYTES_SAVED),
+                "shared": metrics.is_shared(),
+                "pid": os.getpid(),
+            }
+        )
@@ -0,0 +1,71 @@
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncYear
+from django.utils.dateparse import parse_date
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .models import CaseSummary
+from .permissions import IsReviewer
+
+BUCKETS = {
+    "day": None,
+    "month": TruncMonth,
+    "year": TruncYear,
+}
+
+
+class CaseSummaryView(APIView):
+    """
+    GET /solicitudes/resumen/?bucket=day|month|year&desde=YYYY-MM-DD&hasta=YYYY-MM-DD
+
+    Lee CaseSummary (conteos mantenidos incrementalmente): el costo depende
+    del número de grupos, no del número de solicitudes.
+    """
+    permission_classes = [IsAuthenticated, IsReviewer]
+
+    def get(self, request):
+        qs = CaseSummary.objects.filter(count__gt=0)
+
+        for param, lookup in (("desde", "day__gte"), ("hasta", "day__lte")):
+            value = request.query_params.get(param)
+            if value:
+                day = parse_date(value)
+                if day is None:
+                    return Response({param: "Fecha inválida. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+                qs = qs.filter(**{lookup: day})
+
+        bucket = request.query_params.get("bucket")
+        if bucket and bucket not in BUCKETS:
+            return Response(
+                {"bucket": f"Valor inválido. Opciones: {', '.join(BUCKETS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def group(field):
+            rows = qs.values(field).annotate(total=Sum("count")).order_by(field)
+            return {row[field]: row["total"] for row in rows}
+
+        por_estado = group("status")
+        body = {
+            "total": sum(por_estado.values()),
+            "por_estado": por_estado,
+            "por_tipo": group("request_type"),
+            "por_solicitante": group("applicant_type"),
+            "por_municipio": group("municipio"),
+        }
+
+        if bucket:
+            trunc = BUCKETS[bucket]
+            periods = qs.annotate(periodo=trunc("day")) if trunc else qs.annotate(periodo=F("day"))
+            rows = periods.values("periodo", "status").annotate(total=Sum("count")).order_by("periodo", "status")
+
+            series = {}
+            for row in rows:
+                entry = series.setdefault(row["periodo"], {"periodo": row["periodo"], "total": 0, "por_estado": {}})
+                entry["total"] += row["total"]
+                entry["por_estado"][row["status"]] = row["total"]
+            body["series"] = list(series.values())
+
+        return Response(body, status=status.HTTP_200_OK)
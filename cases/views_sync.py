@@ -1,81 +1,211 @@
-from django.db import transaction
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Case, CaseStatus
-from .serializers_sync import SyncSolicitudesSerializer
-from audit.models import CaseEvent, EventType
+from config.pagination import decode_cursor, encode_cursor
+
+from .idempotency import idempotent
+from .models import Case, CaseDocument
+from .serializers import CaseSerializer
+from .serializers_documents import CaseDocumentSerializer
+from .serializers_sync import SyncSolicitudesSerializer, SyncSolicitudItemSerializer
+from .services_sync import sync_solicitudes
+from audit.models import CaseEvent
+from audit.serializers import CaseEventSerializer
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def _decode_moment(pos):
+    # [marca de tiempo, id] o None; los cursores viejos guardaban un id suelto
+    # (eventos/documentos): ese flujo se vuelve a bajar y la app deduplica por id
+    if pos is None or isinstance(pos, int):
+        return None
+    pos = [pos[0], int(pos[1])]
+    if parse_datetime(pos[0]) is None:
+        raise ValueError
+    return pos
+
+
+def _window(queryset, field, pos, horizon):
+    """
+    Filas con (field, id) > pos y field <= horizon, en orden. El horizonte
+    (ahora - SYNC_PULL_LAG_SECONDS) hace el cursor seguro frente a commits
+    fuera de orden: una fila con marca anterior que todavía no confirmó no
+    queda atrás del cursor, porque el cursor aún no llega a su marca.
+    """
+    queryset = queryset.filter(**{f"{field}__lte": horizon}).order_by(field, "id")
+    if not pos:
+        return queryset
+    moment, pk = parse_datetime(pos[0]), pos[1]
+    return queryset.filter(Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": pk}))
+
+
+def _next(rows, field, pos):
+    return [getattr(rows[-1], field).isoformat(), rows[-1].id] if rows else pos
+
+
+def decode_pull_cursor(cursor):
+    """
+    El cursor es opaco para la app: guarda la última posición vista de cada
+    flujo -> cases [updated_at, id], eventos [created_at, id] y documentos
+    [updated_at, id] (un documento vuelve a bajar cuando cambia, p.ej.
+    PENDING -> READY).
+    """
+    if not cursor:
+        return {"c": None, "e": None, "d": None}
+    try:
+        position = decode_cursor(cursor)
+        return {key: _decode_moment(position[key]) for key in ("c", "e", "d")}
+    except (ValueError, TypeError, KeyError, IndexError):
+        return None
 
 
 class SyncSolicitudesView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    def get(self, request):
+        """
+        Delta pull: /sync/solicitudes/?since=<cursor>
+        Devuelve solo lo que cambió después del cursor (cases, eventos nuevos y
+        documentos nuevos o cambiados dentro del alcance del usuario) y el cursor siguiente.
+        Si has_more es true, la app debe volver a pedir con el cursor nuevo.
+        Lo cambiado en los últimos SYNC_PULL_LAG_SECONDS llega en el pull siguiente.
+        """
+        position = decode_pull_cursor(request.query_params.get("since"))
+        if position is None:
+            return Response({"detail": "Cursor inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = settings.SYNC_PULL_LIMIT
+        horizon = timezone.now() - timedelta(seconds=settings.SYNC_PULL_LAG_SECONDS)
+        scope = Case.objects.visible_to(request.user)
+
+        cases_qs = scope.select_related("created_by", "assigned_to")
+        cases = list(_window(cases_qs, "updated_at", position["c"], horizon)[: limit + 1])
+        events_qs = CaseEvent.objects.filter(case__in=scope)
+        events = list(_window(events_qs, "created_at", position["e"], horizon)[: limit + 1])
+        documents_qs = CaseDocument.objects.filter(case__in=scope)
+        documents = list(_window(documents_qs, "updated_at", position["d"], horizon)[: limit + 1])
+
+        has_more = any(len(rows) > limit for rows in (cases, events, documents))
+        cases, events, documents = cases[:limit], events[:limit], documents[:limit]
+
+        next_position = {
+            "c": _next(cases, "updated_at", position["c"]),
+            "e": _next(events, "created_at", position["e"]),
+            "d": _next(documents, "updated_at", position["d"]),
+        }
+
+        ctx = {"request": request}
+        return Response(
+            {
+                "solicitudes": CaseSerializer(cases, many=True, context=ctx).data,
+                "eventos": [
+                    {"case": e.case_id, **data}
+                    for e, data in zip(events, CaseEventSerializer(events, many=True, context=ctx).data)
+                ],
+                "documentos": CaseDocumentSerializer(documents, many=True, context=ctx).data,
+                "cursor": encode_cursor(next_position),
+                "has_more": has_more,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @idempotent
     def post(self, request):
+        # ✅ modo streaming: una solicitud por línea, commits por bloques
+        if request.content_type.startswith(NDJSON_CONTENT_TYPE):
+            submit_all = (request.query_params.get("submit") or "").lower() in ["true", "1", "yes"]
+            return StreamingHttpResponse(
+                self.stream_ndjson(request.stream, request.user, submit_all),
+                content_type=NDJSON_CONTENT_TYPE,
+            )
+
         ser = SyncSolicitudesSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
 
-        submit_all = ser.validated_data.get("submit", False)
-        items = ser.validated_data["solicitudes"]
-
-        mapping = {}
-        created = 0
-        updated = 0
-
-        for item in items:
-            ext_uuid = item["uuid_externo"]
-            applicant_type = item["applicant_type"]
-            request_type = item["request_type"]
-            data = item.get("data", {}) or {}
-            desired_status = item.get("status", CaseStatus.BORRADOR)
-            if submit_all:
-                desired_status = CaseStatus.REGISTRADA
-
-            # ✅ idempotente: si existe ese external_uuid, NO se crea otro
-            case = Case.objects.filter(external_uuid=ext_uuid).first()
-
-            if case:
-                # seguridad: si el uuid existe pero no es del usuario, no lo tocamos
-                if case.created_by_id != request.user.id:
-                    continue
-
-                # opcional: actualizar data si venía más reciente
-                # (MVP: merge simple)
-                case.data = data or case.data
-
-                # si se pide REGISTRADA y está en BORRADOR, lo subimos
-                if desired_status == CaseStatus.REGISTRADA and case.status == CaseStatus.BORRADOR:
-                    case.status = CaseStatus.REGISTRADA
-                case.save(update_fields=["data", "status", "updated_at"])
-
-                mapping[str(ext_uuid)] = case.id
-                updated += 1
-                continue
-
-            # crear nueva
-            case = Case.objects.create(
-                applicant_type=applicant_type,
-                request_type=request_type,
-                data=data,
-                status=desired_status,
-                created_by=request.user,
-                external_uuid=ext_uuid,
-            )
-
-            CaseEvent.objects.create(
-                case=case,
-                event_type=EventType.CREATED,
-                to_status=case.status,
-                payload={"source": "offline_sync"},
-                created_by=request.user,
+        with transaction.atomic():
+            results = sync_solicitudes(
+                request.user,
+                ser.validated_data["solicitudes"],
+                submit_all=ser.validated_data.get("submit", False),
             )
 
-            mapping[str(ext_uuid)] = case.id
-            created += 1
+        mapping = {r["uuid_externo"]: r["id"] for r in results if r["status"] != "skipped"}
+        created = sum(1 for r in results if r["status"] == "created")
+        updated = sum(1 for r in results if r["status"] == "updated")
 
         return Response(
             {"mapping": mapping, "created": created, "updated": updated},
             status=status.HTTP_200_OK,
         )
+
+    def stream_ndjson(self, stream, user, submit_all):
+        """
+        Lee el cuerpo línea por línea (memoria constante), valida cada item y
+        aplica los válidos en bloques de SYNC_CHUNK_SIZE, cada bloque en su
+        propio savepoint. Emite un resultado por línea a medida que avanza y
+        una línea final con el resumen.
+
+        Si un bloque falla solo se pierden sus items; lo ya confirmado queda
+        y, como el sync es idempotente por uuid_externo, el cliente puede
+        reenviar todo sin duplicar.
+        """
+        totals = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
+        pending = []
+
+        def emit(result):
+            totals[result["status"]] += 1
+            return json.dumps(result) + "\n"
+
+        def flush():
+            items = [item for _, item in pending]
+            try:
+                with transaction.atomic():
+                    results = sync_solicitudes(user, items, submit_all=submit_all)
+            except DatabaseError as exc:
+                results = [
+                    {"uuid_externo": str(item["uuid_externo"]), "id": None, "status": "error", "errors": {"detail": str(exc)}}
+                    for item in items
+                ]
+            for (line_no, _), result in zip(pending, results):
+                yield emit({"linea": line_no, **result})
+            pending.clear()
+
+        for line_no, raw in enumerate(stream or [], start=1):
+            raw = raw.strip()
+            if not raw:
+                continue
+
+            try:
+                payload = json.loads(raw)
+            except ValueError:
+                yield emit({"linea": line_no, "uuid_externo": None, "id": None, "status": "error",
+                            "errors": {"detail": "JSON inválido."}})
+                continue
+
+            ser = SyncSolicitudItemSerializer(data=payload, context={"submit": submit_all})
+            if not ser.is_valid():
+                uuid_externo = payload.get("uuid_externo") if isinstance(payload, dict) else None
+                yield emit({"linea": line_no, "uuid_externo": uuid_externo, "id": None, "status": "error",
+                            "errors": ser.errors})
+                continue
+
+            pending.append((line_no, ser.validated_data))
+            if len(pending) >= settings.SYNC_CHUNK_SIZE:
+                yield from flush()
+
+        if pending:
+            yield from flush()
+
+        yield json.dumps({"resumen": totals}) + "\n"
@@ -0,0 +1,35 @@
+from django.db import transaction
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .permissions import IsReviewer
+from .serializers_transitions import CaseTransitionSerializer
+from .services_transitions import transition_cases
+
+
+class CaseTransitionView(APIView):
+    """
+    POST /solicitudes/transiciones/
+    {"ids": [1, 2, 3], "from_status": "REGISTRADA", "to_status": "EN_REVISION"}
+
+    Responde {"transitioned": [...], "skipped": [{"id", "status"}]}; status es
+    null si el id no existe. Hacia REGISTRADA se aplican los esquemas de
+    cases/schemas.py: los que no cumplen van en skipped con "errors".
+    No se puede mover a BORRADOR.
+    """
+    permission_classes = [IsAuthenticated, IsReviewer]
+
+    def post(self, request):
+        ser = CaseTransitionSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            result = transition_cases(
+                request.user,
+                ser.validated_data["ids"],
+                ser.validated_data["from_status"],
+                ser.validated_data["to_status"],
+            )
+        return Response(result, status=status.HTTP_200_OK)
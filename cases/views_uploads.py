@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .idempotency import idempotent
+from .models import Case, UploadSession
+from .permissions import CanAccessCase
+from .serializers_documents import UploadSessionCreateSerializer, UploadSessionSerializer
+from .uploads import LengthExceeded, append, discard, finish, new_expiry
+
+TUS_VERSION = "1.0.0"
+PATCH_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+def upload_headers(session, **extra):
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.length),
+        "Cache-Control": "no-store",
+        **extra,
+    }
+
+
+class UploadSessionCreateView(APIView):
+    """
+    Subida reanudable (estilo tus):
+    1. POST /documentos/reanudable/ {case_id, original_name, length, ...} -> 201 + Location
+    2. PATCH Location (Upload-Offset, Content-Type application/offset+octet-stream) con cada parte
+    3. HEAD Location -> Upload-Offset para reanudar tras un corte
+    Al completar, el PATCH responde 200 con el documento creado.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @idempotent
+    def post(self, request):
+        ser = UploadSessionCreateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        case = get_object_or_404(Case, id=ser.validated_data["case_id"])
+        perm = CanAccessCase()
+        if not perm.has_object_permission(request, None, case):
+            return Response({"detail": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+
+        session = UploadSession.objects.create(
+            case=case,
+            category=ser.validated_data.get("category", "OTRO"),
+            original_name=ser.validated_data["original_name"],
+            mime_type=ser.validated_data.get("mime_type", ""),
+            length=ser.validated_data["length"],
+            created_by=request.user,
+            expires_at=new_expiry(),
+        )
+        location = request.build_absolute_uri(f"{request.path}{session.pk}/")
+        return Response(
+            UploadSessionSerializer(session).data,
+            status=status.HTTP_201_CREATED,
+            headers=upload_headers(session, Location=location),
+        )
+
+
+class UploadSessionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_session(self, request, pk, lock=False):
+        # solo quien la creó ve la sesión; el resto recibe 404
+        sessions = UploadSession.objects.select_related("case", "document")
+        if lock:
+            sessions = sessions.select_for_update(of=("self",))
+        return get_object_or_404(sessions, pk=pk, created_by=request.user)
+
+    def expired(self, session):
+        if session.document_id is None and session.expires_at <= timezone.now():
+            return Response(
+                {"detail": "La subida venció; inicie una nueva."},
+                status=status.HTTP_410_GONE,
+                headers={"Tus-Resumable": TUS_VERSION},
+            )
+        return None
+
+    def get(self, request, pk):
+        # HEAD usa este mismo método (Django descarta el body)
+        session = self.get_session(request, pk)
+        gone = self.expired(session)
+        if gone:
+            return gone
+        return Response(UploadSessionSerializer(session).data, headers=upload_headers(session))
+
+    def patch(self, request, pk):
+        if request.content_type.split(";")[0].strip() != PATCH_CONTENT_TYPE:
+            return Response(
+                {"detail": f"Content-Type debe ser {PATCH_CONTENT_TYPE}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return Response({"detail": "Falta Upload-Offset."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 1) tomar la sesión en una transacción corta: el cuerpo llega lento (3G) y no
+        # debe tener abierta una transacción ni el lock de fila mientras tanto
+        with transaction.atomic():
+            session = self.get_session(request, pk, lock=True)
+            gone = self.expired(session)
+            if gone:
+                return gone
+
+            if offset != session.offset:
+                return Response(
+                    {"detail": "Upload-Offset no coincide; consulte HEAD y reanude."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers=upload_headers(session),
+                )
+            if not session.is_complete():
+                now = timezone.now()
+                if session.patch_lease and session.patch_lease > now:
+                    return Response(
+                        {"detail": "Hay otro PATCH en curso para esta subida."},
+                        status=status.HTTP_409_CONFLICT,
+                        headers=upload_headers(session),
+                    )
+                lease = now + timedelta(seconds=settings.DOCUMENT_UPLOAD_PATCH_LEASE_SECONDS)
+                UploadSession.objects.filter(pk=session.pk).update(patch_lease=lease)
+
+        # 2) escribir la parte sin transacción; el offset nuevo se guarda solo si la
+        # sesión sigue en el offset y el lease que tomamos
+        if not session.is_complete():
+            claimed = UploadSession.objects.filter(pk=session.pk, offset=offset, patch_lease=lease)
+            try:
+                new_offset = append(session, request.stream, offset)
+            except LengthExceeded:
+                claimed.update(patch_lease=None)
+                return Response(
+                    {"detail": "Los datos exceden Upload-Length."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                    headers=upload_headers(session),
+                )
+            except Exception:
+                claimed.update(patch_lease=None)
+                raise
+            expires_at = new_expiry()
+            if not claimed.update(offset=new_offset, expires_at=expires_at, patch_lease=None):
+                session = self.get_session(request, pk)
+                return Response(
+                    {"detail": "La subida cambió mientras se escribía; consulte HEAD y reanude."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers=upload_headers(session),
+                )
+            session.offset, session.expires_at = new_offset, expires_at
+
+        if not session.is_complete():
+            return Response(status=status.HTTP_204_NO_CONTENT, headers=upload_headers(session))
+
+        # 2) completa: entregar al almacenamiento sin lock ni transacción abiertos (la subida
+        # puede tardar); finish() registra el documento con un UPDATE condicional. Si el
+        # backend falla el offset queda y el cliente reintenta con un PATCH vacío.
+        if session.document is None:
+            finish(session)
+            session = self.get_session(request, pk)
+            if session.document is None:
+                return Response(
+                    {"detail": "La subida se está procesando; reintente."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers=upload_headers(session),
+                )
+
+        return Response(UploadSessionSerializer(session).data, headers=upload_headers(session))
+
+    def delete(self, request, pk):
+        session = self.get_session(request, pk)
+        discard(session)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT, headers={"Tus-Resumable": TUS_VERSION})
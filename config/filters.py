@@ -0,0 +1,63 @@
+"""
+Lectura de query params para filtros (?status=, ?created_after=, ...),
+compartida por las apps. Los valores inválidos responden 400 con el
+nombre del parámetro.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_choice(params, name, choices):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    if value not in choices.values:
+        raise ValidationError({name: f"Valor inválido. Opciones: {', '.join(choices.values)}"})
+    return value
+
+
+def parse_int(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Debe ser un número entero."})
+
+
+def parse_decimal(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({name: "Debe ser un número."})
+
+
+def parse_moment(params, name, end_of_day=False):
+    """
+    Acepta fecha (2026-02-01) o fecha-hora ISO (2026-02-01T10:00:00Z).
+    Con solo fecha, *_before incluye todo ese día.
+    """
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+
+    day = parse_date(value)
+    if day is not None:
+        moment = timezone.datetime.combine(
+            day, timezone.datetime.max.time() if end_of_day else timezone.datetime.min.time()
+        )
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValidationError({name: "Fecha inválida. Use YYYY-MM-DD o ISO 8601."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
@@ -0,0 +1,131 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(value):
+    """Cursor opaco: JSON compacto en base64 url-safe sin relleno."""
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverso de encode_cursor. ValueError si el cursor no es válido."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:  # binascii.Error y JSONDecodeError son ValueError
+        raise ValueError("Cursor inválido.") from exc
+
+
+class IdCursorPagination(CursorPagination):
+    # keyset sobre -id: WHERE id < <cursor> ORDER BY id DESC LIMIT n (sin COUNT ni OFFSET)
+    ordering = "-id"
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Por defecto se comporta como PageNumberPagination (?page=N, con count).
+    Si la petición trae ?cursor= (aunque vaya vacío para la primera página),
+    cambia a paginación keyset sobre -id: no hace COUNT(*) ni OFFSET, y la
+    respuesta trae solo next/previous/results.
+    """
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = IdCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset sobre (created_at, id): WHERE (created_at, id) > cursor
+    ORDER BY created_at, id LIMIT n. A diferencia de CursorPagination (que
+    solo guarda el primer campo + un offset para los empates), el cursor
+    guarda ambos valores, así que filas con el mismo created_at nunca se
+    saltan ni se repiten. Solo avanza (next); la respuesta trae next/results.
+
+    `head`: filas ya ordenadas que van antes de todo el queryset (ej: eventos
+    archivados); se paginan primero, con el mismo cursor. Puede ser una
+    lista o una función head(position, n) que trae solo lo de la página.
+
+    Con descending = True recorre de lo más nuevo a lo más viejo.
+    """
+    descending = False
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None, head=()):
+        self.request = request
+        position = self.decode_position(request.query_params.get(self.cursor_query_param))
+
+        if self.descending:
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            queryset = queryset.order_by("created_at", "id")
+
+        if position:
+            created_at, pk = position
+            if self.descending:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+                if not callable(head):
+                    head = [row for row in head if (row.created_at, row.id) < position]
+            else:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+                if not callable(head):
+                    head = [row for row in head if (row.created_at, row.id) > position]
+
+        size = self.get_page_size(request)
+        if callable(head):
+            # head perezoso: head(position, n) -> hasta n filas ya ordenadas después de position
+            head = head(position, size + 1)
+        rows = list(head[: size + 1])
+        if len(rows) <= size:
+            rows += list(queryset[: size + 1 - len(rows)])
+        page = rows[:size]
+        self.next_position = [page[-1].created_at.isoformat(), page[-1].id] if len(rows) > size else None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param) or self.page_size)
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_position(self, cursor):
+        if not cursor:
+            return None
+        try:
+            created_at, pk = decode_cursor(cursor)
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError
+            return created_at, int(pk)
+        except (ValueError, TypeError):
+            raise NotFound("Cursor inválido.")
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -137,6 +137,101 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# =========================
+# Cache
+# =========================
+# En producción (varios workers) se necesita un backend compartido (Idempotency-Key;
+# `check --deploy` avisa con LocMem), ej:
+# CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache CACHE_LOCATION=django_cache
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "campesena"),
+    }
+}
+
+# Idempotency-Key: cuánto se guarda la primera respuesta y cuánto dura el lock.
+# El lock se suelta al terminar; su TTL solo cuenta si el proceso muere, y debe
+# superar la request más lenta (subidas de documentos grandes).
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", str(15 * 60)))
+
+# cache de representaciones serializadas de cases (detalle, timeline, listados)
+CASE_CACHE_TIMEOUT = int(os.getenv("CASE_CACHE_TIMEOUT", "300"))
+
+# =========================
+# Sync offline
+# =========================
+# tamaño de bloque (items por savepoint) del sync en streaming NDJSON
+SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", "100"))
+# máximo de filas por flujo (cases / eventos / documentos) en el delta pull
+SYNC_PULL_LIMIT = int(os.getenv("SYNC_PULL_LIMIT", "500"))
+# el pull solo entrega filas con marca de tiempo <= ahora - SYNC_PULL_LAG_SECONDS: una
+# transacción más corta que esto ya confirmó cuando el cursor pasa por su updated_at/created_at
+SYNC_PULL_LAG_SECONDS = int(os.getenv("SYNC_PULL_LAG_SECONDS", "5"))
+
+# =========================
+# Auditoría
+# =========================
+# "buffered": los CaseEvent de una transacción se insertan juntos al confirmar
+# "strict": se insertan al momento (tests con TestCase, depuración)
+AUDIT_WRITE_MODE = os.getenv("AUDIT_WRITE_MODE", "buffered")
+
+# archive_audit_events: eventos más viejos que esto pasan a segmentos comprimidos
+AUDIT_ARCHIVE_AFTER_DAYS = int(os.getenv("AUDIT_ARCHIVE_AFTER_DAYS", "365"))
+AUDIT_ARCHIVE_BATCH_SIZE = int(os.getenv("AUDIT_ARCHIVE_BATCH_SIZE", "1000"))
+
+# checkpoint_audit_log: eventos por raíz Merkle y antigüedad mínima para entrar
+# (deja confirmar transacciones en curso con ids más bajos)
+AUDIT_CHECKPOINT_SIZE = int(os.getenv("AUDIT_CHECKPOINT_SIZE", "10000"))
+AUDIT_CHECKPOINT_LAG_SECONDS = int(os.getenv("AUDIT_CHECKPOINT_LAG_SECONDS", "300"))
+# tope de eventos que /admin/auditoria/verificar/ re-hashea en la request (cola sin checkpoint)
+AUDIT_VERIFY_MAX_EVENTS = int(os.getenv("AUDIT_VERIFY_MAX_EVENTS", "50000"))
+
+# =========================
+# Exportación
+# =========================
+# filas por viaje a la BD en /solicitudes/export/ (cursor del lado del servidor)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# =========================
+# Códigos de solicitud
+# =========================
+# números que cada proceso reserva de una vez por prefijo/año (CAP-2026-000123);
+# bloques más grandes = menos viajes a la BD, huecos más grandes al reiniciar
+CASE_CODE_BLOCK_SIZE = int(os.getenv("CASE_CODE_BLOCK_SIZE", "50"))
+
+# =========================
+# Documentos
+# =========================
+# "cloudinary" (producción) o "local" (disco, desarrollo/tests): ver cases/storage.py
+DOCUMENT_STORAGE = os.getenv("DOCUMENT_STORAGE", "cloudinary")
+DOCUMENT_LOCAL_ROOT = os.getenv("DOCUMENT_LOCAL_ROOT", os.path.join(MEDIA_ROOT, "documentos"))
+DOCUMENT_LOCAL_URL = os.getenv("DOCUMENT_LOCAL_URL", "http://localhost:8000/media/documentos/")
+# vigencia (segundos) de /documentos/firmar/: subir + confirmar dentro de esa ventana
+DOCUMENT_SIGNED_UPLOAD_TTL = int(os.getenv("DOCUMENT_SIGNED_UPLOAD_TTL", "900"))
+DOCUMENT_MAX_MB = int(os.getenv("DOCUMENT_MAX_MB", "10"))
+# subidas reanudables (/documentos/reanudable/): partes en disco local hasta completar
+DOCUMENT_SPOOL_DIR = os.getenv("DOCUMENT_SPOOL_DIR", os.path.join(BASE_DIR, "spool"))
+DOCUMENT_UPLOAD_CHUNK_SIZE = int(os.getenv("DOCUMENT_UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+# sin PATCH en este tiempo, la sesión vence (cleanup_upload_sessions borra la parte)
+DOCUMENT_UPLOAD_SESSION_TTL = int(os.getenv("DOCUMENT_UPLOAD_SESSION_TTL", str(24 * 3600)))
+# un PATCH toma la sesión por este tiempo mientras escribe a disco (sin transacción);
+# si el proceso muere a mitad, la sesión se libera al vencer
+DOCUMENT_UPLOAD_PATCH_LEASE_SECONDS = int(os.getenv("DOCUMENT_UPLOAD_PATCH_LEASE_SECONDS", "900"))
+# "sync": /documentos/subir/ sube al almacenamiento en la misma request (201)
+# "queue": guarda en el spool y responde 202; sube process_document_queue (mismo disco)
+# (con "sync", el cliente puede pedir la cola por request con `Prefer: respond-async`)
+DOCUMENT_UPLOAD_MODE = os.getenv("DOCUMENT_UPLOAD_MODE", "sync")
+DOCUMENT_OFFLOAD_MAX_ATTEMPTS = int(os.getenv("DOCUMENT_OFFLOAD_MAX_ATTEMPTS", "8"))
+# espera entre intentos: base * 2^(intento-1), hasta el máximo (segundos)
+DOCUMENT_OFFLOAD_BACKOFF_BASE = int(os.getenv("DOCUMENT_OFFLOAD_BACKOFF_BASE", "30"))
+DOCUMENT_OFFLOAD_BACKOFF_MAX = int(os.getenv("DOCUMENT_OFFLOAD_BACKOFF_MAX", "3600"))
+# un worker que muere con un documento tomado lo libera pasado este tiempo
+DOCUMENT_OFFLOAD_LEASE_SECONDS = int(os.getenv("DOCUMENT_OFFLOAD_LEASE_SECONDS", "300"))
+# process_document_queue --purge-failed borra el spool de los FAILED más viejos que esto
+DOCUMENT_OFFLOAD_FAILED_RETENTION_DAYS = int(os.getenv("DOCUMENT_OFFLOAD_FAILED_RETENTION_DAYS", "7"))
+
 # =========================
 # CORS
 # =========================
@@ -11,3 +11,14 @@ DATABASES = {
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "campesena-test",
+    }
+}
+
+# TestCase envuelve cada test en una transacción que nunca confirma:
+# los eventos de auditoría se escriben al momento
+AUDIT_WRITE_MODE = "strict"
@@ -13,5 +13,6 @@ urlpatterns = [
 
     path("api/", include("cases.urls")),
     path("api/", include("convocatorias.urls")),
+    path("api/", include("audit.urls")),
 
 ]
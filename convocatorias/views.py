@@ -2,6 +2,7 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 
 from accounts.permissions import IsAdmin
+from config.pagination import PageOrCursorPagination
 from .models import Convocatoria
 from .serializers import ConvocatoriaSerializer
 
@@ -9,3 +10,4 @@ class AdminConvocatoriaViewSet(viewsets.ModelViewSet):
     queryset = Convocatoria.objects.all().order_by("-id")
     serializer_class = ConvocatoriaSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = PageOrCursorPagination